@@ -0,0 +1,78 @@
+"""
+Filter matching cost against rule count and message length
+
+Run from the repository root:  python -m benchmarks.bench_filters
+"""
+import random
+import string
+import timeit
+
+from utils.filters import CompiledFilter
+
+RULE_COUNTS = (10, 100, 1000)
+MESSAGE_LENGTHS = (50, 500, 2000)
+# Messages timed per cell
+MESSAGES = 100
+# Share of rules that can't use the token index (punctuated words and regexes)
+MIXED_REGEX_SHARE = 0.25
+
+# Filler vocabulary, too short to collide with any generated rule
+_FILLER = ("hi", "ok", "yes", "no", "the", "a", "lol", "gg", "brb")
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+
+
+def make_rules(count: int, regex_share: float, rng: random.Random):
+    """Plain words and two-word phrases, plus ``regex_share`` punctuated words and regexes"""
+    rules = []
+    for rule_id in range(1, count + 1):
+        roll = rng.random()
+        if roll < regex_share / 2:
+            rules.append((rule_id, 'word', f"{_word(rng)}.{_word(rng)}"))
+        elif roll < regex_share:
+            rules.append((rule_id, 'regex', rf"{_word(rng)}\d+"))
+        elif roll < regex_share + (1 - regex_share) / 4:
+            rules.append((rule_id, 'word', f"{_word(rng)} {_word(rng)}"))
+        else:
+            rules.append((rule_id, 'word', _word(rng)))
+    return rules
+
+
+def make_messages(length: int, rng: random.Random):
+    """Messages that match no rule: the common case, and the most expensive one"""
+    messages = []
+    for _ in range(MESSAGES):
+        text = ""
+        while len(text) < length:
+            text += rng.choice(_FILLER) + " "
+        messages.append(text[:length])
+    return messages
+
+
+def run(title: str, regex_share: float, rng: random.Random):
+    print(title)
+    print("rules".rjust(6) + "".join(f"{f'{length} chars':>14}" for length in MESSAGE_LENGTHS))
+    for count in RULE_COUNTS:
+        compiled = CompiledFilter(make_rules(count, regex_share, rng))
+        cells = []
+        for length in MESSAGE_LENGTHS:
+            messages = make_messages(length, rng)
+            assert all(compiled.match(message) is None for message in messages)
+            seconds = min(timeit.repeat(
+                lambda: [compiled.match(message) for message in messages], number=1, repeat=3
+            ))
+            cells.append(f"{seconds / MESSAGES * 1e6:>11.1f} us")
+        print(f"{count:>6}" + "".join(cells))
+    print()
+
+
+def main():
+    rng = random.Random(0)
+    run("Word and phrase rules only (token index)", 0.0, rng)
+    run(f"Mixed, {MIXED_REGEX_SHARE:.0%} regex / punctuated rules (merged regex)", MIXED_REGEX_SHARE, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,576 @@
+import asyncio
+from collections import Counter
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands
+from typing import Optional
+from datetime import datetime, timedelta
+
+from utils.bulk import run_bounded
+from utils.embeds import EmbedFactory
+from utils.logger import bot_logger, mod_logger
+from utils.antispam import SpamDetector
+from utils.filters import MAX_REGEX_RULES, MAX_RULES, CompiledFilter, limit_error, validate_pattern
+from utils.guildconfig import GuildConfig
+from utils.raid import RAID_ACTIONS, RaidDetector, RaidSignal
+from config import Config
+
+# How long members caught in a raid are timed out for
+RAID_TIMEOUT_MINUTES = 60
+
+AGE_BUCKET_LABELS = ["<1h", "<1d", "<7d", "<30d", "older"]
+
+
+class AutoMod(commands.Cog):
+    """Automatic moderation — raid, spam and word/regex filters"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.raids = RaidDetector()
+        self.spam = SpamDetector()
+        # rule_id -> hits not yet written to the database
+        self._filter_hits: Counter = Counter()
+        # Strong references to response tasks so they aren't garbage collected
+        self._tasks: set[asyncio.Task] = set()
+
+    async def cog_load(self):
+        self.flush_filter_hits.start()
+
+    async def cog_unload(self):
+        self.flush_filter_hits.cancel()
+        await self._flush_filter_hits()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # ──────────────────────────────────────────────────────────────────
+    # Raid detection
+    # ──────────────────────────────────────────────────────────────────
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        config = await self.bot.get_guild_config(member.guild.id)
+        if not config.raid_enabled:
+            return
+
+        signal = self.raids.record(
+            member,
+            config.raid_window_seconds,
+            config.raid_join_threshold,
+        )
+        if signal:
+            # Respond off the join path so detection never waits on the API
+            self._spawn(self._respond_to_raid(member.guild, config, signal))
+
+    async def _respond_to_raid(self, guild: discord.Guild, config: GuildConfig, signal: RaidSignal):
+        action = config.raid_action or 'alert'
+
+        try:
+            if action == 'timeout':
+                await self._timeout_raiders(guild, signal.member_ids)
+
+            if not signal.new:
+                return
+
+            if action == 'lockdown':
+                await self._lock_down(guild)
+
+            mod_logger.warning(f"Raid detected in {guild.name}: {'; '.join(signal.reasons)}")
+            await self._send_raid_alert(guild, config, signal, action)
+        except discord.Forbidden:
+            bot_logger.warning(f"Missing permissions to respond to raid in {guild.name}")
+        except discord.HTTPException as e:
+            bot_logger.error(f"Failed to respond to raid in {guild.name}: {e}")
+
+    @staticmethod
+    def _lockdown_key(guild_id: int) -> str:
+        return f"lockdown:{guild_id}"
+
+    async def _lock_down(self, guild: discord.Guild):
+        """Raise verification to the highest level, remembering the old one across restarts"""
+        key = self._lockdown_key(guild.id)
+        if await self.bot.db.get_state(key) is not None:
+            return  # Already locked down; keep the level from before the first raid
+
+        # Saved before the edit, so a restart right after it can't lose the level
+        await self.bot.db.set_state(key, str(guild.verification_level.value))
+        try:
+            await guild.edit(verification_level=discord.VerificationLevel.highest, reason="Raid detected")
+        except discord.HTTPException:
+            await self.bot.db.delete_state(key)
+            raise
+
+    async def _timeout_raiders(self, guild: discord.Guild, member_ids: list[int]):
+        members = [
+            member for member in map(guild.get_member, member_ids)
+            if member
+            and not member.is_timed_out()
+            and not member.guild_permissions.manage_messages
+            and member.top_role < guild.me.top_role
+        ]
+        if not members:
+            return
+
+        duration = timedelta(minutes=RAID_TIMEOUT_MINUTES)
+        results = await run_bounded(
+            members,
+            lambda member: member.timeout(duration, reason="Raid detected")
+        )
+        actioned = [member for member, error in results if error is None]
+
+        await self.bot.db.log_actions([
+            (guild.id, member.id, self.bot.user.id, 'timeout',
+             f"Automatic: raid detected (Duration: {RAID_TIMEOUT_MINUTES}m)")
+            for member in actioned
+        ])
+
+    async def _send_raid_alert(self, guild: discord.Guild, config: GuildConfig,
+                               signal: RaidSignal, action: str):
+        channel = (await self.bot.guild_state.get(guild)).log_channel
+        if not channel:
+            return
+
+        embed = discord.Embed(
+            title="🚨 Raid Detected",
+            description="\n".join(f"• {reason}" for reason in signal.reasons),
+            color=Config.ERROR_COLOR,
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="Response", value=action.capitalize(), inline=True)
+        embed.add_field(name="Joins in Window", value=str(len(signal.member_ids)), inline=True)
+
+        detector = self.raids.get(guild.id)
+        if detector:
+            histogram = " | ".join(
+                f"{label}: {count}" for label, count in zip(AGE_BUCKET_LABELS, detector.histogram())
+            )
+            embed.add_field(name="Account Ages", value=histogram, inline=False)
+
+        if action == 'lockdown':
+            embed.set_footer(text="Verification level raised to highest. Use antiraid end to restore it.")
+
+        self.bot.log_sender.enqueue(channel, embed)
+
+    # ──────────────────────────────────────────────────────────────────
+    # Spam detection
+    # ──────────────────────────────────────────────────────────────────
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if not self._should_check(message):
+            return
+
+        if await self._check_filters(message):
+            return
+
+        config = await self.bot.get_guild_config(message.guild.id)
+        if not config.antispam_enabled:
+            return
+
+        reason = self.spam.check(
+            message.guild.id,
+            message.author.id,
+            message.content,
+            len(message.raw_mentions) + len(message.raw_role_mentions) + message.mention_everyone,
+            len(message.attachments),
+        )
+        if reason:
+            self._spawn(self._punish_spam(message, config, reason))
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        # The raw event fires for uncached messages too, and carries the full
+        # edited message, so old messages can't be edited past the filters
+        if 'content' not in payload.data:
+            return
+        after = payload.message
+        before = payload.cached_message
+        if before is not None and before.content == after.content:
+            return
+        if not self._should_check(after):
+            return
+        await self._check_filters(after)
+
+    @staticmethod
+    def _should_check(message: discord.Message) -> bool:
+        """Automod skips bots, DMs, webhooks and staff who can manage messages"""
+        return (
+            not message.author.bot
+            and message.guild is not None
+            and isinstance(message.author, discord.Member)
+            and not message.author.guild_permissions.manage_messages
+        )
+
+    async def _punish_spam(self, message: discord.Message, config: GuildConfig, reason: str):
+        member = message.author
+        guild = message.guild
+        minutes = config.antispam_timeout_minutes or 10
+
+        try:
+            await message.delete()
+        except (discord.NotFound, discord.Forbidden):
+            pass
+
+        try:
+            if member.top_role < guild.me.top_role:
+                await member.timeout(timedelta(minutes=minutes), reason=f"Automatic: {reason}")
+                await self.bot.db.log_action(
+                    guild.id, member.id, self.bot.user.id, 'timeout',
+                    f"Automatic: {reason} (Duration: {minutes}m)"
+                )
+                mod_logger.info(f"Auto-timed out {member} in {guild.name}: {reason}")
+        except discord.Forbidden:
+            bot_logger.warning(f"Missing permissions to timeout spammer in {guild.name}")
+            return
+        except discord.HTTPException as e:
+            bot_logger.error(f"Failed to timeout spammer in {guild.name}: {e}")
+            return
+
+        channel = (await self.bot.guild_state.get(guild)).log_channel
+        if not channel:
+            return
+
+        embed = EmbedFactory.moderation_action('timeout', member, guild.me, f"Automatic: {reason}")
+        embed.add_field(name="Duration", value=f"{minutes}m", inline=True)
+        embed.add_field(name="Channel", value=message.channel.mention, inline=True)
+        self.bot.log_sender.enqueue(channel, embed)
+
+    # ──────────────────────────────────────────────────────────────────
+    # Word / regex filters
+    # ──────────────────────────────────────────────────────────────────
+
+    async def _get_filter(self, guild_id: int) -> CompiledFilter:
+        """Compiled filter for a guild, built from the database on a cache miss"""
+        compiled = await self.bot.cache.get_guild_filter(guild_id)
+        if compiled is None:
+            rules = await self.bot.db.get_filter_rules(guild_id)
+            compiled = CompiledFilter((row['id'], row['kind'], row['pattern']) for row in rules)
+            await self.bot.cache.set_guild_filter(guild_id, compiled)
+        return compiled
+
+    async def _check_filters(self, message: discord.Message) -> bool:
+        """Act on a message that matches a filter rule; returns True if it matched"""
+        compiled = await self._get_filter(message.guild.id)
+        rule_id = compiled.match(message.content)
+        if rule_id is None:
+            return False
+
+        self._filter_hits[rule_id] += 1
+        self._spawn(self._handle_filter_hit(message, rule_id))
+        return True
+
+    async def _handle_filter_hit(self, message: discord.Message, rule_id: int):
+        try:
+            await message.delete()
+        except (discord.NotFound, discord.Forbidden):
+            pass
+
+        channel = (await self.bot.guild_state.get(message.guild)).log_channel
+        if not channel:
+            return
+
+        embed = discord.Embed(
+            title="🚫 Message Filtered",
+            description=f"Message by {message.author.mention} removed in {message.channel.mention}",
+            color=Config.WARNING_COLOR,
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="Content", value=message.content[:1024], inline=False)
+        embed.add_field(name="Rule", value=f"#{rule_id}", inline=True)
+        embed.set_footer(text=f"Message ID: {message.id} | User ID: {message.author.id}")
+
+        self.bot.log_sender.enqueue(channel, embed)
+
+    @tasks.loop(seconds=60)
+    async def flush_filter_hits(self):
+        await self._flush_filter_hits()
+
+    async def _flush_filter_hits(self):
+        if not self._filter_hits:
+            return
+        hits, self._filter_hits = self._filter_hits, Counter()
+        await self.bot.db.add_filter_hits([(count, rule_id) for rule_id, count in hits.items()])
+
+    # ──────────────────────────────────────────────────────────────────
+    # Commands — /antiraid
+    # ──────────────────────────────────────────────────────────────────
+
+    @commands.hybrid_group(
+        name="antiraid",
+        description="Raid detection configuration",
+        invoke_without_command=True,
+    )
+    @commands.has_permissions(administrator=True)
+    async def antiraid_group(self, ctx: commands.Context):
+        """Anti-raid commands"""
+        embed = await self._antiraid_embed(ctx.guild)
+        prefix = ctx.clean_prefix
+        embed.add_field(
+            name="Usage",
+            value=(
+                f"`{prefix}antiraid enable [threshold] [window] [action]`\n"
+                f"`{prefix}antiraid disable`\n"
+                f"`{prefix}antiraid end`\n"
+                f"`{prefix}antiraid info`"
+            ),
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    @antiraid_group.command(name="enable", description="Enable raid detection")
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(
+        threshold="Joins within the window that count as a raid (default 10)",
+        window="Window length in seconds (default 10)",
+        action="What to do when a raid is detected: alert, lockdown or timeout",
+    )
+    async def antiraid_enable(
+        self,
+        ctx: commands.Context,
+        threshold: Optional[int] = 10,
+        window: Optional[int] = 10,
+        action: Optional[str] = "alert",
+    ):
+        action = action.lower()
+        if action not in RAID_ACTIONS:
+            await ctx.send(f"❌ Action must be one of: {', '.join(RAID_ACTIONS)}")
+            return
+
+        threshold = max(2, threshold)
+        window = max(1, min(window, 600))
+
+        await self.bot.db.update_automod_settings(
+            ctx.guild.id,
+            raid_enabled=1,
+            raid_join_threshold=threshold,
+            raid_window_seconds=window,
+            raid_action=action,
+        )
+        await self.bot.invalidate_guild_config(ctx.guild.id)
+        self.raids.reset(ctx.guild.id)
+
+        embed = EmbedFactory.success(
+            "Raid Detection Enabled",
+            f"**Trigger:** {threshold} joins within {window}s\n**Response:** {action}"
+        )
+        await ctx.send(embed=embed)
+        mod_logger.info(
+            f"Raid detection enabled ({threshold}/{window}s, {action}) in {ctx.guild.name} by {ctx.author}"
+        )
+
+    @antiraid_group.command(name="disable", description="Disable raid detection")
+    @commands.has_permissions(administrator=True)
+    async def antiraid_disable(self, ctx: commands.Context):
+        await self.bot.db.update_automod_settings(ctx.guild.id, raid_enabled=0)
+        await self.bot.invalidate_guild_config(ctx.guild.id)
+        self.raids.reset(ctx.guild.id)
+
+        embed = EmbedFactory.success("Raid Detection Disabled", "Joins are no longer monitored.")
+        await ctx.send(embed=embed)
+        mod_logger.info(f"Raid detection disabled in {ctx.guild.name} by {ctx.author}")
+
+    @antiraid_group.command(name="end", description="End an active raid and lift the lockdown")
+    @commands.has_permissions(administrator=True)
+    async def antiraid_end(self, ctx: commands.Context):
+        self.raids.reset(ctx.guild.id)
+
+        key = self._lockdown_key(ctx.guild.id)
+        saved = await self.bot.db.get_state(key)
+        description = "Raid state has been reset."
+        if saved is not None:
+            previous = discord.VerificationLevel(int(saved))
+            try:
+                await ctx.guild.edit(verification_level=previous, reason=f"Raid ended by {ctx.author}")
+                await self.bot.db.delete_state(key)
+                description += f"\nVerification level restored to **{previous.name}**."
+            except discord.Forbidden:
+                # Kept, so running this again once permissions are fixed still restores it
+                description += "\n⚠️ I couldn't restore the verification level."
+
+        await ctx.send(embed=EmbedFactory.success("Raid Ended", description))
+        mod_logger.info(f"Raid ended in {ctx.guild.name} by {ctx.author}")
+
+    @antiraid_group.command(name="info", description="Show raid detection settings and state")
+    @commands.has_permissions(administrator=True)
+    async def antiraid_info(self, ctx: commands.Context):
+        await ctx.send(embed=await self._antiraid_embed(ctx.guild))
+
+    async def _antiraid_embed(self, guild: discord.Guild) -> discord.Embed:
+        """Raid detection settings and live state for a guild"""
+        config = await self.bot.get_guild_config(guild.id)
+        if not config.raid_enabled:
+            return EmbedFactory.info(
+                "Raid Detection",
+                "Raid detection is **disabled**. Use `/antiraid enable` to turn it on."
+            )
+
+        embed = EmbedFactory.info("Raid Detection")
+        embed.add_field(
+            name="Trigger",
+            value=f"{config.raid_join_threshold} joins / {config.raid_window_seconds}s",
+            inline=True
+        )
+        embed.add_field(name="Response", value=config.raid_action, inline=True)
+
+        detector = self.raids.get(guild.id)
+        if detector:
+            embed.add_field(name="Raid Active", value="Yes" if detector.active else "No", inline=True)
+            histogram = " | ".join(
+                f"{label}: {count}" for label, count in zip(AGE_BUCKET_LABELS, detector.histogram())
+            )
+            embed.add_field(name="Recent Joins by Account Age", value=histogram, inline=False)
+
+        return embed
+
+    # ──────────────────────────────────────────────────────────────────
+    # Commands — /antispam
+    # ──────────────────────────────────────────────────────────────────
+
+    @commands.hybrid_group(
+        name="antispam",
+        description="Spam detection configuration",
+        invoke_without_command=True,
+    )
+    @commands.has_permissions(administrator=True)
+    async def antispam_group(self, ctx: commands.Context):
+        """Anti-spam commands"""
+        config = await self.bot.get_guild_config(ctx.guild.id)
+        if config.antispam_enabled:
+            embed = EmbedFactory.info(
+                "Spam Detection",
+                f"Spam detection is **enabled**. Spammers are timed out for "
+                f"**{config.antispam_timeout_minutes}** minute(s)."
+            )
+        else:
+            embed = EmbedFactory.info("Spam Detection", "Spam detection is **disabled**.")
+        embed.add_field(
+            name="Usage",
+            value=f"`{ctx.clean_prefix}antispam enable [timeout_minutes]`\n`{ctx.clean_prefix}antispam disable`",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    @antispam_group.command(name="enable", description="Enable spam detection")
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(timeout_minutes="How long to timeout spammers for (default 10)")
+    async def antispam_enable(self, ctx: commands.Context, timeout_minutes: Optional[int] = 10):
+        timeout_minutes = max(1, min(timeout_minutes, 40320))  # Max 28 days
+
+        await self.bot.db.update_automod_settings(
+            ctx.guild.id,
+            antispam_enabled=1,
+            antispam_timeout_minutes=timeout_minutes,
+        )
+        await self.bot.invalidate_guild_config(ctx.guild.id)
+
+        embed = EmbedFactory.success(
+            "Spam Detection Enabled",
+            f"Spammers will be timed out for **{timeout_minutes}** minute(s) and their message deleted."
+        )
+        await ctx.send(embed=embed)
+        mod_logger.info(f"Spam detection enabled in {ctx.guild.name} by {ctx.author}")
+
+    @antispam_group.command(name="disable", description="Disable spam detection")
+    @commands.has_permissions(administrator=True)
+    async def antispam_disable(self, ctx: commands.Context):
+        await self.bot.db.update_automod_settings(ctx.guild.id, antispam_enabled=0)
+        await self.bot.invalidate_guild_config(ctx.guild.id)
+        self.spam.forget_guild(ctx.guild.id)
+
+        embed = EmbedFactory.success("Spam Detection Disabled", "Messages are no longer checked for spam.")
+        await ctx.send(embed=embed)
+        mod_logger.info(f"Spam detection disabled in {ctx.guild.name} by {ctx.author}")
+
+    # ──────────────────────────────────────────────────────────────────
+    # Commands — /filter
+    # ──────────────────────────────────────────────────────────────────
+
+    @commands.hybrid_group(
+        name="filter",
+        description="Word and regex filter configuration",
+        invoke_without_command=True,
+    )
+    @commands.has_permissions(administrator=True)
+    async def filter_group(self, ctx: commands.Context):
+        """Filter commands"""
+        compiled = await self._get_filter(ctx.guild.id)
+        embed = EmbedFactory.info(
+            "Filters",
+            f"**{len(compiled)}** of {MAX_RULES} rule(s), **{compiled.regex_rules}** of "
+            f"{MAX_REGEX_RULES} using regex."
+        )
+        prefix = ctx.clean_prefix
+        embed.add_field(
+            name="Usage",
+            value=(
+                f"`{prefix}filter add <word|regex> <pattern>`\n"
+                f"`{prefix}filter remove <rule_id>`\n"
+                f"`{prefix}filter list`"
+            ),
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    @filter_group.command(name="add", description="Add a word or regex filter")
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(
+        kind="word (whole word or phrase, case-insensitive) or regex",
+        pattern="The word, phrase or regular expression to filter",
+    )
+    async def filter_add(self, ctx: commands.Context, kind: str, *, pattern: str):
+        kind = kind.lower()
+        compiled = await self._get_filter(ctx.guild.id)
+        error = validate_pattern(kind, pattern) or limit_error(compiled, kind, pattern)
+        if error:
+            await ctx.send(f"❌ {error}")
+            return
+
+        rule_id = await self.bot.db.add_filter_rule(ctx.guild.id, kind, pattern, ctx.author.id)
+
+        # Patch the cached filter in place rather than reloading every rule
+        await self.bot.cache.set_guild_filter(ctx.guild.id, compiled.with_rule(rule_id, kind, pattern))
+
+        embed = EmbedFactory.success("Filter Added", f"Rule **#{rule_id}** ({kind}): `{pattern}`")
+        await ctx.send(embed=embed)
+        mod_logger.info(f"Filter #{rule_id} ({kind}: {pattern}) added in {ctx.guild.name} by {ctx.author}")
+
+    @filter_group.command(name="remove", description="Remove a filter rule")
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(rule_id="The ID of the rule to remove")
+    async def filter_remove(self, ctx: commands.Context, rule_id: int):
+        if not await self.bot.db.remove_filter_rule(ctx.guild.id, rule_id):
+            await ctx.send(embed=EmbedFactory.error("Rule Not Found", f"Filter rule #{rule_id} was not found."))
+            return
+
+        compiled = await self.bot.cache.get_guild_filter(ctx.guild.id)
+        if compiled is not None:
+            await self.bot.cache.set_guild_filter(ctx.guild.id, compiled.without_rule(rule_id))
+        self._filter_hits.pop(rule_id, None)
+
+        await ctx.send(embed=EmbedFactory.success("Filter Removed", f"Filter rule #{rule_id} has been removed."))
+        mod_logger.info(f"Filter #{rule_id} removed in {ctx.guild.name} by {ctx.author}")
+
+    @filter_group.command(name="list", description="List filter rules and their hit counts")
+    @commands.has_permissions(administrator=True)
+    async def filter_list(self, ctx: commands.Context):
+        rules = await self.bot.db.get_filter_rules(ctx.guild.id)
+        if not rules:
+            await ctx.send(embed=EmbedFactory.info("Filters", "No filter rules are configured."))
+            return
+
+        lines = [
+            f"**#{rule['id']}** {rule['kind']} `{rule['pattern']}` — "
+            f"{rule['hits'] + self._filter_hits.get(rule['id'], 0)} hit(s)"
+            for rule in rules
+        ]
+        description = "\n".join(lines[:25])
+        if len(lines) > 25:
+            description += f"\n...and {len(lines) - 25} more"
+
+        await ctx.send(embed=EmbedFactory.info(f"Filters ({len(rules)})", description[:4096]))
+
+
+async def setup(bot):
+    await bot.add_cog(AutoMod(bot))
@@ -1,15 +1,46 @@
 import discord
-from discord.ext import commands
+import time
+from discord.ext import commands, tasks
 from datetime import datetime
+from typing import Dict, List, Optional
+from utils.auditlog import AuditLogCorrelator
 from utils.embeds import EmbedFactory
 from utils.logger import bot_logger, mod_logger
+from utils.messagestore import MessageRecord, MessageStore
+from utils.transcript import build_transcript_file
 from config import Config
 
+# How long a bot-initiated deletion waits for its gateway event
+EXPECTED_DELETE_TTL = 60
+
 class Events(commands.Cog):
     """Event handlers for the bot"""
     
     def __init__(self, bot):
         self.bot = bot
+        self.audit = AuditLogCorrelator()
+        # Content of recent messages in guilds that log deletes or edits
+        self.messages = MessageStore(
+            per_guild=Config.MESSAGE_STORE_PER_GUILD,
+            max_total=Config.MESSAGE_STORE_MAX_TOTAL,
+            max_age=Config.MESSAGE_STORE_MAX_AGE_HOURS * 3600
+        )
+        # message_id -> deadline for deletions the bot made itself
+        self._expected_deletes: Dict[int, float] = {}
+    
+    async def cog_load(self):
+        self.prune_messages.start()
+    
+    def cog_unload(self):
+        self.audit.stop()
+        self.prune_messages.cancel()
+    
+    @tasks.loop(minutes=10)
+    async def prune_messages(self):
+        self.messages.prune()
+        now = time.monotonic()
+        for message_id in [mid for mid, deadline in self._expected_deletes.items() if deadline < now]:
+            del self._expected_deletes[message_id]
     
     @commands.Cog.listener()
     async def on_guild_join(self, guild: discord.Guild):
@@ -39,16 +70,30 @@ class Events(commands.Cog):
     async def on_guild_remove(self, guild: discord.Guild):
         """Called when bot leaves a guild"""
         bot_logger.info(f"Left guild: {guild.name} (ID: {guild.id})")
+        self.messages.forget_guild(guild.id)
+        self.bot.guild_state.invalidate(guild.id)
+    
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild: discord.Guild):
+        """A guild that comes back from an outage gets new channel objects"""
+        self.bot.guild_state.invalidate(guild.id)
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        """Drop resolved state that points at a deleted channel"""
+        self.bot.guild_state.channel_deleted(channel)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        """Drop deleted roles from the moderator role set"""
+        if await self.bot.db.remove_mod_role(role.guild.id, role.id):
+            await self.bot.cache.invalidate_mod_roles(role.guild.id)
     
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         """Called when a member joins the server"""
-        config = await self.bot.db.get_guild_config(member.guild.id)
-        
-        if not config or not config.get('log_joins') or not config.get('log_channel_id'):
-            return
-        
-        channel = member.guild.get_channel(config['log_channel_id'])
+        state = await self.bot.guild_state.get(member.guild)
+        channel = state.log_channel_for('log_joins')
         if not channel:
             return
         
@@ -62,29 +107,38 @@ class Events(commands.Cog):
         embed.add_field(name="Account Created", value=f"<t:{int(member.created_at.timestamp())}:R>", inline=True)
         embed.set_footer(text=f"User ID: {member.id}")
         
-        try:
-            await channel.send(embed=embed)
-        except:
-            pass
+        self.bot.log_sender.enqueue(channel, embed)
     
     @commands.Cog.listener()
     async def on_member_remove(self, member: discord.Member):
         """Called when a member leaves the server"""
-        config = await self.bot.db.get_guild_config(member.guild.id)
-        
-        if not config or not config.get('log_leaves') or not config.get('log_channel_id'):
-            return
-        
-        channel = member.guild.get_channel(config['log_channel_id'])
+        state = await self.bot.guild_state.get(member.guild)
+        channel = state.log_channel_for('log_leaves')
         if not channel:
             return
         
-        embed = discord.Embed(
-            title="📤 Member Left",
-            description=f"{member.mention} has left the server.",
-            color=Config.WARNING_COLOR,
-            timestamp=datetime.utcnow()
-        )
+        # Most leaves aren't kicks, so don't wait through extra fetch rounds for
+        # an entry that usually doesn't exist (resolve returns None at once
+        # without View Audit Log)
+        kick = await self.audit.resolve(member.guild, discord.AuditLogAction.kick, member.id, max_rounds=1)
+        
+        if kick:
+            embed = discord.Embed(
+                title="👢 Member Kicked",
+                description=f"{member.mention} was kicked from the server.",
+                color=Config.ERROR_COLOR,
+                timestamp=datetime.utcnow()
+            )
+            if kick.user:
+                embed.add_field(name="Moderator", value=kick.user.mention, inline=True)
+            embed.add_field(name="Reason", value=kick.reason or "No reason provided", inline=False)
+        else:
+            embed = discord.Embed(
+                title="📤 Member Left",
+                description=f"{member.mention} has left the server.",
+                color=Config.WARNING_COLOR,
+                timestamp=datetime.utcnow()
+            )
         embed.set_thumbnail(url=member.display_avatar.url)
         
         if member.joined_at:
@@ -92,20 +146,13 @@ class Events(commands.Cog):
         
         embed.set_footer(text=f"User ID: {member.id}")
         
-        try:
-            await channel.send(embed=embed)
-        except:
-            pass
+        self.bot.log_sender.enqueue(channel, embed)
     
     @commands.Cog.listener()
     async def on_member_ban(self, guild: discord.Guild, user: discord.User):
         """Called when a member is banned"""
-        config = await self.bot.db.get_guild_config(guild.id)
-        
-        if not config or not config.get('log_bans') or not config.get('log_channel_id'):
-            return
-        
-        channel = guild.get_channel(config['log_channel_id'])
+        state = await self.bot.guild_state.get(guild)
+        channel = state.log_channel_for('log_bans')
         if not channel:
             return
         
@@ -113,14 +160,10 @@ class Events(commands.Cog):
         reason = "No reason found"
         moderator = None
         
-        try:
-            async for entry in guild.audit_logs(limit=5, action=discord.AuditLogAction.ban):
-                if entry.target.id == user.id:
-                    reason = entry.reason or "No reason provided"
-                    moderator = entry.user
-                    break
-        except:
-            pass
+        entry = await self.audit.resolve(guild, discord.AuditLogAction.ban, user.id)
+        if entry:
+            reason = entry.reason or "No reason provided"
+            moderator = entry.user
         
         embed = discord.Embed(
             title="🔨 Member Banned",
@@ -136,23 +179,24 @@ class Events(commands.Cog):
         embed.add_field(name="Reason", value=reason, inline=False)
         embed.set_footer(text=f"User ID: {user.id}")
         
-        try:
-            await channel.send(embed=embed)
-        except:
-            pass
+        self.bot.log_sender.enqueue(channel, embed)
     
     @commands.Cog.listener()
     async def on_member_unban(self, guild: discord.Guild, user: discord.User):
         """Called when a member is unbanned"""
-        config = await self.bot.db.get_guild_config(guild.id)
-        
-        if not config or not config.get('log_bans') or not config.get('log_channel_id'):
-            return
-        
-        channel = guild.get_channel(config['log_channel_id'])
+        # A pending temp ban must not outlive a manual unban, or it would
+        # lift a later permanent ban when it expires
+        moderation = self.bot.get_cog('Moderation')
+        if moderation:
+            await moderation.tempbans.cancel(guild.id, user.id)
+        
+        state = await self.bot.guild_state.get(guild)
+        channel = state.log_channel_for('log_bans')
         if not channel:
             return
         
+        entry = await self.audit.resolve(guild, discord.AuditLogAction.unban, user.id)
+        
         embed = discord.Embed(
             title="🔓 Member Unbanned",
             description=f"{user.mention} was unbanned from the server.",
@@ -160,87 +204,173 @@ class Events(commands.Cog):
             timestamp=datetime.utcnow()
         )
         embed.set_thumbnail(url=user.display_avatar.url)
+        
+        if entry and entry.user:
+            embed.add_field(name="Moderator", value=entry.user.mention, inline=True)
         embed.set_footer(text=f"User ID: {user.id}")
         
-        try:
-            await channel.send(embed=embed)
-        except:
-            pass
+        self.bot.log_sender.enqueue(channel, embed)
+    
+    async def _message_log_channel(self, guild_id: int, setting: str, source_channel_id: int):
+        """Log channel for a message event, or None if that event isn't logged"""
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
+            return None
+        
+        channel = (await self.bot.guild_state.get(guild)).log_channel_for(setting)
+        if not channel or channel.id == source_channel_id:
+            return None
+        return channel
     
     @commands.Cog.listener()
-    async def on_message_delete(self, message: discord.Message):
-        """Called when a message is deleted"""
-        if message.author.bot or not message.guild:
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        """Called when a message is deleted, cached or not"""
+        if not payload.guild_id:
             return
         
-        config = await self.bot.db.get_guild_config(message.guild.id)
-        
-        if not config or not config.get('log_message_deletes') or not config.get('log_channel_id'):
+        record = self.messages.pop(payload.guild_id, payload.message_id)
+        if self._take_expected(payload.message_id):
+            return
+        cached = payload.cached_message
+        if record is None and cached is not None and not cached.author.bot:
+            record = MessageRecord.from_message(cached, 0)
+        if record is None:
             return
         
-        channel = message.guild.get_channel(config['log_channel_id'])
-        if not channel or channel.id == message.channel.id:
+        channel = await self._message_log_channel(payload.guild_id, 'log_message_deletes', payload.channel_id)
+        if not channel:
             return
         
         embed = discord.Embed(
             title="🗑️ Message Deleted",
-            description=f"Message by {message.author.mention} deleted in {message.channel.mention}",
+            description=f"Message by <@{record.author_id}> deleted in <#{record.channel_id}>",
             color=Config.WARNING_COLOR,
             timestamp=datetime.utcnow()
         )
         
-        if message.content:
-            content = message.content[:1024]
-            embed.add_field(name="Content", value=content, inline=False)
+        if record.content:
+            embed.add_field(name="Content", value=record.content[:1024], inline=False)
         
-        if message.attachments:
-            embed.add_field(
-                name="Attachments",
-                value="\n".join([att.filename for att in message.attachments]),
-                inline=False
-            )
+        if record.attachments:
+            embed.add_field(name="Attachments", value="\n".join(record.attachments)[:1024], inline=False)
         
-        embed.set_footer(text=f"Message ID: {message.id} | User ID: {message.author.id}")
+        embed.set_footer(text=f"Message ID: {record.id} | User ID: {record.author_id}")
         
-        try:
-            await channel.send(embed=embed)
-        except:
-            pass
+        self.bot.log_sender.enqueue(channel, embed)
     
     @commands.Cog.listener()
-    async def on_message_edit(self, before: discord.Message, after: discord.Message):
-        """Called when a message is edited"""
-        if before.author.bot or not before.guild or before.content == after.content:
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        """Called when messages are bulk deleted"""
+        if not payload.guild_id:
+            return
+        
+        message_ids = {mid for mid in payload.message_ids if not self._take_expected(mid)}
+        if not message_ids:
+            # Our own purge — already logged by log_purge
             return
         
-        config = await self.bot.db.get_guild_config(before.guild.id)
+        records = self.messages.pop_many(payload.guild_id, message_ids)
+        stored = {record.id for record in records}
+        for message in payload.cached_messages:
+            if message.id in message_ids and message.id not in stored and not message.author.bot:
+                records.append(MessageRecord.from_message(message, 0))
+        records.sort(key=lambda record: record.id)
         
-        if not config or not config.get('log_message_edits') or not config.get('log_channel_id'):
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild:
+            await self._send_transcript(guild, payload.channel_id, len(message_ids), records)
+    
+    async def log_purge(self, guild: discord.Guild, channel_id: int,
+                        records: List[MessageRecord], moderator: discord.abc.User):
+        """Log a purge run by the bot as a single transcript"""
+        # The purge already has each message's content; just free the stored copies
+        self.messages.pop_many(guild.id, (record.id for record in records))
+        records = sorted(records, key=lambda record: record.id)
+        await self._send_transcript(guild, channel_id, len(records), records, moderator)
+    
+    def expect_deletion(self, message_id: int):
+        """Mark a message the bot is about to delete so its delete event isn't logged separately"""
+        self._expected_deletes[message_id] = time.monotonic() + EXPECTED_DELETE_TTL
+    
+    def _take_expected(self, message_id: int) -> bool:
+        return self._expected_deletes.pop(message_id, None) is not None
+    
+    async def _send_transcript(self, guild: discord.Guild, source_channel_id: int, count: int,
+                               records: List[MessageRecord], moderator: Optional[discord.abc.User] = None):
+        channel = await self._message_log_channel(guild.id, 'log_message_deletes', source_channel_id)
+        if not channel:
             return
         
-        channel = before.guild.get_channel(config['log_channel_id'])
-        if not channel or channel.id == before.channel.id:
+        source = guild.get_channel(source_channel_id)
+        source_name = f"#{source.name}" if source else str(source_channel_id)
+        
+        names = {}
+        for record in records:
+            if record.author_id not in names:
+                user = guild.get_member(record.author_id) or self.bot.get_user(record.author_id)
+                names[record.author_id] = str(user) if user else "Unknown user"
+        
+        header = [f"{count} message(s) deleted in {source_name} ({guild.name})"]
+        if moderator:
+            header.append(f"Purged by {moderator} ({moderator.id})")
+        header.append(f"Content recovered for {len(records)} message(s)")
+        
+        file = await build_transcript_file(
+            header, records, names, f"deleted-{source_channel_id}-{int(time.time())}.txt"
+        )
+        
+        embed = discord.Embed(
+            title="🗑️ Messages Purged",
+            description=f"{count} messages deleted in <#{source_channel_id}>",
+            color=Config.WARNING_COLOR,
+            timestamp=datetime.utcnow()
+        )
+        if moderator:
+            embed.add_field(name="Moderator", value=moderator.mention, inline=True)
+        embed.add_field(name="Recovered", value=f"{len(records)}/{count}", inline=True)
+        
+        await self.bot.log_sender.send_file(channel, embed, file)
+    
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        """Called when a message is edited, cached or not"""
+        after = payload.message
+        if not payload.guild_id or 'content' not in payload.data or after.author.bot:
+            return
+        
+        record = self.messages.get(payload.guild_id, payload.message_id)
+        if record is not None:
+            before_content = record.content
+        elif payload.cached_message is not None:
+            before_content = payload.cached_message.content
+        else:
+            # Nothing to compare against (e.g. an embed unfurling on an old message)
+            return
+        
+        if before_content == after.content:
+            return
+        self.messages.update(payload.guild_id, payload.message_id, after.content)
+        
+        channel = await self._message_log_channel(payload.guild_id, 'log_message_edits', payload.channel_id)
+        if not channel:
             return
         
         embed = discord.Embed(
             title="✏️ Message Edited",
-            description=f"Message by {before.author.mention} edited in {before.channel.mention}\n[Jump to Message]({after.jump_url})",
+            description=f"Message by {after.author.mention} edited in <#{payload.channel_id}>\n[Jump to Message]({after.jump_url})",
             color=Config.EMBED_COLOR,
             timestamp=datetime.utcnow()
         )
         
-        if before.content:
-            embed.add_field(name="Before", value=before.content[:1024], inline=False)
+        if before_content:
+            embed.add_field(name="Before", value=before_content[:1024], inline=False)
         
         if after.content:
             embed.add_field(name="After", value=after.content[:1024], inline=False)
         
-        embed.set_footer(text=f"Message ID: {before.id} | User ID: {before.author.id}")
+        embed.set_footer(text=f"Message ID: {after.id} | User ID: {after.author.id}")
         
-        try:
-            await channel.send(embed=embed)
-        except:
-            pass
+        self.bot.log_sender.enqueue(channel, embed)
     
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -248,6 +378,11 @@ class Events(commands.Cog):
         if message.author.bot:
             return
         
+        if message.guild:
+            state = await self.bot.guild_state.get(message.guild)
+            if state.log_channel and (state.log_message_deletes or state.log_message_edits):
+                self.messages.add(message)
+        
         # QP reaction feature from original bot
         if message.content.lower().startswith(',qp'):
             try:
@@ -1,19 +1,53 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from typing import Optional, Union
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Union
+from datetime import datetime, timedelta, timezone
+import os
 import re
 
-from utils.checks import is_moderator, moderator_check, check_hierarchy, HierarchyError
+from utils.bulk import MAX_BULK_TARGETS, parse_targets, run_bounded
+from utils.checks import has_capability, check_hierarchy, hierarchy_error, HierarchyError
+from utils.permissions import TIERS, Capability, capability_names
 from utils.embeds import EmbedFactory
+from utils.escalation import (
+    ESCALATION_ACTIONS, MAX_TIMEOUT_MINUTES, TIMED_ACTIONS, EscalationStep, compile_ladder, format_minutes
+)
+from utils.export import EXPORT_FORMATS, export_history
 from utils.logger import mod_logger
+from utils.messagestore import MessageRecord
+from utils.purge import MAX_PURGE, PurgeFilter, PurgeResult, purge_channel
+from utils.tempbans import TempBanScheduler
+
+class PurgeFlags(commands.FlagConverter):
+    """Filters for the purge command"""
+    user: Optional[discord.User] = commands.flag(default=None, description="Only messages from this user")
+    contains: Optional[str] = commands.flag(default=None, description="Only messages containing this text")
+    regex: Optional[str] = commands.flag(default=None, description="Only messages matching this regex")
+    bots: bool = commands.flag(default=False, description="Only messages from bots")
+    attachments: bool = commands.flag(default=False, description="Only messages with attachments")
+    # Message IDs are taken as text: slash command integers can't hold a snowflake
+    before: Optional[str] = commands.flag(default=None, description="Only messages before this message ID")
+    after: Optional[str] = commands.flag(default=None, description="Only messages after this message ID")
 
 class Moderation(commands.Cog):
     """Moderation commands for server management"""
     
     def __init__(self, bot):
         self.bot = bot
+        self.tempbans = TempBanScheduler(bot)
+        
+        # Persistent delayed actions run by bot.scheduler
+        bot.scheduler.register('unlock_channel', self._job_unlock_channel)
+        bot.scheduler.register('remove_role', self._job_remove_role)
+        bot.scheduler.register('delete_message', self._job_delete_message)
+        bot.scheduler.register('expire_warnings', self._job_expire_warnings)
+    
+    async def cog_load(self):
+        await self.tempbans.start()
+    
+    async def cog_unload(self):
+        self.tempbans.stop()
     
     def parse_duration(self, duration_str: str) -> Optional[int]:
         """Parse duration string (e.g., '10m', '2h', '1d', '1w') to minutes"""
@@ -54,7 +88,8 @@ class Moderation(commands.Cog):
             return
         
         await self.bot.db.set_mod_role(ctx.guild.id, discord_role.id)
-        await self.bot.cache.invalidate_guild_config(ctx.guild.id)
+        await self.bot.invalidate_guild_config(ctx.guild.id)
+        await self.bot.cache.invalidate_mod_roles(ctx.guild.id)
         
         embed = EmbedFactory.success(
             "Moderator Role Set",
@@ -63,13 +98,79 @@ class Moderation(commands.Cog):
         await ctx.send(embed=embed)
         mod_logger.info(f"Mod role set to {discord_role.name} in {ctx.guild.name} by {ctx.author}")
     
+    @commands.hybrid_group(name="modrole", description="Manage moderator roles", invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    async def modrole(self, ctx: commands.Context):
+        """Moderator role commands"""
+        embed = await self._modrole_embed(ctx.guild)
+        embed.add_field(
+            name="Usage",
+            value=f"`{ctx.clean_prefix}modrole add <role> [tier]`\n`{ctx.clean_prefix}modrole remove <role>`\n`{ctx.clean_prefix}modrole list`",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+    
+    @modrole.command(name="add", description="Add a moderator role or change its tier")
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(
+        role="The role to grant moderator access",
+        tier="helper, mod, senior or admin (default mod)"
+    )
+    async def modrole_add(self, ctx: commands.Context, role: discord.Role, tier: str = "mod"):
+        tier = tier.lower()
+        if tier not in TIERS:
+            await ctx.send(f"❌ Tier must be one of: {', '.join(TIERS)}")
+            return
+        
+        await self.bot.db.add_mod_role(ctx.guild.id, role.id, tier)
+        await self.bot.cache.invalidate_mod_roles(ctx.guild.id)
+        
+        await ctx.send(embed=EmbedFactory.success(
+            "Moderator Role Set",
+            f"{role.mention} is now a **{tier}** role.\n**Can:** {capability_names(TIERS[tier])}"
+        ))
+        mod_logger.info(f"Mod role {role.name} set to tier {tier} in {ctx.guild.name} by {ctx.author}")
+    
+    @modrole.command(name="remove", description="Remove a moderator role")
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(role="The role to remove moderator access from")
+    async def modrole_remove(self, ctx: commands.Context, role: discord.Role):
+        if not await self.bot.db.remove_mod_role(ctx.guild.id, role.id):
+            await ctx.send(f"❌ {role.mention} is not a moderator role.")
+            return
+        await self.bot.cache.invalidate_mod_roles(ctx.guild.id)
+        
+        await ctx.send(embed=EmbedFactory.success("Moderator Role Removed", f"{role.mention} is no longer a moderator role."))
+        mod_logger.info(f"Mod role {role.name} removed in {ctx.guild.name} by {ctx.author}")
+    
+    @modrole.command(name="list", description="List moderator roles and tiers")
+    @commands.has_permissions(administrator=True)
+    async def modrole_list(self, ctx: commands.Context):
+        await ctx.send(embed=await self._modrole_embed(ctx.guild))
+    
+    async def _modrole_embed(self, guild: discord.Guild) -> discord.Embed:
+        """The guild's moderator roles and what each tier can do"""
+        roles = await self.bot.db.get_mod_roles(guild.id)
+        
+        embed = EmbedFactory.info(
+            "Moderator Roles",
+            "\n".join(f"<@&{role_id}> — {tier}" for role_id, tier in roles) or "No moderator roles are set."
+        )
+        for tier, mask in TIERS.items():
+            embed.add_field(name=tier.capitalize(), value=capability_names(mask), inline=False)
+        return embed
+    
     @commands.hybrid_command(name="setlog", description="Set the log channel for moderation actions")
     @commands.has_permissions(administrator=True)
     @app_commands.describe(channel="The channel to send logs to")
     async def setlog(self, ctx: commands.Context, channel: discord.TextChannel):
         """Set the log channel"""
+        config = await self.bot.get_guild_config(ctx.guild.id)
+        if config.log_channel_id != channel.id:
+            # The old channel's webhook can't post to the new one; don't leave it behind
+            await self.bot.log_sender.retire_webhook(ctx.guild)
         await self.bot.db.set_log_channel(ctx.guild.id, channel.id)
-        await self.bot.cache.invalidate_guild_config(ctx.guild.id)
+        await self.bot.invalidate_guild_config(ctx.guild.id)
         
         embed = EmbedFactory.success(
             "Log Channel Set",
@@ -78,9 +179,138 @@ class Moderation(commands.Cog):
         await ctx.send(embed=embed)
         mod_logger.info(f"Log channel set to #{channel.name} in {ctx.guild.name} by {ctx.author}")
     
+    @commands.hybrid_command(name="logwebhook", description="Deliver logs through a webhook instead of bot messages")
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(enabled="Whether log messages should be sent through a webhook")
+    async def logwebhook(self, ctx: commands.Context, enabled: bool):
+        """Toggle webhook log delivery"""
+        await self.bot.db.update_log_settings(ctx.guild.id, log_webhook_enabled=int(enabled))
+        await self.bot.invalidate_guild_config(ctx.guild.id)
+        
+        if enabled:
+            description = (
+                "Logs will be delivered through a webhook in the log channel. "
+                "I need the **Manage Webhooks** permission there; until then logs are sent normally."
+            )
+        else:
+            description = "Logs will be sent as regular bot messages."
+        
+        await ctx.send(embed=EmbedFactory.success("Log Delivery Updated", description))
+        mod_logger.info(f"Webhook log delivery {'enabled' if enabled else 'disabled'} in {ctx.guild.name} by {ctx.author}")
+    
+    @commands.hybrid_group(name="escalation", description="Automatic actions at warning thresholds", invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    async def escalation(self, ctx: commands.Context):
+        """Escalation ladder commands"""
+        embed = await self._escalation_embed(ctx.guild)
+        prefix = ctx.clean_prefix
+        embed.add_field(
+            name="Usage",
+            value=(
+                f"`{prefix}escalation set <warnings> <action> [duration]`\n"
+                f"`{prefix}escalation remove <warnings>`\n"
+                f"`{prefix}escalation expiry <days>`\n"
+                f"`{prefix}escalation list`"
+            ),
+            inline=False
+        )
+        await ctx.send(embed=embed)
+    
+    @escalation.command(name="set", description="Set the action taken when a member reaches a warning count")
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(
+        warnings="Active warning count that triggers the action",
+        action="timeout, kick, tempban or ban",
+        duration="For timeout and tempban (e.g., 1h, 7d)"
+    )
+    async def escalation_set(self, ctx: commands.Context, warnings: int, action: str, duration: Optional[str] = None):
+        action = action.lower()
+        if warnings < 1:
+            await ctx.send("❌ Warning count must be at least 1.")
+            return
+        if action not in ESCALATION_ACTIONS:
+            await ctx.send(f"❌ Action must be one of: {', '.join(ESCALATION_ACTIONS)}")
+            return
+        
+        minutes = None
+        if action in TIMED_ACTIONS:
+            minutes = self.parse_duration(duration) if duration else None
+            if not minutes:
+                await ctx.send(f"❌ A {action} needs a duration like `30m`, `12h`, `7d` or `2w`.")
+                return
+            if action == 'timeout' and minutes > MAX_TIMEOUT_MINUTES:
+                await ctx.send("❌ Timeout duration cannot exceed 28 days.")
+                return
+        
+        await self.bot.db.set_escalation_step(ctx.guild.id, warnings, action, minutes)
+        await self.bot.cache.invalidate_escalation_ladder(ctx.guild.id)
+        
+        step = EscalationStep(warnings, action, minutes)
+        await ctx.send(embed=EmbedFactory.success(
+            "Escalation Step Set",
+            f"Members reaching **{warnings}** active warning(s) will receive: **{step.describe()}**"
+        ))
+        mod_logger.info(f"Escalation at {warnings} warnings set to {step.describe()} in {ctx.guild.name} by {ctx.author}")
+    
+    @escalation.command(name="remove", description="Remove the action for a warning count")
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(warnings="The warning count to stop acting on")
+    async def escalation_remove(self, ctx: commands.Context, warnings: int):
+        if not await self.bot.db.remove_escalation_step(ctx.guild.id, warnings):
+            await ctx.send(f"❌ No escalation step is set for {warnings} warning(s).")
+            return
+        await self.bot.cache.invalidate_escalation_ladder(ctx.guild.id)
+        
+        await ctx.send(embed=EmbedFactory.success("Escalation Step Removed", f"Nothing happens automatically at {warnings} warning(s) now."))
+        mod_logger.info(f"Escalation at {warnings} warnings removed in {ctx.guild.name} by {ctx.author}")
+    
+    @escalation.command(name="list", description="Show the escalation ladder and warning expiry")
+    @commands.has_permissions(administrator=True)
+    async def escalation_list(self, ctx: commands.Context):
+        await ctx.send(embed=await self._escalation_embed(ctx.guild))
+    
+    async def _escalation_embed(self, guild: discord.Guild) -> discord.Embed:
+        """The guild's escalation ladder and warning expiry"""
+        ladder = await self._get_ladder(guild.id)
+        config = await self.bot.get_guild_config(guild.id)
+        expiry_days = config.warning_expiry_days
+        
+        embed = EmbedFactory.info(
+            "Escalation Ladder",
+            "\n".join(f"**{count}** warning(s) → {step.describe()}" for count, step in sorted(ladder.items()))
+            or "No escalation steps are set."
+        )
+        embed.add_field(
+            name="Warning Expiry",
+            value=f"{expiry_days} day(s)" if expiry_days else "Warnings never expire",
+            inline=False
+        )
+        return embed
+    
+    @escalation.command(name="expiry", description="Set how long warnings count towards escalation")
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(days="Days before a warning expires (0 = never)")
+    async def escalation_expiry(self, ctx: commands.Context, days: int):
+        if days < 0:
+            await ctx.send("❌ Days cannot be negative.")
+            return
+        
+        await self.bot.db.set_warning_expiry(ctx.guild.id, days or None)
+        await self.bot.invalidate_guild_config(ctx.guild.id)
+        
+        if days:
+            # Sweep now: re-dated warnings may already be past expiry
+            await self.bot.scheduler.schedule('expire_warnings', datetime.now(timezone.utc), ctx.guild.id, key='sweep')
+            description = f"Warnings now expire {days} day(s) after they are given, including existing ones."
+        else:
+            await self.bot.scheduler.cancel('expire_warnings', ctx.guild.id, 'sweep')
+            description = "Warnings no longer expire."
+        
+        await ctx.send(embed=EmbedFactory.success("Warning Expiry Updated", description))
+        mod_logger.info(f"Warning expiry set to {days} day(s) in {ctx.guild.name} by {ctx.author}")
+    
     @commands.hybrid_command(name="ban", description="Ban a user from the server")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.BAN)
     @app_commands.describe(
         member="The member to ban",
         reason="Reason for the ban",
@@ -114,7 +344,7 @@ class Moderation(commands.Cog):
                 pass
             
             # Ban the member
-            await member.ban(reason=reason, delete_message_days=delete_days)
+            await self._apply_ban(ctx.guild, member, reason, delete_days)
             
             # Log action
             await self.bot.db.log_action(
@@ -141,9 +371,84 @@ class Moderation(commands.Cog):
         except Exception as e:
             await ctx.send(f"❌ An error occurred: {str(e)}")
     
+    @commands.hybrid_command(name="tempban", description="Temporarily ban a user from the server")
+    @has_capability(Capability.BAN)
+    @app_commands.describe(
+        member="The member to ban",
+        duration="Duration (e.g., 30m, 12h, 7d, 2w)",
+        reason="Reason for the ban"
+    )
+    async def tempban(
+        self,
+        ctx: commands.Context,
+        member: discord.Member,
+        duration: str,
+        *,
+        reason: Optional[str] = "No reason provided"
+    ):
+        """Temporarily ban a member from the server"""
+        try:
+            await check_hierarchy(ctx, member)
+        except HierarchyError:
+            return
+        
+        duration_minutes = self.parse_duration(duration)
+        
+        if duration_minutes is None:
+            await ctx.send("❌ Invalid duration format. Use format like: `30m`, `12h`, `7d`, or `2w`")
+            return
+        
+        if duration_minutes < 1:
+            await ctx.send("❌ Duration must be at least 1 minute.")
+            return
+        
+        try:
+            until = discord.utils.utcnow() + timedelta(minutes=duration_minutes)
+            
+            # Try to DM user
+            try:
+                dm_embed = EmbedFactory.warning(
+                    "You have been temporarily banned",
+                    f"**Server:** {ctx.guild.name}\n**Reason:** {reason}\n**Expires:** <t:{int(until.timestamp())}:R>"
+                )
+                await member.send(embed=dm_embed)
+            except:
+                pass
+            
+            # Ban the member
+            await member.ban(reason=f"{reason} (Temporary: {duration})")
+            
+            # Record the expiry so it survives restarts, then hand it to the scheduler
+            ban_id = await self.bot.db.add_temp_ban(ctx.guild.id, member.id, until, reason)
+            self.tempbans.schedule(ban_id, ctx.guild.id, member.id, until)
+            
+            # Log action
+            await self.bot.db.log_action(
+                ctx.guild.id,
+                member.id,
+                ctx.author.id,
+                'tempban',
+                f"{reason} (Duration: {duration})"
+            )
+            
+            # Send confirmation
+            embed = EmbedFactory.moderation_action('tempban', member, ctx.author, reason)
+            embed.add_field(name="Duration", value=duration, inline=False)
+            embed.add_field(name="Expires", value=f"<t:{int(until.timestamp())}:R>", inline=False)
+            await ctx.send(embed=embed)
+            
+            # Send to log channel
+            await self._send_to_log(ctx.guild, embed)
+            
+            mod_logger.info(f"{ctx.author} temp-banned {member} for {duration} in {ctx.guild.name}: {reason}")
+            
+        except discord.Forbidden:
+            await ctx.send("❌ I don't have permission to ban this user.")
+        except Exception as e:
+            await ctx.send(f"❌ An error occurred: {str(e)}")
+    
     @commands.hybrid_command(name="kick", description="Kick a user from the server")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.KICK)
     @app_commands.describe(
         member="The member to kick",
         reason="Reason for the kick"
@@ -173,7 +478,7 @@ class Moderation(commands.Cog):
                 pass
             
             # Kick the member
-            await member.kick(reason=reason)
+            await self._apply_kick(ctx.guild, member, reason)
             
             # Log action
             await self.bot.db.log_action(
@@ -199,8 +504,7 @@ class Moderation(commands.Cog):
             await ctx.send(f"❌ An error occurred: {str(e)}")
     
     @commands.hybrid_command(name="timeout", description="Timeout a user")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.TIMEOUT)
     @app_commands.describe(
         member="The member to timeout",
         duration="Duration (e.g., 10m, 2h, 1d, 1w)",
@@ -232,8 +536,7 @@ class Moderation(commands.Cog):
             return
         
         try:
-            until = discord.utils.utcnow() + timedelta(minutes=duration_minutes)
-            await member.timeout(until, reason=reason)
+            until = await self._apply_timeout(member, duration_minutes, reason)
             
             # Log action
             await self.bot.db.log_action(
@@ -264,8 +567,7 @@ class Moderation(commands.Cog):
             await ctx.send(f"❌ An error occurred: {str(e)}")
     
     @commands.hybrid_command(name="untimeout", description="Remove timeout from a user")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.TIMEOUT)
     @app_commands.describe(member="The member to remove timeout from")
     async def untimeout(self, ctx: commands.Context, member: discord.Member):
         """Remove timeout from a member"""
@@ -286,8 +588,7 @@ class Moderation(commands.Cog):
             await ctx.send(f"❌ An error occurred: {str(e)}")
     
     @commands.hybrid_command(name="warn", description="Warn a user")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.WARN)
     @app_commands.describe(
         member="The member to warn",
         reason="Reason for the warning"
@@ -306,28 +607,26 @@ class Moderation(commands.Cog):
             return
         
         try:
-            # Add warning to database
-            warning_id = await self.bot.db.add_warning(
+            # Add warning to database; the new total comes back with it
+            warning, warning_count = await self.bot.db.add_warning(
                 ctx.guild.id,
                 member.id,
                 ctx.author.id,
                 reason
             )
+            warning_id = warning['id']
             
-            # Invalidate cache
-            await self.bot.cache.invalidate_user_warnings(ctx.guild.id, member.id)
+            await self.bot.cache.add_user_warning(ctx.guild.id, member.id, warning)
+            await self._ensure_expiry_sweep(ctx.guild.id)
             
-            # Get total warnings
-            warnings = await self.bot.db.get_warnings(ctx.guild.id, member.id)
-            warning_count = len(warnings)
+            step = (await self._get_ladder(ctx.guild.id)).get(warning_count)
             
             # Try to DM user
             try:
-                dm_embed = EmbedFactory.warning(
-                    "You have been warned",
-                    f"**Server:** {ctx.guild.name}\n**Reason:** {reason}\n**Total Warnings:** {warning_count}"
-                )
-                await member.send(embed=dm_embed)
+                dm_text = f"**Server:** {ctx.guild.name}\n**Reason:** {reason}\n**Total Warnings:** {warning_count}"
+                if step:
+                    dm_text += f"\n**Automatic Action:** {step.describe()}"
+                await member.send(embed=EmbedFactory.warning("You have been warned", dm_text))
             except:
                 pass
             
@@ -335,6 +634,8 @@ class Moderation(commands.Cog):
             embed = EmbedFactory.moderation_action('warn', member, ctx.author, reason)
             embed.add_field(name="Warning ID", value=f"#{warning_id}", inline=True)
             embed.add_field(name="Total Warnings", value=str(warning_count), inline=True)
+            if step:
+                embed.add_field(name="Escalation", value=await self._escalate(ctx.guild, member, step), inline=False)
             await ctx.send(embed=embed)
             
             # Send to log channel
@@ -346,8 +647,7 @@ class Moderation(commands.Cog):
             await ctx.send(f"❌ An error occurred: {str(e)}")
     
     @commands.hybrid_command(name="warnings", description="View a user's warnings")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.VIEW_HISTORY)
     @app_commands.describe(member="The member to check warnings for")
     async def warnings(self, ctx: commands.Context, member: discord.Member):
         """View warnings for a member"""
@@ -387,8 +687,7 @@ class Moderation(commands.Cog):
         await ctx.send(embed=embed)
     
     @commands.hybrid_command(name="clearwarnings", description="Clear all warnings for a user")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.MANAGE_WARNINGS)
     @app_commands.describe(member="The member to clear warnings for")
     async def clearwarnings(self, ctx: commands.Context, member: discord.Member):
         """Clear all warnings for a member"""
@@ -404,20 +703,18 @@ class Moderation(commands.Cog):
         mod_logger.info(f"{ctx.author} cleared warnings for {member} in {ctx.guild.name}")
     
     @commands.hybrid_command(name="removewarning", description="Remove a specific warning")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.MANAGE_WARNINGS)
     @app_commands.describe(warning_id="The ID of the warning to remove")
     async def removewarning(self, ctx: commands.Context, warning_id: int):
         """Remove a specific warning by ID"""
-        success = await self.bot.db.remove_warning(warning_id)
+        user_id = await self.bot.db.remove_warning(ctx.guild.id, warning_id)
         
-        if success:
-            # Invalidate all warning caches for this guild
-            await self.bot.cache.clear_pattern(f"warnings:{ctx.guild.id}:*")
+        if user_id is not None:
+            await self.bot.cache.remove_user_warning(ctx.guild.id, user_id, warning_id)
             
             embed = EmbedFactory.success(
                 "Warning Removed",
-                f"Warning #{warning_id} has been removed."
+                f"Warning #{warning_id} for <@{user_id}> has been removed."
             )
             mod_logger.info(f"{ctx.author} removed warning #{warning_id} in {ctx.guild.name}")
         else:
@@ -429,8 +726,7 @@ class Moderation(commands.Cog):
         await ctx.send(embed=embed)
     
     @commands.hybrid_command(name="history", description="View moderation history for a user")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.VIEW_HISTORY)
     @app_commands.describe(member="The member to check history for")
     async def history(self, ctx: commands.Context, member: discord.Member):
         """View moderation history for a member"""
@@ -468,36 +764,216 @@ class Moderation(commands.Cog):
         
         await ctx.send(embed=embed)
     
-    @commands.hybrid_command(name="delete", description="Delete multiple messages")
-    @is_moderator()
-    @moderator_check()
-    @app_commands.describe(amount="Number of messages to delete (1-50)")
+    @commands.hybrid_command(name="export", description="Export this server's moderation history")
+    @commands.has_permissions(administrator=True)
+    @app_commands.describe(format="File format: csv or jsonl")
+    async def export(self, ctx: commands.Context, format: str = "csv"):
+        """Export all actions and warnings as a compressed file"""
+        fmt = format.lower()
+        if fmt not in EXPORT_FORMATS:
+            await ctx.send(f"❌ Format must be one of: {', '.join(EXPORT_FORMATS)}", ephemeral=True)
+            return
+        
+        await ctx.defer()
+        path, count = await export_history(self.bot.db, ctx.guild.id, fmt)
+        try:
+            size = os.path.getsize(path)
+            if size > ctx.guild.filesize_limit:
+                await ctx.send(embed=EmbedFactory.error(
+                    "Export Too Large",
+                    f"The export is {size / 1024 / 1024:.1f} MB, over this server's upload limit."
+                ))
+                return
+            
+            embed = EmbedFactory.success("Moderation History Export", f"Exported {count} record(s).")
+            await ctx.send(embed=embed, file=discord.File(path, filename=f"modlog-{ctx.guild.id}.{fmt}.gz"))
+        finally:
+            os.remove(path)
+        
+        mod_logger.info(f"{ctx.author} exported {count} moderation record(s) from {ctx.guild.name}")
+    
+    @commands.hybrid_command(name="modstats", description="Show moderation statistics for this server")
+    @has_capability(Capability.VIEW_HISTORY)
+    @app_commands.describe(days="How many days to include (1-365, default 30)")
+    async def modstats(self, ctx: commands.Context, days: int = 30):
+        """Show actions per moderator, type and day, plus repeat offenders"""
+        if days < 1 or days > 365:
+            await ctx.send("❌ Days must be between 1 and 365.", ephemeral=True)
+            return
+        
+        stats = await self.bot.db.get_mod_stats(ctx.guild.id, days)
+        total = sum(count for _, count in stats['by_action'])
+        
+        embed = discord.Embed(
+            title=f"📈 Moderation Stats — last {days} day(s)",
+            description=f"**{total}** action(s) in this period",
+            color=discord.Color.blue(),
+            timestamp=datetime.utcnow()
+        )
+        
+        if stats['by_moderator']:
+            embed.add_field(
+                name="By Moderator",
+                value="\n".join(f"<@{mod_id}>: {count}" for mod_id, count in stats['by_moderator']),
+                inline=True
+            )
+        if stats['by_action']:
+            embed.add_field(
+                name="By Action",
+                value="\n".join(f"{action.capitalize()}: {count}" for action, count in stats['by_action']),
+                inline=True
+            )
+        if stats['by_day']:
+            recent = stats['by_day'][-14:]
+            embed.add_field(
+                name="Per Day" if len(stats['by_day']) <= 14 else "Per Day (last 14 active)",
+                value="\n".join(f"`{day}` {count}" for day, count in recent),
+                inline=False
+            )
+        
+        warned, repeat = stats['warned_users'], stats['repeat_warned_users']
+        if warned:
+            embed.add_field(
+                name="Recidivism (all time)",
+                value=f"{repeat} of {warned} warned user(s) were warned again ({repeat / warned:.0%})",
+                inline=False
+            )
+        if stats['top_offenders']:
+            embed.add_field(
+                name="Top Offenders (all time)",
+                value="\n".join(
+                    f"<@{user_id}>: {actions} action(s), {warnings} warning(s)"
+                    for user_id, actions, warnings in stats['top_offenders']
+                ),
+                inline=False
+            )
+        
+        await ctx.send(embed=embed)
+    
+    @commands.hybrid_command(name="delete", description="Delete recent messages")
+    @has_capability(Capability.MANAGE_MESSAGES)
+    @app_commands.describe(amount=f"Number of messages to delete (1-{MAX_PURGE})")
     async def delete(self, ctx: commands.Context, amount: int):
         """Delete multiple messages"""
-        if amount < 1 or amount > 50:
-            await ctx.send("❌ Amount must be between 1 and 50.", ephemeral=True)
+        await self._run_purge(ctx, amount, PurgeFilter())
+    
+    @commands.hybrid_command(name="purge", description="Delete messages matching filters")
+    @has_capability(Capability.MANAGE_MESSAGES)
+    @app_commands.describe(amount=f"Number of matching messages to delete (1-{MAX_PURGE})")
+    async def purge(self, ctx: commands.Context, amount: int, *, flags: PurgeFlags):
+        """Delete messages by user, content, regex, bots or attachments"""
+        pattern = None
+        if flags.regex:
+            try:
+                pattern = re.compile(flags.regex, re.IGNORECASE)
+            except re.error as e:
+                await ctx.send(f"❌ Invalid regex: {e}", ephemeral=True)
+                return
+        
+        bounds = []
+        for value in (flags.before, flags.after):
+            if value is not None and not value.isdigit():
+                await ctx.send("❌ `before` and `after` must be message IDs.", ephemeral=True)
+                return
+            bounds.append(int(value) if value else None)
+        
+        purge_filter = PurgeFilter(
+            user_id=flags.user.id if flags.user else None,
+            contains=flags.contains,
+            pattern=pattern,
+            bots=flags.bots,
+            attachments=flags.attachments
+        )
+        await self._run_purge(ctx, amount, purge_filter, before=bounds[0], after=bounds[1])
+    
+    async def _run_purge(self, ctx: commands.Context, amount: int, purge_filter: PurgeFilter,
+                         before: Optional[int] = None, after: Optional[int] = None):
+        if amount < 1 or amount > MAX_PURGE:
+            await ctx.send(f"❌ Amount must be between 1 and {MAX_PURGE}.", ephemeral=True)
             return
         
+        await ctx.defer()
+        status = await ctx.send(embed=EmbedFactory.info("Purging", "Scanning messages..."))
+        events = self.bot.get_cog('Events')
+        purge_filter.exclude = frozenset({status.id, ctx.message.id})
+        records: List[MessageRecord] = []
+        
+        def check(message: discord.Message) -> bool:
+            if not purge_filter(message):
+                return False
+            # Purged messages are logged once as a transcript, not one embed each
+            if events:
+                events.expect_deletion(message.id)
+            return True
+        
+        def collect(messages: List[discord.Message]):
+            records.extend(MessageRecord.from_message(message, 0) for message in messages)
+        
+        async def progress(result: PurgeResult):
+            try:
+                await status.edit(embed=EmbedFactory.info(
+                    "Purging",
+                    f"Deleted {result.deleted} of up to {amount} — scanned {result.scanned} message(s)..."
+                ))
+            except discord.HTTPException:
+                pass
+        
         try:
-            deleted = await ctx.channel.purge(limit=amount + 1)  # +1 for command message
-            
-            embed = EmbedFactory.success(
-                "Messages Deleted",
-                f"Deleted {len(deleted) - 1} message(s)."
+            result = await purge_channel(
+                ctx.channel,
+                amount,
+                check,
+                # Start below the status message so it never counts toward the amount
+                before=discord.Object(id=before) if before else status,
+                after=discord.Object(id=after) if after else None,
+                on_deleted=collect,
+                on_progress=progress
             )
-            msg = await ctx.send(embed=embed)
-            
-            # Delete confirmation after 5 seconds
-            await msg.delete(delay=5)
-            
         except discord.Forbidden:
-            await ctx.send("❌ I don't have permission to delete messages.", ephemeral=True)
+            await self._purge_failed(ctx, status, records, "I don't have permission to delete messages.")
+            return
         except discord.HTTPException as e:
-            await ctx.send(f"❌ Failed to delete messages: {e}", ephemeral=True)
+            await self._purge_failed(ctx, status, records, f"Failed to delete messages: {e}")
+            return
+        
+        if ctx.interaction is None:
+            if events:
+                events.expect_deletion(ctx.message.id)
+            try:
+                await ctx.message.delete()
+            except discord.HTTPException:
+                pass
+        
+        if events and records:
+            await events.log_purge(ctx.guild, ctx.channel.id, records, ctx.author)
+        
+        description = f"Deleted {result.deleted} message(s) after scanning {result.scanned}."
+        if result.failed:
+            description += f"\n{result.failed} message(s) could not be deleted."
+        await status.edit(embed=EmbedFactory.success("Messages Deleted", description))
+        mod_logger.info(f"{ctx.author} purged {result.deleted} message(s) in #{ctx.channel} ({ctx.guild.name})")
+        
+        # Delete confirmation after 5 seconds
+        await self.bot.scheduler.schedule_in(
+            'delete_message',
+            timedelta(seconds=5),
+            ctx.guild.id,
+            {'channel_id': status.channel.id, 'message_id': status.id}
+        )
+    
+    async def _purge_failed(self, ctx: commands.Context, status: discord.Message,
+                            records: List[MessageRecord], reason: str):
+        """Log whatever a failed purge already deleted, then report the failure"""
+        events = self.bot.get_cog('Events')
+        if events and records:
+            await events.log_purge(ctx.guild, ctx.channel.id, records, ctx.author)
+        if records:
+            reason += f"\n{len(records)} message(s) were deleted before it stopped."
+            mod_logger.info(f"{ctx.author} purged {len(records)} message(s) in #{ctx.channel} ({ctx.guild.name}) before an error")
+        await status.edit(embed=EmbedFactory.error("Purge Failed", reason))
     
     @commands.hybrid_command(name="slowmode", description="Set slowmode for a channel")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.MANAGE_MESSAGES)
     @app_commands.describe(
         seconds="Slowmode duration in seconds (0 to disable)",
         channel="Channel to set slowmode in (defaults to current channel)"
@@ -537,22 +1013,48 @@ class Moderation(commands.Cog):
             await ctx.send(f"❌ Failed to set slowmode: {e}", ephemeral=True)
     
     @commands.hybrid_command(name="lock", description="Lock a channel")
-    @is_moderator()
-    @moderator_check()
-    @app_commands.describe(channel="Channel to lock (defaults to current channel)")
-    async def lock(self, ctx: commands.Context, channel: Optional[discord.TextChannel] = None):
+    @has_capability(Capability.MANAGE_CHANNELS)
+    @app_commands.describe(
+        channel="Channel to lock (defaults to current channel)",
+        duration="Automatically unlock after this long (e.g., 30m, 1h)"
+    )
+    async def lock(
+        self,
+        ctx: commands.Context,
+        channel: Optional[discord.TextChannel] = None,
+        duration: Optional[str] = None
+    ):
         """Lock a channel"""
         channel = channel or ctx.channel
         
+        duration_minutes = None
+        if duration:
+            duration_minutes = self.parse_duration(duration)
+            if duration_minutes is None or duration_minutes < 1:
+                await ctx.send("❌ Invalid duration format. Use format like: `10m`, `2h`, `1d`, or `1w`", ephemeral=True)
+                return
+        
         try:
             overwrite = channel.overwrites_for(ctx.guild.default_role)
             overwrite.send_messages = False
             await channel.set_permissions(ctx.guild.default_role, overwrite=overwrite)
             
-            embed = EmbedFactory.success(
-                "Channel Locked",
-                f"🔒 {channel.mention} has been locked."
-            )
+            description = f"🔒 {channel.mention} has been locked."
+            if duration_minutes:
+                until = discord.utils.utcnow() + timedelta(minutes=duration_minutes)
+                await self.bot.scheduler.schedule(
+                    'unlock_channel',
+                    until,
+                    ctx.guild.id,
+                    {'channel_id': channel.id},
+                    key=str(channel.id)
+                )
+                description += f"\nIt will unlock <t:{int(until.timestamp())}:R>."
+            else:
+                # A manual lock overrides any pending auto-unlock
+                await self.bot.scheduler.cancel('unlock_channel', ctx.guild.id, str(channel.id))
+            
+            embed = EmbedFactory.success("Channel Locked", description)
             await ctx.send(embed=embed)
             
         except discord.Forbidden:
@@ -561,8 +1063,7 @@ class Moderation(commands.Cog):
             await ctx.send(f"❌ Failed to lock channel: {e}", ephemeral=True)
     
     @commands.hybrid_command(name="unlock", description="Unlock a channel")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.MANAGE_CHANNELS)
     @app_commands.describe(channel="Channel to unlock (defaults to current channel)")
     async def unlock(self, ctx: commands.Context, channel: Optional[discord.TextChannel] = None):
         """Unlock a channel"""
@@ -572,6 +1073,7 @@ class Moderation(commands.Cog):
             overwrite = channel.overwrites_for(ctx.guild.default_role)
             overwrite.send_messages = None
             await channel.set_permissions(ctx.guild.default_role, overwrite=overwrite)
+            await self.bot.scheduler.cancel('unlock_channel', ctx.guild.id, str(channel.id))
             
             embed = EmbedFactory.success(
                 "Channel Unlocked",
@@ -584,18 +1086,353 @@ class Moderation(commands.Cog):
         except discord.HTTPException as e:
             await ctx.send(f"❌ Failed to unlock channel: {e}", ephemeral=True)
     
-    async def _send_to_log(self, guild: discord.Guild, embed: discord.Embed):
-        """Send embed to log channel if configured"""
-        config = await self.bot.db.get_guild_config(guild.id)
-        if not config or not config.get('log_channel_id'):
+    # ──────────────────────────────────────────────────────────────────
+    # Bulk moderation
+    # ──────────────────────────────────────────────────────────────────
+    
+    @commands.hybrid_command(name="massban", description="Ban many users at once")
+    @has_capability(Capability.BAN | Capability.MASS_ACTIONS)
+    @app_commands.describe(targets="Mentions or user IDs, optionally followed by a reason")
+    async def massban(self, ctx: commands.Context, *, targets: str):
+        """Ban several members or user IDs"""
+        await self._run_bulk(
+            ctx, 'ban', targets,
+            lambda target, reason: self._apply_ban(ctx.guild, target, reason),
+            members_only=False
+        )
+    
+    @commands.hybrid_command(name="masskick", description="Kick many users at once")
+    @has_capability(Capability.KICK | Capability.MASS_ACTIONS)
+    @app_commands.describe(targets="Mentions or user IDs, optionally followed by a reason")
+    async def masskick(self, ctx: commands.Context, *, targets: str):
+        """Kick several members"""
+        await self._run_bulk(
+            ctx, 'kick', targets,
+            lambda target, reason: self._apply_kick(ctx.guild, target, reason),
+            members_only=True
+        )
+    
+    @commands.hybrid_command(name="masstimeout", description="Timeout many users at once")
+    @has_capability(Capability.TIMEOUT | Capability.MASS_ACTIONS)
+    @app_commands.describe(
+        duration="Duration (e.g., 10m, 2h, 1d, 1w)",
+        targets="Mentions or user IDs, optionally followed by a reason"
+    )
+    async def masstimeout(self, ctx: commands.Context, duration: str, *, targets: str):
+        """Timeout several members"""
+        duration_minutes = self.parse_duration(duration)
+        
+        if duration_minutes is None:
+            await ctx.send("❌ Invalid duration format. Use format like: `10m`, `2h`, `1d`, or `1w`")
+            return
+        
+        if duration_minutes < 1 or duration_minutes > 40320:  # Max 28 days
+            await ctx.send("❌ Duration must be between 1 minute and 28 days.")
+            return
+        
+        await self._run_bulk(
+            ctx, 'timeout', targets,
+            lambda target, reason: self._apply_timeout(target, duration_minutes, reason),
+            members_only=True,
+            note=f"Duration: {duration}"
+        )
+    
+    @commands.hybrid_command(name="masswarn", description="Warn many users at once")
+    @has_capability(Capability.WARN | Capability.MASS_ACTIONS)
+    @app_commands.describe(targets="Mentions or user IDs, optionally followed by a reason")
+    async def masswarn(self, ctx: commands.Context, *, targets: str):
+        """Warn several members"""
+        async def record(succeeded, reason):
+            await self.bot.db.add_warnings([
+                (ctx.guild.id, target.id, ctx.author.id, reason) for target in succeeded
+            ])
+            for target in succeeded:
+                await self.bot.cache.invalidate_user_warnings(ctx.guild.id, target.id)
+            await self._ensure_expiry_sweep(ctx.guild.id)
+            
+            ladder = await self._get_ladder(ctx.guild.id)
+            if not ladder:
+                return
+            counts = await self.bot.db.get_warning_counts(ctx.guild.id, [target.id for target in succeeded])
+            due = [(target, ladder[counts[target.id]]) for target in succeeded if counts.get(target.id) in ladder]
+            await run_bounded(due, lambda item: self._escalate(ctx.guild, *item))
+        
+        await self._run_bulk(ctx, 'warn', targets, None, members_only=True, record=record)
+    
+    async def _run_bulk(self, ctx: commands.Context, action: str, targets: str, worker,
+                        *, members_only: bool, note: Optional[str] = None, record=None):
+        """Resolve targets, check hierarchy for all of them, then act through a bounded pool.
+        
+        ``worker(target, reason)`` performs the API call (None for DB-only actions).
+        ``record(succeeded, reason)`` replaces the default single-transaction action log.
+        """
+        ids, reason = parse_targets(targets)
+        reason = reason or "No reason provided"
+        
+        if not ids:
+            await ctx.send("❌ No valid members or user IDs given.")
             return
         
-        channel = guild.get_channel(config['log_channel_id'])
+        if len(ids) > MAX_BULK_TARGETS:
+            await ctx.send(f"❌ You can act on at most {MAX_BULK_TARGETS} users at once.")
+            return
+        
+        await ctx.defer()
+        
+        resolved = []
+        skipped = []
+        for user_id in ids:
+            target = ctx.guild.get_member(user_id)
+            if target is None:
+                if members_only:
+                    skipped.append((user_id, "Not in this server"))
+                    continue
+                target = discord.Object(id=user_id)
+            
+            error = hierarchy_error(ctx, target)
+            if error:
+                skipped.append((user_id, error))
+                continue
+            resolved.append(target)
+        
+        if worker:
+            results = await run_bounded(resolved, lambda target: worker(target, reason))
+        else:
+            results = [(target, None) for target in resolved]
+        
+        succeeded = [target for target, error in results if error is None]
+        failed = [
+            (target.id, "Missing permissions" if isinstance(error, discord.Forbidden) else str(error))
+            for target, error in results if error is not None
+        ]
+        
+        if record:
+            await record(succeeded, reason)
+        else:
+            logged_reason = f"{reason} ({note})" if note else reason
+            await self.bot.db.log_actions([
+                (ctx.guild.id, target.id, ctx.author.id, action, logged_reason)
+                for target in succeeded
+            ])
+        
+        embed = self._bulk_summary(action, ctx.author, reason, note, succeeded, failed, skipped)
+        await ctx.send(embed=embed)
+        await self._send_to_log(ctx.guild, embed)
+        
+        mod_logger.info(
+            f"{ctx.author} mass-{action} in {ctx.guild.name}: {len(succeeded)} succeeded, "
+            f"{len(failed)} failed, {len(skipped)} skipped: {reason}"
+        )
+    
+    @staticmethod
+    def _bulk_summary(action: str, moderator: discord.Member, reason: str, note: Optional[str],
+                      succeeded: list, failed: list, skipped: list) -> discord.Embed:
+        """Build the single summary embed for a bulk action"""
+        embed = EmbedFactory.warning(f"Mass {action.capitalize()}")
+        embed.add_field(name="Moderator", value=moderator.mention, inline=True)
+        embed.add_field(name="Succeeded", value=str(len(succeeded)), inline=True)
+        embed.add_field(name="Failed / Skipped", value=f"{len(failed)} / {len(skipped)}", inline=True)
+        embed.add_field(name="Reason", value=reason, inline=False)
+        if note:
+            embed.add_field(name="Details", value=note, inline=False)
+        
+        if succeeded:
+            mentions = " ".join(f"<@{target.id}>" for target in succeeded)
+            embed.add_field(name="Users", value=mentions[:1021] + "..." if len(mentions) > 1024 else mentions, inline=False)
+        
+        problems = [f"<@{user_id}>: {error}" for user_id, error in failed + skipped]
+        if problems:
+            text = "\n".join(problems[:15])
+            if len(problems) > 15:
+                text += f"\n...and {len(problems) - 15} more"
+            embed.add_field(name="Not actioned", value=text[:1024], inline=False)
+        
+        return embed
+    
+    @commands.hybrid_command(name="temprole", description="Give a user a role for a limited time")
+    @has_capability(Capability.MANAGE_ROLES)
+    @app_commands.describe(
+        member="The member to give the role to",
+        role="The role to give",
+        duration="How long to keep the role (e.g., 1h, 3d, 2w)"
+    )
+    async def temprole(
+        self,
+        ctx: commands.Context,
+        member: discord.Member,
+        role: discord.Role,
+        duration: str
+    ):
+        """Give a member a role that is removed automatically"""
+        duration_minutes = self.parse_duration(duration)
+        
+        if duration_minutes is None or duration_minutes < 1:
+            await ctx.send("❌ Invalid duration format. Use format like: `10m`, `2h`, `1d`, or `1w`")
+            return
+        
+        if role >= ctx.guild.me.top_role:
+            await ctx.send("❌ I cannot assign a role equal to or higher than my own.")
+            return
+        
+        if not ctx.author.guild_permissions.administrator and role >= ctx.author.top_role:
+            await ctx.send("❌ You cannot assign a role equal to or higher than your own.")
+            return
+        
+        try:
+            await member.add_roles(role, reason=f"Temporary role by {ctx.author} ({duration})")
+            
+            until = discord.utils.utcnow() + timedelta(minutes=duration_minutes)
+            await self.bot.scheduler.schedule(
+                'remove_role',
+                until,
+                ctx.guild.id,
+                {'user_id': member.id, 'role_id': role.id},
+                key=f"{member.id}:{role.id}"
+            )
+            
+            embed = EmbedFactory.success(
+                "Temporary Role Added",
+                f"{member.mention} has been given {role.mention}.\n"
+                f"It will be removed <t:{int(until.timestamp())}:R>."
+            )
+            await ctx.send(embed=embed)
+            
+            mod_logger.info(f"{ctx.author} gave {member} temporary role {role.name} for {duration} in {ctx.guild.name}")
+            
+        except discord.Forbidden:
+            await ctx.send("❌ I don't have permission to manage this user's roles.")
+        except discord.HTTPException as e:
+            await ctx.send(f"❌ Failed to add role: {e}")
+    
+    # ──────────────────────────────────────────────────────────────────
+    # Scheduled job handlers (may run more than once — keep idempotent)
+    # ──────────────────────────────────────────────────────────────────
+    
+    async def _job_unlock_channel(self, job):
+        guild = self.bot.get_guild(job.guild_id)
+        channel = guild.get_channel(job.payload['channel_id']) if guild else None
+        if not channel:
+            return
+        
+        overwrite = channel.overwrites_for(guild.default_role)
+        if overwrite.send_messages is False:
+            overwrite.send_messages = None
+            await channel.set_permissions(guild.default_role, overwrite=overwrite, reason="Timed lock expired")
+            mod_logger.info(f"Auto-unlocked #{channel.name} in {guild.name}")
+    
+    async def _job_remove_role(self, job):
+        guild = self.bot.get_guild(job.guild_id)
+        if not guild:
+            return
+        
+        role = guild.get_role(job.payload['role_id'])
+        member = guild.get_member(job.payload['user_id'])
+        if not role or not member or role not in member.roles:
+            return
+        
+        await member.remove_roles(role, reason="Temporary role expired")
+        mod_logger.info(f"Removed temporary role {role.name} from {member} in {guild.name}")
+    
+    async def _job_delete_message(self, job):
+        guild = self.bot.get_guild(job.guild_id)
+        channel = guild.get_channel(job.payload['channel_id']) if guild else None
+        if not channel:
+            return
+        
+        try:
+            await channel.get_partial_message(job.payload['message_id']).delete()
+        except (discord.NotFound, discord.Forbidden):
+            # Already gone, or we lost access; retrying can't change either
+            pass
+    
+    async def _job_expire_warnings(self, job):
+        """Deactivate expired warnings, then schedule the sweep for the next expiry"""
+        user_ids = await self.bot.db.expire_warnings(job.guild_id)
+        for user_id in user_ids:
+            await self.bot.cache.invalidate_user_warnings(job.guild_id, user_id)
+        if user_ids:
+            mod_logger.info(f"Expired warnings for {len(user_ids)} user(s) in guild {job.guild_id}")
+        
+        next_at = await self.bot.db.next_warning_expiry(job.guild_id)
+        if next_at:
+            await self.bot.scheduler.schedule('expire_warnings', next_at, job.guild_id, key='sweep')
+    
+    # ──────────────────────────────────────────────────────────────────
+    # Warning escalation
+    # ──────────────────────────────────────────────────────────────────
+    
+    async def _get_ladder(self, guild_id: int) -> Dict[int, EscalationStep]:
+        ladder = await self.bot.cache.get_escalation_ladder(guild_id)
+        if ladder is None:
+            ladder = compile_ladder(await self.bot.db.get_escalation_steps(guild_id))
+            await self.bot.cache.set_escalation_ladder(guild_id, ladder)
+        return ladder
+    
+    async def _ensure_expiry_sweep(self, guild_id: int):
+        """Make sure a guild with warning expiry has its sweep job pending.
+        
+        One keyed job per guild covers every warning: it runs at the earliest
+        expiry and reschedules itself for the next. A new warning expires no
+        sooner than any existing one, so an already pending sweep is left alone.
+        """
+        if self.bot.scheduler.is_scheduled('expire_warnings', guild_id, 'sweep'):
+            return
+        config = await self.bot.get_guild_config(guild_id)
+        if config.warning_expiry_days:
+            await self.bot.scheduler.schedule_in(
+                'expire_warnings', timedelta(days=config.warning_expiry_days), guild_id, key='sweep'
+            )
+    
+    async def _escalate(self, guild: discord.Guild, member: discord.Member, step: EscalationStep) -> str:
+        """Carry out a ladder step through the normal action paths; returns what happened"""
+        reason = f"Automatic escalation: {step.warnings} active warning(s)"
+        try:
+            if step.action == 'timeout':
+                await self._apply_timeout(member, step.minutes, reason)
+            elif step.action == 'kick':
+                await self._apply_kick(guild, member, reason)
+            elif step.action == 'ban':
+                await self._apply_ban(guild, member, reason)
+            else:
+                until = discord.utils.utcnow() + timedelta(minutes=step.minutes)
+                await self._apply_ban(guild, member, reason)
+                ban_id = await self.bot.db.add_temp_ban(guild.id, member.id, until, reason)
+                self.tempbans.schedule(ban_id, guild.id, member.id, until)
+        except discord.HTTPException as e:
+            mod_logger.warning(f"Escalation {step.describe()} failed for {member} in {guild.name}: {e}")
+            return f"{step.describe()} failed: {'missing permissions' if isinstance(e, discord.Forbidden) else e}"
+        
+        logged_reason = f"{reason} (Duration: {format_minutes(step.minutes)})" if step.minutes else reason
+        await self.bot.db.log_action(guild.id, member.id, self.bot.user.id, step.action, logged_reason)
+        
+        embed = EmbedFactory.moderation_action(step.action, member, guild.me, logged_reason)
+        await self._send_to_log(guild, embed)
+        mod_logger.info(f"Escalated {member} to {step.describe()} in {guild.name}")
+        return step.describe()
+    
+    # ──────────────────────────────────────────────────────────────────
+    # Action primitives shared by single and bulk commands
+    # ──────────────────────────────────────────────────────────────────
+    
+    async def _apply_ban(self, guild: discord.Guild, target: discord.abc.Snowflake,
+                         reason: str, delete_days: int = 0):
+        await guild.ban(target, reason=reason, delete_message_days=delete_days)
+        # A permanent ban supersedes any pending temporary one
+        await self.tempbans.cancel(guild.id, target.id)
+    
+    async def _apply_kick(self, guild: discord.Guild, target: discord.Member, reason: str):
+        await guild.kick(target, reason=reason)
+    
+    async def _apply_timeout(self, member: discord.Member, minutes: int, reason: str) -> datetime:
+        until = discord.utils.utcnow() + timedelta(minutes=minutes)
+        await member.timeout(until, reason=reason)
+        return until
+    
+    async def _send_to_log(self, guild: discord.Guild, embed: discord.Embed):
+        """Send embed to log channel if configured"""
+        channel = (await self.bot.guild_state.get(guild)).log_channel
         if channel:
-            try:
-                await channel.send(embed=embed)
-            except:
-                pass
+            self.bot.log_sender.enqueue(channel, embed)
 
 async def setup(bot):
 
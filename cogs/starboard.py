@@ -23,7 +23,8 @@ class Starboard(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        # In-memory dedup cache: { guild_id: { "star": {src_msg_id: board_msg_id}, "sob": {...} } }
+        # Dedup index: { guild_id: { "star": {src_msg_id: board_msg_id}, "sob": {...} } }
+        # Persisted in board_posts and loaded by load_posts() during warm-up
         self._posted: dict[int, dict[str, dict[int, int]]] = {}
 
     # ──────────────────────────────────────────────────────────────────
@@ -33,24 +34,23 @@ class Starboard(commands.Cog):
     def _cache(self, guild_id: int, board: str) -> dict[int, int]:
         return self._posted.setdefault(guild_id, {}).setdefault(board, {})
 
+    async def load_posts(self) -> int:
+        """Fill the dedup index from the database; returns the number of posts"""
+        rows = await self.bot.db.get_board_posts()
+        for guild_id, board, source_id, board_msg_id in rows:
+            self._cache(guild_id, board)[source_id] = board_msg_id
+        return len(rows)
+
     # ──────────────────────────────────────────────────────────────────
-    # Helper: fetch board config from DB (via bot.db)
+    # Helper: board config from the shared guild state
     # ──────────────────────────────────────────────────────────────────
 
-    async def _get_config(self, guild_id: int, board: str):
-        """Return (channel_id, threshold) or (None, None)."""
-        config = await self.bot.db.get_guild_config(guild_id)
-        if not config:
-            return None, None
+    async def _get_config(self, guild: discord.Guild, board: str):
+        """Return (channel, threshold); channel is None if the board is off."""
+        state = await self.bot.guild_state.get(guild)
         if board == "star":
-            return (
-                config.get("starboard_channel_id"),
-                config.get("starboard_threshold") or DEFAULT_THRESHOLD,
-            )
-        return (
-            config.get("sobboard_channel_id"),
-            config.get("sobboard_threshold") or DEFAULT_THRESHOLD,
-        )
+            return state.starboard_channel, state.starboard_threshold
+        return state.sobboard_channel, state.sobboard_threshold
 
     # ──────────────────────────────────────────────────────────────────
     # Helper: count a specific reaction on a message
@@ -169,8 +169,8 @@ class Starboard(commands.Cog):
         if not guild:
             return
 
-        board_channel_id, threshold = await self._get_config(guild.id, board)
-        if not board_channel_id:
+        board_channel, threshold = await self._get_config(guild, board)
+        if not isinstance(board_channel, discord.TextChannel):
             return
 
         src_channel = guild.get_channel(payload.channel_id)
@@ -178,7 +178,7 @@ class Starboard(commands.Cog):
             return
 
         # Prevent board channels from feeding themselves
-        if src_channel.id == board_channel_id:
+        if src_channel.id == board_channel.id:
             return
 
         try:
@@ -195,10 +195,6 @@ class Starboard(commands.Cog):
         else:
             count = self._count_sob(message)
 
-        board_channel = guild.get_channel(board_channel_id)
-        if not isinstance(board_channel, discord.TextChannel):
-            return
-
         cache = self._cache(guild.id, board)
 
         if message.id in cache:
@@ -209,6 +205,7 @@ class Starboard(commands.Cog):
             posted = await self._post(board_channel, message, count, board)
             if posted:
                 cache[message.id] = posted.id
+                await self.bot.db.add_board_post(guild.id, board, message.id, posted.id)
                 bot_logger.info(
                     f"[{board}] Posted message {message.id} from "
                     f"#{src_channel.name} in {guild.name} ({count} reactions)"
@@ -242,8 +239,8 @@ class Starboard(commands.Cog):
         if not guild:
             return
 
-        board_channel_id, _ = await self._get_config(guild.id, board)
-        if not board_channel_id:
+        board_channel, _ = await self._get_config(guild, board)
+        if not board_channel:
             return
 
         cache = self._cache(guild.id, board)
@@ -264,9 +261,7 @@ class Starboard(commands.Cog):
         else:
             count = self._count_sob(message)
 
-        board_channel = guild.get_channel(board_channel_id)
-        if board_channel:
-            await self._update_count(board_channel, cache[payload.message_id], count, board)
+        await self._update_count(board_channel, cache[payload.message_id], count, board)
 
     # ──────────────────────────────────────────────────────────────────
     # Commands — /starboard
@@ -299,7 +294,7 @@ class Starboard(commands.Cog):
     ):
         threshold = max(1, threshold)
         await self.bot.db.set_starboard_channel(ctx.guild.id, channel.id, threshold)
-        await self.bot.cache.invalidate_guild_config(ctx.guild.id)
+        await self.bot.invalidate_guild_config(ctx.guild.id)
 
         embed = discord.Embed(
             title="⭐ Starboard Configured",
@@ -323,7 +318,7 @@ class Starboard(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def star_disable(self, ctx: commands.Context):
         await self.bot.db.set_starboard_channel(ctx.guild.id, None, DEFAULT_THRESHOLD)
-        await self.bot.cache.invalidate_guild_config(ctx.guild.id)
+        await self.bot.invalidate_guild_config(ctx.guild.id)
 
         embed = discord.Embed(
             title="⭐ Starboard Disabled",
@@ -339,7 +334,8 @@ class Starboard(commands.Cog):
     )
     @commands.has_permissions(administrator=True)
     async def star_info(self, ctx: commands.Context):
-        channel_id, threshold = await self._get_config(ctx.guild.id, "star")
+        state = await self.bot.guild_state.get(ctx.guild)
+        channel_id = state.config.starboard_channel_id
         if not channel_id:
             embed = discord.Embed(
                 title="⭐ Starboard",
@@ -347,14 +343,14 @@ class Starboard(commands.Cog):
                 color=discord.Color.greyple(),
             )
         else:
-            channel = ctx.guild.get_channel(channel_id)
+            channel = state.starboard_channel
             embed = discord.Embed(
                 title="⭐ Starboard",
                 color=discord.Color.gold(),
                 timestamp=datetime.utcnow(),
             )
             embed.add_field(name="Channel", value=channel.mention if channel else f"<#{channel_id}> *(deleted?)*", inline=True)
-            embed.add_field(name="Threshold", value=f"{threshold} {STAR_EMOJI}", inline=True)
+            embed.add_field(name="Threshold", value=f"{state.starboard_threshold} {STAR_EMOJI}", inline=True)
         await ctx.send(embed=embed)
 
     # ──────────────────────────────────────────────────────────────────
@@ -388,7 +384,7 @@ class Starboard(commands.Cog):
     ):
         threshold = max(1, threshold)
         await self.bot.db.set_sobboard_channel(ctx.guild.id, channel.id, threshold)
-        await self.bot.cache.invalidate_guild_config(ctx.guild.id)
+        await self.bot.invalidate_guild_config(ctx.guild.id)
 
         embed = discord.Embed(
             title="<:androidcry:1424405864428732526> Sobboard Configured",
@@ -412,7 +408,7 @@ class Starboard(commands.Cog):
     @commands.has_permissions(administrator=True)
     async def clown_disable(self, ctx: commands.Context):
         await self.bot.db.set_sobboard_channel(ctx.guild.id, None, DEFAULT_THRESHOLD)
-        await self.bot.cache.invalidate_guild_config(ctx.guild.id)
+        await self.bot.invalidate_guild_config(ctx.guild.id)
 
         embed = discord.Embed(
             title="<:androidcry:1424405864428732526> Sobboard Disabled",
@@ -428,7 +424,8 @@ class Starboard(commands.Cog):
     )
     @commands.has_permissions(administrator=True)
     async def clown_info(self, ctx: commands.Context):
-        channel_id, threshold = await self._get_config(ctx.guild.id, "sob")
+        state = await self.bot.guild_state.get(ctx.guild)
+        channel_id = state.config.sobboard_channel_id
         if not channel_id:
             embed = discord.Embed(
                 title="<:androidcry:1424405864428732526> Sobboard",
@@ -436,14 +433,14 @@ class Starboard(commands.Cog):
                 color=discord.Color.greyple(),
             )
         else:
-            channel = ctx.guild.get_channel(channel_id)
+            channel = state.sobboard_channel
             embed = discord.Embed(
                 title="<:androidcry:1424405864428732526> Sobboard",
                 color=discord.Color.orange(),
                 timestamp=datetime.utcnow(),
             )
             embed.add_field(name="Channel", value=channel.mention if channel else f"<#{channel_id}> *(deleted?)*", inline=True)
-            embed.add_field(name="Threshold", value=f"{threshold} {SOB_EMOJI}", inline=True)
+            embed.add_field(name="Threshold", value=f"{state.sobboard_threshold} {SOB_EMOJI}", inline=True)
         await ctx.send(embed=embed)
 
 
@@ -6,7 +6,8 @@ from datetime import datetime
 import psutil
 import os
 
-from utils.checks import is_moderator, moderator_check
+from utils.checks import has_capability
+from utils.permissions import Capability
 from utils.embeds import EmbedFactory
 from config import Config
 
@@ -58,8 +59,7 @@ class Utility(commands.Cog):
         await ctx.send(embed=embed)
     
     @commands.hybrid_command(name="pin", description="Pin the previous message")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.MANAGE_MESSAGES)
     async def pin(self, ctx: commands.Context):
         """Pin the previous message"""
         try:
@@ -85,8 +85,7 @@ class Utility(commands.Cog):
             await ctx.send(f"❌ Failed to pin message: {e}", ephemeral=True)
     
     @commands.hybrid_command(name="unpin", description="Unpin the most recent pinned message")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.MANAGE_MESSAGES)
     async def unpin(self, ctx: commands.Context):
         """Unpin the most recent pinned message"""
         try:
@@ -112,8 +111,7 @@ class Utility(commands.Cog):
             await ctx.send(f"❌ Failed to unpin message: {e}", ephemeral=True)
     
     @commands.hybrid_command(name="botstats", description="Show bot resource usage and statistics")
-    @is_moderator()
-    @moderator_check()
+    @has_capability(Capability.VIEW_HISTORY)
     async def botstats(self, ctx: commands.Context):
         """Show bot statistics and resource usage"""
         process = psutil.Process(os.getpid())
@@ -153,6 +151,12 @@ class Utility(commands.Cog):
         )
         embed.add_field(name="Uptime", value=f"{days}d {hours}h {minutes}m {seconds}s", inline=False)
         embed.add_field(name="Latency", value=f"{round(self.bot.latency * 1000)}ms", inline=True)
+        log_sender = self.bot.log_sender
+        embed.add_field(
+            name="Log Queue",
+            value=f"**Queued:** {log_sender.depth}\n**Sent:** {log_sender.sent}\n**Dropped:** {log_sender.dropped}",
+            inline=True
+        )
         embed.set_footer(text=f"discord.py {discord.__version__}")
         
         await ctx.send(embed=embed)
@@ -160,6 +164,10 @@ class Utility(commands.Cog):
     @commands.hybrid_command(name="help", description="Show all available commands")
     async def help_command(self, ctx: commands.Context):
         """Show help information"""
+        await ctx.send(embed=self.build_help_embed())
+    
+    def build_help_embed(self) -> discord.Embed:
+        """The help embed; each field stays under Discord's 1024-character limit"""
         embed = discord.Embed(
             title="📚 Bot Commands",
             description="Here are all available commands. Use `/command` or `?command`",
@@ -167,22 +175,39 @@ class Utility(commands.Cog):
             timestamp=datetime.utcnow()
         )
         
-        # Moderation commands
+        # Moderation commands, split so no field goes over 1024 characters
         mod_commands = [
             "**setmod** - Set the moderator role",
+            "**modrole add/remove/list** - Manage moderator roles and tiers (helper, mod, senior, admin)",
             "**setlog** - Set the log channel",
+            "**logwebhook** `on/off` - Send logs through a webhook",
             "**ban** - Ban a user",
+            "**tempban** - Temporarily ban a user (e.g., 12h, 7d)",
             "**kick** - Kick a user",
             "**timeout** - Timeout a user (e.g., 10m, 2h, 1d)",
             "**untimeout** - Remove timeout",
+            "**massban/masskick/masstimeout/masswarn** - Act on many users at once",
+        ]
+        
+        # Warning and record commands
+        warning_commands = [
             "**warn** - Warn a user",
             "**warnings** - View user warnings",
             "**clearwarnings** - Clear all warnings",
             "**removewarning** - Remove specific warning",
+            "**escalation set/remove/list/expiry** - Automatic actions at warning counts, and warning expiry",
             "**history** - View mod history",
+            "**export** `[csv|jsonl]` - Export all actions and warnings",
+            "**modstats** `[days]` - Moderation statistics",
+        ]
+        
+        # Message and channel commands
+        channel_commands = [
             "**delete** - Delete messages",
+            "**purge** `amount [user: contains: regex: bots: attachments: before: after:]` - Delete matching messages",
             "**slowmode** - Set slowmode",
-            "**lock/unlock** - Lock/unlock channel",
+            "**lock/unlock** - Lock/unlock channel (optionally for a duration)",
+            "**temprole** - Give a role for a limited time",
             "**pin/unpin** - Pin/unpin messages",
             "**botstats** - View bot resource usage",
         ]
@@ -214,13 +239,25 @@ class Utility(commands.Cog):
         ]
         
         embed.add_field(name="🛡️ Moderation", value="\n".join(mod_commands), inline=False)
+        embed.add_field(name="⚠️ Warnings & Records", value="\n".join(warning_commands), inline=False)
+        embed.add_field(name="🧹 Messages & Channels", value="\n".join(channel_commands), inline=False)
+        # Automod commands
+        automod_commands = [
+            "**antiraid enable** `[threshold] [window] [action]` - Detect join raids",
+            "**antiraid disable** - Disable raid detection",
+            "**antiraid end** - End a raid and lift the lockdown",
+            "**antiraid info** - Show raid detection state",
+            "**antispam enable/disable** - Auto-timeout message spammers",
+            "**filter add/remove/list** - Manage word and regex filters",
+        ]
+        
+        embed.add_field(name="🚨 Automod", value="\n".join(automod_commands), inline=False)
         embed.add_field(name="⭐ Starboard & Clownboard", value="\n".join(board_commands), inline=False)
         embed.add_field(name="🔧 Utility", value="\n".join(util_commands), inline=False)
         embed.add_field(name="🎮 Error Codes", value="\n".join(err_commands), inline=False)
         
         embed.set_footer(text=f"Prefix: {Config.PREFIX} | Total Commands: {len(self.bot.commands)}")
-        
-        await ctx.send(embed=embed)
+        return embed
 
 async def setup(bot):
     await bot.add_cog(Utility(bot))
@@ -19,9 +19,17 @@ class Config:
     SUCCESS_COLOR = int(os.getenv("SUCCESS_COLOR", "00ff00"), 16)
     WARNING_COLOR = int(os.getenv("WARNING_COLOR", "ffaa00"), 16)
 
+    # Slash commands sync to this guild only (instantly) instead of globally
+    DEV_GUILD_ID = int(os.getenv("DEV_GUILD_ID", "0")) or None
+
     # Cache TTL (in seconds)
     CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))
 
+    # Message content store for delete/edit logging
+    MESSAGE_STORE_PER_GUILD = int(os.getenv("MESSAGE_STORE_PER_GUILD", "5000"))
+    MESSAGE_STORE_MAX_TOTAL = int(os.getenv("MESSAGE_STORE_MAX_TOTAL", "100000"))
+    MESSAGE_STORE_MAX_AGE_HOURS = int(os.getenv("MESSAGE_STORE_MAX_AGE_HOURS", "24"))
+
     @classmethod
     def validate(cls):
         if not cls.TOKEN:
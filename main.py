@@ -1,3 +1,7 @@
+import time
+# Taken before anything else is imported, so the import phase can be timed
+_PROCESS_START = time.perf_counter()
+
 import discord
 from discord.ext import commands
 import asyncio
@@ -5,13 +9,22 @@ import sys
 import webserver
 from pathlib import Path
 import random
+from typing import Optional
 
 
 from config import Config
 from utils.database import Database
 from utils.cache import Cache
+from utils.commandsync import tree_hash
+from utils.scheduler import JobScheduler
+from utils.logsender import LogSender
+from utils.guildconfig import GuildConfig
+from utils.guildstate import GuildStateRegistry
 from utils.logger import bot_logger
 from utils.checks import HierarchyError
+from utils.startup import StartupProfile
+
+_IMPORTS_DONE = time.perf_counter()
 
 class ModBot(commands.Bot):
     def __init__(self):
@@ -30,6 +43,12 @@ class ModBot(commands.Bot):
         
         self.db = Database()
         self.cache = Cache()
+        self.scheduler = JobScheduler(self)
+        self.log_sender = LogSender(self)
+        self.guild_state = GuildStateRegistry(self)
+        # Phase timings until the first on_ready; None afterwards
+        self.startup: Optional[StartupProfile] = StartupProfile(_PROCESS_START)
+        self.startup.record('imports', _IMPORTS_DONE - _PROCESS_START)
         self.initial_extensions = [
             'cogs.moderation',
             'cogs.errors',
@@ -37,6 +56,7 @@ class ModBot(commands.Bot):
             'cogs.game',
             'cogs.events',
             'cogs.starboard',   # ← Starboard & Clownboard
+            'cogs.automod',
         ]
     
     async def get_prefix(self, message: discord.Message):
@@ -44,44 +64,109 @@ class ModBot(commands.Bot):
         if not message.guild:
             return commands.when_mentioned_or(Config.PREFIX)(self, message)
         
-        # Try to get from cache first
-        config = await self.cache.get_guild_config(message.guild.id)
-        if not config:
-            config = await self.db.get_guild_config(message.guild.id)
-            if config:
-                await self.cache.set_guild_config(message.guild.id, config)
+        state = await self.guild_state.get(message.guild)
+        return commands.when_mentioned_or(state.prefix)(self, message)
+    
+    async def get_guild_config(self, guild_id: int) -> GuildConfig:
+        """Guild config from cache, falling back to the database.
         
-        prefix = config.get('prefix', Config.PREFIX) if config else Config.PREFIX
-        return commands.when_mentioned_or(prefix)(self, message)
+        Guilds without a row get the defaults, which are cached too so
+        unconfigured guilds don't hit the DB on every event.
+        """
+        config = await self.cache.get_guild_config(guild_id)
+        if config is None:
+            config = await self.db.get_guild_config(guild_id) or GuildConfig(guild_id)
+            await self.cache.set_guild_config(guild_id, config)
+        return config
+    
+    async def invalidate_guild_config(self, guild_id: int):
+        """Call after writing guild_config so the cached row and resolved state are rebuilt"""
+        await self.cache.invalidate_guild_config(guild_id)
+        self.guild_state.invalidate(guild_id)
     
     async def setup_hook(self):
-        """Initial setup when bot starts"""
-        # Initialize database
-        await self.db.connect()
+        """Initial setup when bot starts.
         
-        # Initialize cache
-        await self.cache.connect()
+        Storage and extensions come up one step at a time, extensions in
+        initial_extensions order. The last stage's steps don't depend on
+        each other and are started together.
+        """
+        profile = self.startup
         
-        # Load extensions
+        # Storage: database (with migrations) and cache
+        await profile.run('database', self.db.connect())
+        await profile.run('cache', self.cache.connect())
+        
+        # Extensions; their cog_load hooks may read the database. Loaded in
+        # order, since that fixes the order cogs' listeners are dispatched in
+        # (Events and AutoMod both handle on_message and on_member_join)
+        await profile.run('extensions', self._load_extensions())
+        
+        # Everything that needs the full set of cogs: warm-up serves the first
+        # events from memory, the tree is only uploaded if it changed, and
+        # scheduled jobs start once every cog has registered its handlers
+        await asyncio.gather(
+            profile.run('warm-up', self.warm_up()),
+            profile.run('command sync', self.sync_commands()),
+            profile.run('scheduler', self.scheduler.start()),
+        )
+        
+        profile.report("Setup complete")
+    
+    async def _load_extensions(self):
         for extension in self.initial_extensions:
             try:
                 await self.load_extension(extension)
                 bot_logger.info(f"Loaded extension: {extension}")
             except Exception as e:
                 bot_logger.error(f"Failed to load extension {extension}: {e}")
-            
+    
+    async def warm_up(self):
+        """Load every guild config and the starboard post index before connecting"""
+        configs = await self.db.get_all_guild_configs()
+        for config in configs:
+            await self.cache.set_guild_config(config.guild_id, config)
+        
+        starboard = self.get_cog('Starboard')
+        posts = await starboard.load_posts() if starboard else 0
+        
+        bot_logger.info(f"Warm-up loaded {len(configs)} guild config(s) and {posts} board post(s)")
+    
+    async def sync_commands(self):
+        """Upload the slash command tree if it differs from the last one uploaded"""
+        guild = discord.Object(id=Config.DEV_GUILD_ID) if Config.DEV_GUILD_ID else None
+        if guild:
+            self.tree.copy_global_to(guild=guild)
+        
+        digest = tree_hash(self.tree, guild)
+        key = f"command_tree_hash:{guild.id if guild else 'global'}"
+        if await self.db.get_state(key) == digest:
+            bot_logger.info("Slash commands unchanged since last sync; skipping")
+            return
+        
+        try:
+            synced = await self.tree.sync(guild=guild)
+        except discord.HTTPException as e:
+            bot_logger.error(f"Failed to sync commands: {e}")
+            return
+        
+        await self.db.set_state(key, digest)
+        target = f"to dev guild {guild.id}" if guild else "globally"
+        bot_logger.info(f"Synced {len(synced)} slash commands {target}")
+    
     async def on_ready(self):
         """Called when bot is ready"""
         bot_logger.info(f'{self.user.name} (ID: {self.user.id}) has connected to Discord!')
         bot_logger.info(f'Connected to {len(self.guilds)} guilds')
         
-        # Sync slash commands after bot is ready
-        try:
-            bot_logger.info("Syncing slash commands...")
-            synced = await self.tree.sync()
-            bot_logger.info(f"Synced {len(synced)} slash commands")
-        except Exception as e:
-            bot_logger.error(f"Failed to sync commands: {e}")
+        if self.startup is not None:
+            bot_logger.info(f"Ready {time.perf_counter() - self.startup.started:.2f} s after launch")
+            self.startup = None
+        
+        # Guilds without a config row get cached defaults, so none of them starts cold
+        for guild in self.guilds:
+            if await self.cache.get_guild_config(guild.id) is None:
+                await self.cache.set_guild_config(guild.id, GuildConfig(guild.id))
         
         # Set status
         await self.change_presence(
@@ -123,6 +208,8 @@ class ModBot(commands.Bot):
     
     async def close(self):
         """Cleanup when bot shuts down"""
+        self.scheduler.stop()
+        await self.log_sender.close()
         await self.cache.disconnect()
         bot_logger.info("Bot shutting down")
         await super().close()
@@ -0,0 +1,29 @@
+"""
+The help embed must stay within Discord's embed limits, or sending it fails
+"""
+from types import SimpleNamespace
+
+from cogs.utility import Utility
+
+# https://discord.com/developers/docs/resources/message#embed-object-embed-limits
+MAX_FIELDS = 25
+MAX_FIELD_NAME = 256
+MAX_FIELD_VALUE = 1024
+MAX_TOTAL = 6000
+
+
+def build_help_embed():
+    return Utility(SimpleNamespace(commands=set())).build_help_embed()
+
+
+def test_help_fields_within_limits():
+    embed = build_help_embed()
+    assert 0 < len(embed.fields) <= MAX_FIELDS
+    for field in embed.fields:
+        assert 0 < len(field.name) <= MAX_FIELD_NAME, field.name
+        assert 0 < len(field.value) <= MAX_FIELD_VALUE, f"{field.name}: {len(field.value)} characters"
+
+
+def test_help_total_within_limit():
+    # discord.Embed.__len__ counts title, description, fields, footer and author
+    assert len(build_help_embed()) <= MAX_TOTAL
@@ -0,0 +1,126 @@
+"""
+Per-user message flood / spam detection
+"""
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Token buckets: (capacity, refill per second)
+MESSAGE_BUCKET = (6.0, 1 / 1.5)      # ~6 message burst, then one per 1.5s
+MENTION_BUCKET = (8.0, 1 / 3.0)      # mentions across messages
+LINK_BUCKET = (5.0, 1 / 10.0)
+ATTACHMENT_BUCKET = (6.0, 1 / 5.0)
+
+# Identical messages within DUPLICATE_WINDOW seconds before flagging
+DUPLICATE_LIMIT = 3
+DUPLICATE_WINDOW = 30.0
+
+# Users with no messages for this long are evicted
+IDLE_SECONDS = 300.0
+# Hard cap on tracked users across all guilds
+MAX_TRACKED_USERS = 50_000
+# Once flagged, ignore the user for this long so one burst = one action
+FLAG_COOLDOWN = 30.0
+
+
+class UserSpamState:
+    """Compact per-user counters"""
+
+    __slots__ = (
+        'last', 'messages', 'mentions', 'links', 'attachments',
+        'last_hash', 'dup_count', 'dup_start', 'flagged_until',
+    )
+
+    def __init__(self, now: float):
+        self.last = now
+        self.messages = MESSAGE_BUCKET[0]
+        self.mentions = MENTION_BUCKET[0]
+        self.links = LINK_BUCKET[0]
+        self.attachments = ATTACHMENT_BUCKET[0]
+        self.last_hash = 0
+        self.dup_count = 0
+        self.dup_start = 0.0
+        self.flagged_until = 0.0
+
+
+class SpamDetector:
+    """Flags users who exceed message, mention, link or attachment rates,
+    or who repeat the same message.
+
+    State is kept per (guild, user) in an OrderedDict in least-recently-seen
+    order, so idle users are evicted from the front in O(1) amortised time.
+    No I/O happens on the check path.
+    """
+
+    def __init__(self):
+        self._users: "OrderedDict[Tuple[int, int], UserSpamState]" = OrderedDict()
+        self.flagged = 0
+
+    def __len__(self):
+        return len(self._users)
+
+    def check(self, guild_id: int, user_id: int, content: str, mentions: int,
+              attachments: int, now: Optional[float] = None) -> Optional[str]:
+        """Record a message and return a reason string if it is spam"""
+        now = now if now is not None else time.monotonic()
+        users = self._users
+        key = (guild_id, user_id)
+
+        state = users.get(key)
+        if state is None:
+            state = users[key] = UserSpamState(now)
+            self._evict(now)
+        else:
+            users.move_to_end(key)
+
+        elapsed = now - state.last
+        state.last = now
+
+        if now < state.flagged_until:
+            return None
+
+        # Refill and spend each bucket; a negative balance means the rate was exceeded
+        state.messages = min(MESSAGE_BUCKET[0], state.messages + elapsed * MESSAGE_BUCKET[1]) - 1
+        state.mentions = min(MENTION_BUCKET[0], state.mentions + elapsed * MENTION_BUCKET[1]) - mentions
+        links = content.count("://") if content else 0
+        state.links = min(LINK_BUCKET[0], state.links + elapsed * LINK_BUCKET[1]) - links
+        state.attachments = min(ATTACHMENT_BUCKET[0], state.attachments + elapsed * ATTACHMENT_BUCKET[1]) - attachments
+
+        reason = None
+        if state.messages < 0:
+            reason = "Sending messages too quickly"
+        elif state.mentions < 0:
+            reason = "Too many mentions"
+        elif state.links < 0:
+            reason = "Too many links"
+        elif state.attachments < 0:
+            reason = "Too many attachments"
+        elif content:
+            fingerprint = hash(content.casefold())
+            if fingerprint == state.last_hash and now - state.dup_start <= DUPLICATE_WINDOW:
+                state.dup_count += 1
+                if state.dup_count >= DUPLICATE_LIMIT:
+                    reason = "Repeated identical messages"
+            else:
+                state.last_hash = fingerprint
+                state.dup_count = 1
+                state.dup_start = now
+
+        if reason:
+            state.flagged_until = now + FLAG_COOLDOWN
+            self.flagged += 1
+        return reason
+
+    def _evict(self, now: float):
+        users = self._users
+        cutoff = now - IDLE_SECONDS
+        while users:
+            key, state = next(iter(users.items()))
+            if state.last >= cutoff and len(users) <= MAX_TRACKED_USERS:
+                break
+            del users[key]
+
+    def forget_guild(self, guild_id: int):
+        """Drop state for a guild (e.g. when anti-spam is disabled)"""
+        for key in [key for key in self._users if key[0] == guild_id]:
+            del self._users[key]
@@ -0,0 +1,146 @@
+"""
+Batched audit-log lookups for ban / unban / kick events
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import discord
+from discord.utils import time_snowflake
+
+from utils.logger import bot_logger
+
+TRACKED_ACTIONS = (
+    discord.AuditLogAction.ban,
+    discord.AuditLogAction.unban,
+    discord.AuditLogAction.kick,
+)
+
+# (action, target_id)
+EntryKey = Tuple[discord.AuditLogAction, int]
+
+
+class AuditLogCorrelator:
+    """Resolves gateway events to the audit-log entry that caused them.
+
+    Instead of one audit-log request per event, lookups for a guild are
+    parked until a short batch delay has passed, then a single paginated
+    fetch of everything newer than the last seen entry answers all of
+    them at once. Entries are cached by (action, target) for ENTRY_TTL
+    seconds, so a flood of bans costs a handful of requests in total.
+    """
+
+    # Wait this long after the first lookup so a burst of events shares one fetch
+    BATCH_DELAY = 1.0
+    # Fetch rounds a lookup waits through before giving up (audit logs can lag)
+    MAX_ROUNDS = 2
+    # How long fetched entries are kept, and how far back the first fetch looks
+    ENTRY_TTL = 60.0
+    # Upper bound on entries pulled in one round (100 per request)
+    MAX_ENTRIES_PER_FETCH = 500
+
+    def __init__(self):
+        # guild_id -> {(action, target_id): (fetched_at, entry)}
+        self._entries: Dict[int, Dict[EntryKey, Tuple[float, discord.AuditLogEntry]]] = {}
+        # guild_id -> newest audit-log entry ID already fetched
+        self._last_id: Dict[int, int] = {}
+        # guild_id -> {(action, target_id): [rounds waited, waiting futures, rounds allowed]}
+        self._pending: Dict[int, Dict[EntryKey, list]] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self.fetches = 0
+
+    async def resolve(
+        self,
+        guild: discord.Guild,
+        action: discord.AuditLogAction,
+        target_id: int,
+        max_rounds: Optional[int] = None
+    ) -> Optional[discord.AuditLogEntry]:
+        """Audit-log entry for ``action`` against ``target_id``, or None if not found.
+
+        ``max_rounds`` lowers MAX_ROUNDS for lookups that usually find nothing.
+        """
+        if not guild.me or not guild.me.guild_permissions.view_audit_log:
+            return None
+
+        key = (action, target_id)
+        entry = self._take(guild.id, key)
+        if entry is not None:
+            return entry
+
+        rounds = max_rounds or self.MAX_ROUNDS
+        future = asyncio.get_running_loop().create_future()
+        waiting = self._pending.setdefault(guild.id, {}).setdefault(key, [0, [], rounds])
+        waiting[1].append(future)
+        # Lookups for the same key share one wait, as long as the most patient needs
+        waiting[2] = max(waiting[2], rounds)
+        if guild.id not in self._tasks:
+            self._tasks[guild.id] = asyncio.create_task(self._run(guild))
+        return await future
+
+    def stop(self):
+        """Cancel in-flight fetches; waiting lookups resolve to None"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+
+    def _take(self, guild_id: int, key: EntryKey) -> Optional[discord.AuditLogEntry]:
+        # Each entry answers exactly one event, so a ban / unban / ban
+        # sequence doesn't reuse the first ban's entry
+        cached = self._entries.get(guild_id, {}).pop(key, None)
+        if cached is None or time.monotonic() - cached[0] > self.ENTRY_TTL:
+            return None
+        return cached[1]
+
+    async def _run(self, guild: discord.Guild):
+        pending = self._pending[guild.id]
+        try:
+            while pending:
+                await asyncio.sleep(self.BATCH_DELAY)
+                try:
+                    await self._fetch(guild)
+                except discord.HTTPException as e:
+                    bot_logger.warning(f"Audit log fetch failed for guild {guild.id}: {e}")
+                    break
+
+                for key in list(pending):
+                    waiting = pending[key]
+                    entry = self._take(guild.id, key)
+                    waiting[0] += 1
+                    if entry is None and waiting[0] < waiting[2]:
+                        continue
+                    del pending[key]
+                    self._settle(waiting[1], entry)
+        finally:
+            # No await between the loop exiting and this, so no lookup can
+            # register against a task that is about to finish
+            del self._tasks[guild.id]
+            for _, futures, _ in self._pending.pop(guild.id, {}).values():
+                self._settle(futures, None)
+
+    @staticmethod
+    def _settle(futures: List[asyncio.Future], entry: Optional[discord.AuditLogEntry]):
+        for future in futures:
+            if not future.done():
+                future.set_result(entry)
+
+    async def _fetch(self, guild: discord.Guild):
+        """Pull every audit-log entry newer than the last one seen"""
+        # Never look further back than the TTL, even after a long quiet spell
+        since = datetime.now(timezone.utc) - timedelta(seconds=self.ENTRY_TTL)
+        after = max(self._last_id.get(guild.id, 0), time_snowflake(since))
+
+        now = time.monotonic()
+        entries = self._entries.setdefault(guild.id, {})
+        self.fetches += 1
+
+        async for entry in guild.audit_logs(limit=self.MAX_ENTRIES_PER_FETCH, after=discord.Object(id=after)):
+            after = max(after, entry.id)
+            if entry.action in TRACKED_ACTIONS and entry.target is not None:
+                entries[(entry.action, entry.target.id)] = (now, entry)
+
+        self._last_id[guild.id] = after
+
+        cutoff = now - self.ENTRY_TTL
+        for key in [key for key, (fetched_at, _) in entries.items() if fetched_at < cutoff]:
+            del entries[key]
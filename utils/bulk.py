@@ -0,0 +1,88 @@
+"""
+Helpers for bulk moderation: target parsing and a bounded worker pool
+"""
+import asyncio
+import re
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple, TypeVar
+
+import discord
+
+T = TypeVar('T')
+
+# Most targets a single bulk command may act on
+MAX_BULK_TARGETS = 500
+# Concurrent API calls per bulk command; discord.py still serialises
+# requests that share a rate-limit bucket, this just bounds the queue
+BULK_CONCURRENCY = 5
+# Attempts per target when Discord answers with a 429
+MAX_RATE_LIMIT_RETRIES = 3
+
+_TARGET_RE = re.compile(r'^(?:<@!?(\d{15,21})>|(\d{15,21}))$')
+
+
+def parse_targets(text: str) -> Tuple[List[int], Optional[str]]:
+    """Split "<mentions or IDs> [reason]" into unique user IDs and the reason.
+
+    Leading tokens that look like user mentions or snowflakes are taken as
+    targets; everything after the first non-target token is the reason.
+    """
+    tokens = text.split()
+    ids: List[int] = []
+    seen = set()
+    index = 0
+
+    for index, token in enumerate(tokens):
+        match = _TARGET_RE.match(token.strip(','))
+        if not match:
+            break
+        user_id = int(match.group(1) or match.group(2))
+        if user_id not in seen:
+            seen.add(user_id)
+            ids.append(user_id)
+    else:
+        index = len(tokens)
+
+    reason = " ".join(tokens[index:]) or None
+    return ids, reason
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait before retrying, or None if the error is not a rate limit"""
+    if isinstance(error, discord.RateLimited):
+        return error.retry_after
+    if isinstance(error, discord.HTTPException) and error.status == 429:
+        header = error.response.headers.get('Retry-After') if error.response else None
+        try:
+            return float(header) if header else 1.0
+        except ValueError:
+            return 1.0
+    return None
+
+
+async def run_bounded(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[None]],
+    limit: int = BULK_CONCURRENCY
+) -> List[Tuple[T, Optional[Exception]]]:
+    """Run ``worker`` over ``items`` with at most ``limit`` calls in flight.
+
+    Rate-limited calls are retried after the server's retry-after. Returns
+    (item, error) pairs in input order; error is None on success.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(item: T) -> Tuple[T, Optional[Exception]]:
+        async with semaphore:
+            attempts = 0
+            while True:
+                try:
+                    await worker(item)
+                    return item, None
+                except Exception as e:
+                    attempts += 1
+                    delay = retry_after(e)
+                    if delay is None or attempts >= MAX_RATE_LIMIT_RETRIES:
+                        return item, e
+                    await asyncio.sleep(delay)
+
+    return await asyncio.gather(*(run(item) for item in items))
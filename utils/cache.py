@@ -25,7 +25,8 @@ class Cache:
         """Check if cache entry is expired"""
         if key not in self.expiry:
             return True
-        return datetime.now() > self.expiry[key]
+        expires = self.expiry[key]
+        return expires is not None and datetime.now() > expires
     
     async def get(self, key: str) -> Optional[Any]:
         """Get a value from cache"""
@@ -33,10 +34,10 @@ class Cache:
             return None
         return self.cache[key]
     
-    async def set(self, key: str, value: Any, ttl: int = 3600):
-        """Set a value in cache"""
+    async def set(self, key: str, value: Any, ttl: Optional[int] = 3600):
+        """Set a value in cache; a ttl of None keeps it until deleted"""
         self.cache[key] = value
-        self.expiry[key] = datetime.now() + timedelta(seconds=ttl)
+        self.expiry[key] = datetime.now() + timedelta(seconds=ttl) if ttl is not None else None
     
     async def delete(self, key: str):
         """Delete a key from cache"""
@@ -54,18 +55,59 @@ class Cache:
         return key in self.cache and not self._is_expired(key)
     
     # Guild-specific cache helpers
-    async def get_guild_config(self, guild_id: int) -> Optional[dict]:
+    async def get_guild_config(self, guild_id: int) -> Optional[Any]:
         """Get guild config from cache"""
         return await self.get(f"guild_config:{guild_id}")
     
-    async def set_guild_config(self, guild_id: int, config: dict):
-        """Set guild config in cache"""
-        await self.set(f"guild_config:{guild_id}", config)
+    async def set_guild_config(self, guild_id: int, config: Any):
+        """Set guild config in cache.
+
+        Kept until invalidated: every guild_config write goes through
+        invalidate_guild_config, so a TTL would only let warmed entries
+        go cold.
+        """
+        await self.set(f"guild_config:{guild_id}", config, ttl=None)
     
     async def invalidate_guild_config(self, guild_id: int):
         """Invalidate guild config cache"""
         await self.delete(f"guild_config:{guild_id}")
     
+    async def get_mod_roles(self, guild_id: int) -> Optional[dict]:
+        """Get compiled moderator role capabilities from cache"""
+        return await self.get(f"mod_roles:{guild_id}")
+    
+    async def set_mod_roles(self, guild_id: int, role_caps: dict):
+        """Set compiled moderator role capabilities in cache"""
+        await self.set(f"mod_roles:{guild_id}", role_caps)
+    
+    async def invalidate_mod_roles(self, guild_id: int):
+        """Invalidate moderator role cache"""
+        await self.delete(f"mod_roles:{guild_id}")
+    
+    async def get_guild_filter(self, guild_id: int) -> Optional[Any]:
+        """Get compiled guild filter from cache"""
+        return await self.get(f"guild_filter:{guild_id}")
+    
+    async def set_guild_filter(self, guild_id: int, compiled: Any):
+        """Set compiled guild filter in cache"""
+        await self.set(f"guild_filter:{guild_id}", compiled)
+    
+    async def invalidate_guild_filter(self, guild_id: int):
+        """Invalidate compiled guild filter cache"""
+        await self.delete(f"guild_filter:{guild_id}")
+    
+    async def get_escalation_ladder(self, guild_id: int) -> Optional[dict]:
+        """Get compiled escalation ladder from cache"""
+        return await self.get(f"escalation:{guild_id}")
+    
+    async def set_escalation_ladder(self, guild_id: int, ladder: dict):
+        """Set compiled escalation ladder in cache"""
+        await self.set(f"escalation:{guild_id}", ladder)
+    
+    async def invalidate_escalation_ladder(self, guild_id: int):
+        """Invalidate escalation ladder cache"""
+        await self.delete(f"escalation:{guild_id}")
+    
     async def get_user_warnings(self, guild_id: int, user_id: int) -> Optional[list]:
         """Get user warnings from cache"""
         return await self.get(f"warnings:{guild_id}:{user_id}")
@@ -74,6 +116,18 @@ class Cache:
         """Set user warnings in cache"""
         await self.set(f"warnings:{guild_id}:{user_id}", warnings, ttl=300)
     
+    async def add_user_warning(self, guild_id: int, user_id: int, warning: dict):
+        """Put a new warning at the front of a cached list; no-op if the user isn't cached"""
+        warnings = await self.get_user_warnings(guild_id, user_id)
+        if warnings is not None:
+            await self.set_user_warnings(guild_id, user_id, [warning] + warnings)
+    
+    async def remove_user_warning(self, guild_id: int, user_id: int, warning_id: int):
+        """Drop one warning from a cached list; no-op if the user isn't cached"""
+        warnings = await self.get_user_warnings(guild_id, user_id)
+        if warnings is not None:
+            await self.set_user_warnings(guild_id, user_id, [w for w in warnings if w['id'] != warning_id])
+    
     async def invalidate_user_warnings(self, guild_id: int, user_id: int):
         """Invalidate user warnings cache"""
         await self.delete(f"warnings:{guild_id}:{user_id}")
\ No newline at end of file
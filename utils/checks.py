@@ -1,13 +1,37 @@
 import discord
 from discord.ext import commands
-from typing import Union
+from typing import Dict, Optional, Union
+
+from utils.permissions import Capability, compile_role_capabilities
 
 class HierarchyError(commands.CheckFailure):
     """Custom exception for hierarchy check failures"""
     pass
 
-def is_moderator():
-    """Decorator to check if user has moderator role or administrator permission"""
+async def get_role_capabilities(bot, guild_id: int) -> Dict[int, int]:
+    """A guild's moderator roles as role_id -> capability mask, cached until config changes"""
+    role_caps = await bot.cache.get_mod_roles(guild_id)
+    if role_caps is None:
+        role_caps = compile_role_capabilities(await bot.db.get_mod_roles(guild_id))
+        await bot.cache.set_mod_roles(guild_id, role_caps)
+    return role_caps
+
+def member_capabilities(member: discord.Member, role_caps: Dict[int, int]) -> int:
+    """OR of the capability masks of every moderator role the member has"""
+    caps = 0
+    # get_role is a binary search over the member's sorted role IDs
+    for role_id, mask in role_caps.items():
+        if member.get_role(role_id):
+            caps |= mask
+    return caps
+
+def has_capability(required: Capability):
+    """Decorator to check the author's moderator tier grants ``required``.
+    
+    Administrators always pass.
+    """
+    required = int(required)
+    
     async def predicate(ctx: commands.Context):
         # Don't allow in DMs
         if not ctx.guild:
@@ -16,66 +40,63 @@ def is_moderator():
         # Administrators always bypass mod role check
         if ctx.author.guild_permissions.administrator:
             return True
-            
-        # Get guild config
-        config = await ctx.bot.db.get_guild_config(ctx.guild.id)
         
-        if not config or not config.get('mod_role_id'):
+        role_caps = await get_role_capabilities(ctx.bot, ctx.guild.id)
+        
+        if not role_caps:
             await ctx.send("❌ No moderator role has been set. An administrator needs to use `/setmod` first.")
             return False
         
-        mod_role_id = config['mod_role_id']
-        mod_role = ctx.guild.get_role(mod_role_id)
+        caps = member_capabilities(ctx.author, role_caps)
+        if caps & required == required:
+            return True
         
-        if not mod_role:
+        if caps:
+            await ctx.send("❌ Your moderator tier doesn't allow this command.")
+        elif not any(ctx.guild.get_role(role_id) for role_id in role_caps):
             await ctx.send("❌ The configured moderator role no longer exists. Please reconfigure with `/setmod`.")
-            return False
-        
-        # Check if user has the mod role
-        has_role = mod_role in ctx.author.roles
-        
-        if not has_role:
-            await ctx.send("❌ You need the moderator role or administrator permission to use this command.")
-            return False
-        
-        return True
+        else:
+            await ctx.send("❌ You need a moderator role or administrator permission to use this command.")
+        return False
     
     return commands.check(predicate)
 
-def moderator_check():
-    """Additional check for moderator commands - checks bot permissions"""
-    async def predicate(ctx: commands.Context):
-        # Just return True, don't block commands
-        return True
+def hierarchy_error(ctx: commands.Context, target: Union[discord.Member, discord.abc.Snowflake]) -> Optional[str]:
+    """Return why the moderator can't act on target, or None if they can.
     
-    return commands.check(predicate)
-
-async def check_hierarchy(ctx: commands.Context, target: discord.Member):
-    """Check if moderator can act on target user"""
+    Targets that aren't guild members (e.g. banning by ID) skip the role checks.
+    """
     # Can't moderate yourself
     if target.id == ctx.author.id:
-        await ctx.send("❌ You cannot moderate yourself.")
-        raise HierarchyError("Cannot moderate self")
+        return "You cannot moderate yourself."
     
     # Can't moderate the bot
     if target.id == ctx.bot.user.id:
-        await ctx.send("❌ You cannot moderate me!")
-        raise HierarchyError("Cannot moderate bot")
+        return "You cannot moderate me!"
     
     # Can't moderate server owner
     if target.id == ctx.guild.owner_id:
-        await ctx.send("❌ You cannot moderate the server owner.")
-        raise HierarchyError("Cannot moderate owner")
+        return "You cannot moderate the server owner."
+    
+    if not isinstance(target, discord.Member):
+        return None
     
     # Check role hierarchy (unless moderator is admin)
     if not ctx.author.guild_permissions.administrator:
         if target.top_role >= ctx.author.top_role:
-            await ctx.send("❌ You cannot moderate someone with an equal or higher role.")
-            raise HierarchyError("Insufficient role hierarchy")
+            return "You cannot moderate someone with an equal or higher role."
     
     # Check if bot can moderate target
     if target.top_role >= ctx.guild.me.top_role:
-        await ctx.send("❌ I cannot moderate someone with an equal or higher role than me.")
-        raise HierarchyError("Bot insufficient role hierarchy")
+        return "I cannot moderate someone with an equal or higher role than me."
+    
+    return None
+
+async def check_hierarchy(ctx: commands.Context, target: discord.Member):
+    """Check if moderator can act on target user"""
+    error = hierarchy_error(ctx, target)
+    if error:
+        await ctx.send(f"❌ {error}")
+        raise HierarchyError(error)
     
     return True
\ No newline at end of file
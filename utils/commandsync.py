@@ -0,0 +1,18 @@
+"""
+Fingerprint of the slash command tree, so unchanged trees aren't re-uploaded
+"""
+import hashlib
+import json
+from typing import Optional
+
+import discord
+from discord import app_commands
+
+
+def tree_hash(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """SHA-256 of the payload tree.sync(guild=guild) would upload"""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda command: (command.get('type', 1), command['name'])
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
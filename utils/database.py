@@ -1,276 +1,1022 @@
-import aiosqlite
-from pathlib import Path
-from typing import List, Optional, Tuple
-from datetime import datetime
-from config import Config
-from utils.logger import bot_logger
-
-class Database:
-    def __init__(self, db_path: str = None):
-        self.db_path = db_path or Config.DATABASE_PATH
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-        
-    async def connect(self):
-        """Initialize database connection and create tables"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS guild_config (
-                    guild_id INTEGER PRIMARY KEY,
-                    mod_role_id INTEGER,
-                    log_channel_id INTEGER,
-                    prefix TEXT DEFAULT '?',
-                    log_joins INTEGER DEFAULT 1,
-                    log_leaves INTEGER DEFAULT 1,
-                    log_bans INTEGER DEFAULT 1,
-                    log_kicks INTEGER DEFAULT 1,
-                    log_warnings INTEGER DEFAULT 1,
-                    log_mutes INTEGER DEFAULT 1,
-                    log_message_deletes INTEGER DEFAULT 0,
-                    log_message_edits INTEGER DEFAULT 0,
-                    starboard_channel_id INTEGER DEFAULT NULL,
-                    starboard_threshold INTEGER DEFAULT 3,
-                    sobboard_channel_id INTEGER DEFAULT NULL,
-                    sobboard_threshold INTEGER DEFAULT 3,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-
-            # Migrate existing tables: add starboard/sobboard columns if they don't exist yet
-            for col, default in [
-                ("starboard_channel_id", "NULL"),
-                ("starboard_threshold",  "3"),
-                ("sobboard_channel_id", "NULL"),
-                ("sobboard_threshold",  "3"),
-            ]:
-                try:
-                    await db.execute(
-                        f"ALTER TABLE guild_config ADD COLUMN {col} INTEGER DEFAULT {default}"
-                    )
-                except Exception:
-                    pass  # Column already exists — that's fine
-            
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS actions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    moderator_id INTEGER NOT NULL,
-                    action TEXT NOT NULL,
-                    reason TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (guild_id) REFERENCES guild_config(guild_id)
-                )
-            """)
-            
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS warnings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    moderator_id INTEGER NOT NULL,
-                    reason TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    active INTEGER DEFAULT 1,
-                    FOREIGN KEY (guild_id) REFERENCES guild_config(guild_id)
-                )
-            """)
-            
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS temp_bans (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    expires_at TIMESTAMP NOT NULL,
-                    reason TEXT,
-                    FOREIGN KEY (guild_id) REFERENCES guild_config(guild_id)
-                )
-            """)
-            
-            # Indexes
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_actions_user 
-                ON actions(guild_id, user_id)
-            """)
-            
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_warnings_user 
-                ON warnings(guild_id, user_id, active)
-            """)
-            
-            await db.commit()
-            bot_logger.info("Database initialized successfully")
-    
-    # ──────────────────────────────────────────────────────────────────
-    # Guild config
-    # ──────────────────────────────────────────────────────────────────
-
-    async def get_guild_config(self, guild_id: int) -> Optional[dict]:
-        """Get guild configuration"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                "SELECT * FROM guild_config WHERE guild_id = ?",
-                (guild_id,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return dict(row) if row else None
-    
-    async def set_mod_role(self, guild_id: int, role_id: int):
-        """Set moderator role for a guild"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT INTO guild_config (guild_id, mod_role_id)
-                VALUES (?, ?)
-                ON CONFLICT(guild_id) DO UPDATE SET mod_role_id = ?
-            """, (guild_id, role_id, role_id))
-            await db.commit()
-    
-    async def set_log_channel(self, guild_id: int, channel_id: int):
-        """Set log channel for a guild"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT INTO guild_config (guild_id, log_channel_id)
-                VALUES (?, ?)
-                ON CONFLICT(guild_id) DO UPDATE SET log_channel_id = ?
-            """, (guild_id, channel_id, channel_id))
-            await db.commit()
-    
-    async def update_log_settings(self, guild_id: int, **settings):
-        """Update log settings for a guild"""
-        valid_settings = {
-            'log_joins', 'log_leaves', 'log_bans', 'log_kicks',
-            'log_warnings', 'log_mutes', 'log_message_deletes', 'log_message_edits'
-        }
-        
-        updates = {k: v for k, v in settings.items() if k in valid_settings}
-        if not updates:
-            return
-        
-        set_clause = ", ".join([f"{k} = ?" for k in updates.keys()])
-        values = list(updates.values()) + [guild_id]
-        
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(f"""
-                INSERT INTO guild_config (guild_id, {', '.join(updates.keys())})
-                VALUES (?, {', '.join(['?'] * len(updates))})
-                ON CONFLICT(guild_id) DO UPDATE SET {set_clause}
-            """, [guild_id] + list(updates.values()) + list(updates.values()))
-            await db.commit()
-
-    # ──────────────────────────────────────────────────────────────────
-    # Starboard / Sobboard
-    # ──────────────────────────────────────────────────────────────────
-
-    async def set_starboard_channel(
-        self, guild_id: int, channel_id: Optional[int], threshold: int = 3
-    ):
-        """Set (or clear) the starboard channel and threshold for a guild."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                """
-                INSERT INTO guild_config (guild_id, starboard_channel_id, starboard_threshold)
-                VALUES (?, ?, ?)
-                ON CONFLICT(guild_id) DO UPDATE SET
-                    starboard_channel_id = excluded.starboard_channel_id,
-                    starboard_threshold  = excluded.starboard_threshold
-                """,
-                (guild_id, channel_id, threshold),
-            )
-            await db.commit()
-
-    async def set_sobboard_channel(
-        self, guild_id: int, channel_id: Optional[int], threshold: int = 3
-    ):
-        """Set (or clear) the sobboard channel and threshold for a guild."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                """
-                INSERT INTO guild_config (guild_id, sobboard_channel_id, sobboard_threshold)
-                VALUES (?, ?, ?)
-                ON CONFLICT(guild_id) DO UPDATE SET
-                    sobboard_channel_id = excluded.sobboard_channel_id,
-                    sobboard_threshold  = excluded.sobboard_threshold
-                """,
-                (guild_id, channel_id, threshold),
-            )
-            await db.commit()
-
-    # ──────────────────────────────────────────────────────────────────
-    # Moderation actions & warnings
-    # ──────────────────────────────────────────────────────────────────
-
-    async def log_action(self, guild_id: int, user_id: int, moderator_id: int,
-                        action: str, reason: Optional[str] = None):
-        """Log a moderation action"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT INTO actions (guild_id, user_id, moderator_id, action, reason)
-                VALUES (?, ?, ?, ?, ?)
-            """, (guild_id, user_id, moderator_id, action, reason))
-            await db.commit()
-    
-    async def add_warning(self, guild_id: int, user_id: int, moderator_id: int,
-                         reason: Optional[str] = None) -> int:
-        """Add a warning to a user"""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                INSERT INTO warnings (guild_id, user_id, moderator_id, reason)
-                VALUES (?, ?, ?, ?)
-            """, (guild_id, user_id, moderator_id, reason))
-            await db.commit()
-            return cursor.lastrowid
-    
-    async def get_warnings(self, guild_id: int, user_id: int) -> List[dict]:
-        """Get all active warnings for a user"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT * FROM warnings 
-                WHERE guild_id = ? AND user_id = ? AND active = 1
-                ORDER BY timestamp DESC
-            """, (guild_id, user_id)) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
-    
-    async def clear_warnings(self, guild_id: int, user_id: int):
-        """Clear all warnings for a user"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                UPDATE warnings SET active = 0
-                WHERE guild_id = ? AND user_id = ?
-            """, (guild_id, user_id))
-            await db.commit()
-    
-    async def remove_warning(self, warning_id: int) -> bool:
-        """Remove a specific warning"""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                UPDATE warnings SET active = 0
-                WHERE id = ?
-            """, (warning_id,))
-            await db.commit()
-            return cursor.rowcount > 0
-    
-    async def get_user_actions(self, guild_id: int, user_id: int, 
-                              action: Optional[str] = None) -> List[dict]:
-        """Get all actions for a user"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            if action:
-                query = """
-                    SELECT * FROM actions 
-                    WHERE guild_id = ? AND user_id = ? AND action = ?
-                    ORDER BY timestamp DESC
-                """
-                params = (guild_id, user_id, action)
-            else:
-                query = """
-                    SELECT * FROM actions 
-                    WHERE guild_id = ? AND user_id = ?
-                    ORDER BY timestamp DESC
-                """
-                params = (guild_id, user_id)
-            
-            async with db.execute(query, params) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+import aiosqlite
+import sqlite3
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from datetime import datetime, timedelta, timezone
+from config import Config
+from utils.guildconfig import GuildConfig
+from utils.logger import bot_logger
+
+
+async def _add_column(db: aiosqlite.Connection, table: str, column: str, definition: str):
+    """ALTER TABLE ADD COLUMN, skipped if the column already exists"""
+    async with db.execute(f"PRAGMA table_info({table})") as cursor:
+        existing = {row[1] for row in await cursor.fetchall()}
+    if column not in existing:
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+async def _add_board_columns(db: aiosqlite.Connection):
+    # Databases created before versioning may already carry these columns
+    for col, default in [
+        ("starboard_channel_id", "NULL"),
+        ("starboard_threshold",  "3"),
+        ("sobboard_channel_id", "NULL"),
+        ("sobboard_threshold",  "3"),
+    ]:
+        await _add_column(db, "guild_config", col, f"INTEGER DEFAULT {default}")
+
+
+def _to_timestamp(dt: datetime) -> str:
+    """Format a datetime as a naive UTC string matching CURRENT_TIMESTAMP"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a stored UTC timestamp into an aware datetime"""
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+# Expiry for a new warning, from its guild's warning_expiry_days (NULL = never)
+_WARNING_EXPIRY = (
+    "(SELECT datetime('now', '+' || warning_expiry_days || ' days') "
+    "FROM guild_config WHERE guild_id = ?)"
+)
+
+MigrationStep = Union[str, Callable[[aiosqlite.Connection], Awaitable[None]]]
+
+# Ordered schema migrations: (version, description, steps).
+# Append new entries only — never edit or reorder an applied migration.
+MIGRATIONS: List[Tuple[int, str, Tuple[MigrationStep, ...]]] = [
+    (1, "Initial schema", (
+        """
+        CREATE TABLE IF NOT EXISTS guild_config (
+            guild_id INTEGER PRIMARY KEY,
+            mod_role_id INTEGER,
+            log_channel_id INTEGER,
+            prefix TEXT DEFAULT '?',
+            log_joins INTEGER DEFAULT 1,
+            log_leaves INTEGER DEFAULT 1,
+            log_bans INTEGER DEFAULT 1,
+            log_kicks INTEGER DEFAULT 1,
+            log_warnings INTEGER DEFAULT 1,
+            log_mutes INTEGER DEFAULT 1,
+            log_message_deletes INTEGER DEFAULT 0,
+            log_message_edits INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS actions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            reason TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (guild_id) REFERENCES guild_config(guild_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS warnings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            reason TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            active INTEGER DEFAULT 1,
+            FOREIGN KEY (guild_id) REFERENCES guild_config(guild_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS temp_bans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            expires_at TIMESTAMP NOT NULL,
+            reason TEXT,
+            FOREIGN KEY (guild_id) REFERENCES guild_config(guild_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_actions_user ON actions(guild_id, user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_warnings_user ON warnings(guild_id, user_id, active)",
+    )),
+    (2, "Starboard and sobboard columns", (
+        _add_board_columns,
+    )),
+    (3, "Temp-ban expiry index", (
+        "CREATE INDEX IF NOT EXISTS idx_temp_bans_expires ON temp_bans(expires_at)",
+    )),
+    (4, "Scheduled jobs", (
+        """
+        CREATE TABLE IF NOT EXISTS scheduled_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            guild_id INTEGER NOT NULL,
+            job_key TEXT,
+            payload TEXT,
+            run_at TIMESTAMP NOT NULL,
+            attempts INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_run_at ON scheduled_jobs(run_at)",
+        "CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_key ON scheduled_jobs(kind, guild_id, job_key)",
+    )),
+    (5, "Anti-raid settings", (
+        "ALTER TABLE guild_config ADD COLUMN raid_enabled INTEGER DEFAULT 0",
+        "ALTER TABLE guild_config ADD COLUMN raid_join_threshold INTEGER DEFAULT 10",
+        "ALTER TABLE guild_config ADD COLUMN raid_window_seconds INTEGER DEFAULT 10",
+        "ALTER TABLE guild_config ADD COLUMN raid_action TEXT DEFAULT 'alert'",
+    )),
+    (6, "Anti-spam settings", (
+        "ALTER TABLE guild_config ADD COLUMN antispam_enabled INTEGER DEFAULT 0",
+        "ALTER TABLE guild_config ADD COLUMN antispam_timeout_minutes INTEGER DEFAULT 10",
+    )),
+    (7, "Word and regex filters", (
+        """
+        CREATE TABLE IF NOT EXISTS filter_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            pattern TEXT NOT NULL,
+            hits INTEGER DEFAULT 0,
+            created_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (guild_id) REFERENCES guild_config(guild_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_filter_rules_guild ON filter_rules(guild_id)",
+    )),
+    (8, "Webhook log delivery", (
+        "ALTER TABLE guild_config ADD COLUMN log_webhook_enabled INTEGER DEFAULT 0",
+        "ALTER TABLE guild_config ADD COLUMN log_webhook_id INTEGER",
+        "ALTER TABLE guild_config ADD COLUMN log_webhook_token TEXT",
+    )),
+    (9, "Moderation stats rollups", (
+        """
+        CREATE TABLE IF NOT EXISTS action_daily (
+            guild_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, day, moderator_id, action)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_stats (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            actions INTEGER NOT NULL DEFAULT 0,
+            warnings INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_user_stats_total ON user_stats(guild_id, actions + warnings)",
+        "CREATE INDEX IF NOT EXISTS idx_user_stats_warnings ON user_stats(guild_id, warnings)",
+        # Backfill from existing history; warnings count as 'warn' actions
+        """
+        INSERT INTO action_daily (guild_id, day, moderator_id, action, count)
+        SELECT guild_id, day, moderator_id, action, COUNT(*) FROM (
+            SELECT guild_id, date(timestamp) AS day, moderator_id, action FROM actions
+            UNION ALL
+            SELECT guild_id, date(timestamp), moderator_id, 'warn' FROM warnings
+        )
+        GROUP BY guild_id, day, moderator_id, action
+        """,
+        """
+        INSERT INTO user_stats (guild_id, user_id, actions, warnings)
+        SELECT guild_id, user_id, SUM(is_action), SUM(1 - is_action) FROM (
+            SELECT guild_id, user_id, 1 AS is_action FROM actions
+            UNION ALL
+            SELECT guild_id, user_id, 0 FROM warnings
+        )
+        GROUP BY guild_id, user_id
+        """,
+        # Keep the rollups current on every insert, whichever code path made it
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_actions_rollup AFTER INSERT ON actions BEGIN
+            INSERT INTO action_daily (guild_id, day, moderator_id, action, count)
+            VALUES (NEW.guild_id, date(NEW.timestamp), NEW.moderator_id, NEW.action, 1)
+            ON CONFLICT(guild_id, day, moderator_id, action) DO UPDATE SET count = count + 1;
+            INSERT INTO user_stats (guild_id, user_id, actions)
+            VALUES (NEW.guild_id, NEW.user_id, 1)
+            ON CONFLICT(guild_id, user_id) DO UPDATE SET actions = actions + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_warnings_rollup AFTER INSERT ON warnings BEGIN
+            INSERT INTO action_daily (guild_id, day, moderator_id, action, count)
+            VALUES (NEW.guild_id, date(NEW.timestamp), NEW.moderator_id, 'warn', 1)
+            ON CONFLICT(guild_id, day, moderator_id, action) DO UPDATE SET count = count + 1;
+            INSERT INTO user_stats (guild_id, user_id, warnings)
+            VALUES (NEW.guild_id, NEW.user_id, 1)
+            ON CONFLICT(guild_id, user_id) DO UPDATE SET warnings = warnings + 1;
+        END
+        """,
+    )),
+    (10, "Multiple moderator roles", (
+        """
+        CREATE TABLE IF NOT EXISTS mod_roles (
+            guild_id INTEGER NOT NULL,
+            role_id INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, role_id)
+        )
+        """,
+        """
+        INSERT OR IGNORE INTO mod_roles (guild_id, role_id)
+        SELECT guild_id, mod_role_id FROM guild_config WHERE mod_role_id IS NOT NULL
+        """,
+    )),
+    # Existing moderator roles keep the full access they had before tiers
+    (11, "Moderator tiers", (
+        "ALTER TABLE mod_roles ADD COLUMN tier TEXT NOT NULL DEFAULT 'admin'",
+    )),
+    (12, "Warning escalation", (
+        "ALTER TABLE guild_config ADD COLUMN warning_expiry_days INTEGER",
+        "ALTER TABLE warnings ADD COLUMN expires_at TIMESTAMP",
+        "CREATE INDEX IF NOT EXISTS idx_warnings_expiry ON warnings(guild_id, expires_at) WHERE active = 1",
+        """
+        CREATE TABLE IF NOT EXISTS escalation_steps (
+            guild_id INTEGER NOT NULL,
+            warnings INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            duration_minutes INTEGER,
+            PRIMARY KEY (guild_id, warnings)
+        )
+        """,
+    )),
+    (13, "Starboard post index", (
+        """
+        CREATE TABLE IF NOT EXISTS board_posts (
+            guild_id INTEGER NOT NULL,
+            board TEXT NOT NULL,
+            source_message_id INTEGER NOT NULL,
+            board_message_id INTEGER NOT NULL,
+            PRIMARY KEY (board, source_message_id)
+        )
+        """,
+    )),
+    (14, "Bot state", (
+        """
+        CREATE TABLE IF NOT EXISTS bot_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+        """,
+    )),
+    (15, "Warning counters", (
+        """
+        CREATE TABLE IF NOT EXISTS warning_counts (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            active INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        )
+        """,
+        # Rebuilt from scratch, so this is also correct where the table already existed
+        "DELETE FROM warning_counts",
+        """
+        INSERT INTO warning_counts (guild_id, user_id, active)
+        SELECT guild_id, user_id, COUNT(*) FROM warnings WHERE active = 1
+        GROUP BY guild_id, user_id
+        """,
+        # Active-warning counts follow every insert and (de)activation
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_warnings_count_insert AFTER INSERT ON warnings
+        WHEN NEW.active = 1 BEGIN
+            INSERT INTO warning_counts (guild_id, user_id, active)
+            VALUES (NEW.guild_id, NEW.user_id, 1)
+            ON CONFLICT(guild_id, user_id) DO UPDATE SET active = active + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_warnings_count_update AFTER UPDATE OF active ON warnings
+        WHEN OLD.active IS NOT NEW.active BEGIN
+            INSERT INTO warning_counts (guild_id, user_id, active)
+            VALUES (NEW.guild_id, NEW.user_id, CASE WHEN NEW.active = 1 THEN 1 ELSE 0 END)
+            ON CONFLICT(guild_id, user_id) DO UPDATE
+            SET active = MAX(active + CASE WHEN NEW.active = 1 THEN 1 ELSE -1 END, 0);
+        END
+        """,
+    )),
+]
+
+class Database:
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or Config.DATABASE_PATH
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+    async def connect(self):
+        """Initialize database connection and bring the schema up to date"""
+        async with aiosqlite.connect(self.db_path) as db:
+            current = await self._get_schema_version(db)
+            latest = MIGRATIONS[-1][0]
+
+            if current == latest:
+                bot_logger.info(f"Database schema is current (version {current})")
+                return
+
+            if current > latest:
+                # The file was written by a newer build — refuse to guess
+                bot_logger.warning(
+                    f"Database schema version {current} is newer than this build "
+                    f"supports ({latest}); skipping migrations"
+                )
+                return
+
+            await self._migrate(db, current)
+            bot_logger.info(f"Database migrated from version {current} to {latest}")
+
+    # ──────────────────────────────────────────────────────────────────
+    # Schema migrations
+    # ──────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    async def _get_schema_version(db: aiosqlite.Connection) -> int:
+        """Return the applied schema version, or 0 for a fresh/legacy database"""
+        try:
+            async with db.execute("SELECT MAX(version) FROM schema_version") as cursor:
+                row = await cursor.fetchone()
+                return row[0] or 0
+        except sqlite3.OperationalError:
+            return 0  # No schema_version table yet
+
+    @staticmethod
+    async def _migrate(db: aiosqlite.Connection, current: int):
+        """Apply every pending migration inside a single transaction"""
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            for version, description, steps in MIGRATIONS:
+                if version <= current:
+                    continue
+                for step in steps:
+                    if callable(step):
+                        await step(db)
+                    else:
+                        await db.execute(step)
+                await db.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (version, description),
+                )
+                bot_logger.info(f"Applied migration {version}: {description}")
+
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+    # ──────────────────────────────────────────────────────────────────
+    # Guild config
+    # ──────────────────────────────────────────────────────────────────
+
+    async def get_guild_config(self, guild_id: int) -> Optional[GuildConfig]:
+        """Get guild configuration, or None if the guild has no row"""
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(
+                "SELECT * FROM guild_config WHERE guild_id = ?",
+                (guild_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return GuildConfig.from_row(row) if row else None
+    
+    async def get_all_guild_configs(self) -> List[GuildConfig]:
+        """Every guild's configuration in one query, for cache warm-up"""
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute("SELECT * FROM guild_config") as cursor:
+                return [GuildConfig.from_row(row) for row in await cursor.fetchall()]
+    
+    async def set_mod_role(self, guild_id: int, role_id: int):
+        """Make role_id the guild's only moderator role, with the top tier"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                INSERT INTO guild_config (guild_id, mod_role_id)
+                VALUES (?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET mod_role_id = ?
+            """, (guild_id, role_id, role_id))
+            await db.execute("DELETE FROM mod_roles WHERE guild_id = ?", (guild_id,))
+            await db.execute(
+                "INSERT INTO mod_roles (guild_id, role_id, tier) VALUES (?, ?, 'admin')", (guild_id, role_id)
+            )
+            await db.commit()
+    
+    async def add_mod_role(self, guild_id: int, role_id: int, tier: str):
+        """Add a moderator role, or change the tier of an existing one"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("INSERT OR IGNORE INTO guild_config (guild_id) VALUES (?)", (guild_id,))
+            await db.execute("""
+                INSERT INTO mod_roles (guild_id, role_id, tier) VALUES (?, ?, ?)
+                ON CONFLICT(guild_id, role_id) DO UPDATE SET tier = excluded.tier
+            """, (guild_id, role_id, tier))
+            await db.commit()
+    
+    async def remove_mod_role(self, guild_id: int, role_id: int) -> bool:
+        """Remove a moderator role; returns False if it wasn't one"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute(
+                "DELETE FROM mod_roles WHERE guild_id = ? AND role_id = ?", (guild_id, role_id)
+            )
+            await db.commit()
+            return cursor.rowcount > 0
+    
+    async def get_mod_roles(self, guild_id: int) -> List[Tuple[int, str]]:
+        """(role_id, tier) for each of a guild's moderator roles"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("SELECT role_id, tier FROM mod_roles WHERE guild_id = ?", (guild_id,)) as cursor:
+                return [(row[0], row[1]) for row in await cursor.fetchall()]
+    
+    async def set_log_channel(self, guild_id: int, channel_id: int):
+        """Set log channel for a guild"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                INSERT INTO guild_config (guild_id, log_channel_id)
+                VALUES (?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET
+                    log_channel_id = excluded.log_channel_id,
+                    -- A webhook only posts to its own channel
+                    log_webhook_id = CASE WHEN log_channel_id IS excluded.log_channel_id
+                                          THEN log_webhook_id END,
+                    log_webhook_token = CASE WHEN log_channel_id IS excluded.log_channel_id
+                                             THEN log_webhook_token END
+            """, (guild_id, channel_id))
+            await db.commit()
+    
+    async def set_log_webhook(self, guild_id: int, webhook_id: Optional[int], token: Optional[str]):
+        """Store (or clear, with None) the webhook used for log delivery"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                UPDATE guild_config SET log_webhook_id = ?, log_webhook_token = ?
+                WHERE guild_id = ?
+            """, (webhook_id, token, guild_id))
+            await db.commit()
+    
+    async def update_log_settings(self, guild_id: int, **settings):
+        """Update log settings for a guild"""
+        valid_settings = {
+            'log_joins', 'log_leaves', 'log_bans', 'log_kicks',
+            'log_warnings', 'log_mutes', 'log_message_deletes', 'log_message_edits',
+            'log_webhook_enabled'
+        }
+        
+        updates = {k: v for k, v in settings.items() if k in valid_settings}
+        if not updates:
+            return
+        
+        set_clause = ", ".join([f"{k} = ?" for k in updates.keys()])
+        values = list(updates.values()) + [guild_id]
+        
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(f"""
+                INSERT INTO guild_config (guild_id, {', '.join(updates.keys())})
+                VALUES (?, {', '.join(['?'] * len(updates))})
+                ON CONFLICT(guild_id) DO UPDATE SET {set_clause}
+            """, [guild_id] + list(updates.values()) + list(updates.values()))
+            await db.commit()
+
+    async def update_automod_settings(self, guild_id: int, **settings):
+        """Update anti-raid / anti-spam settings for a guild"""
+        valid_settings = {
+            'raid_enabled', 'raid_join_threshold', 'raid_window_seconds', 'raid_action',
+            'antispam_enabled', 'antispam_timeout_minutes'
+        }
+        
+        updates = {k: v for k, v in settings.items() if k in valid_settings}
+        if not updates:
+            return
+        
+        set_clause = ", ".join([f"{k} = excluded.{k}" for k in updates.keys()])
+        
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(f"""
+                INSERT INTO guild_config (guild_id, {', '.join(updates.keys())})
+                VALUES (?, {', '.join(['?'] * len(updates))})
+                ON CONFLICT(guild_id) DO UPDATE SET {set_clause}
+            """, [guild_id] + list(updates.values()))
+            await db.commit()
+
+    # ──────────────────────────────────────────────────────────────────
+    # Starboard / Sobboard
+    # ──────────────────────────────────────────────────────────────────
+
+    async def set_starboard_channel(
+        self, guild_id: int, channel_id: Optional[int], threshold: int = 3
+    ):
+        """Set (or clear) the starboard channel and threshold for a guild."""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                """
+                INSERT INTO guild_config (guild_id, starboard_channel_id, starboard_threshold)
+                VALUES (?, ?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET
+                    starboard_channel_id = excluded.starboard_channel_id,
+                    starboard_threshold  = excluded.starboard_threshold
+                """,
+                (guild_id, channel_id, threshold),
+            )
+            await db.commit()
+
+    async def set_sobboard_channel(
+        self, guild_id: int, channel_id: Optional[int], threshold: int = 3
+    ):
+        """Set (or clear) the sobboard channel and threshold for a guild."""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                """
+                INSERT INTO guild_config (guild_id, sobboard_channel_id, sobboard_threshold)
+                VALUES (?, ?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET
+                    sobboard_channel_id = excluded.sobboard_channel_id,
+                    sobboard_threshold  = excluded.sobboard_threshold
+                """,
+                (guild_id, channel_id, threshold),
+            )
+            await db.commit()
+
+    # ──────────────────────────────────────────────────────────────────
+    # Bot state
+    # ──────────────────────────────────────────────────────────────────
+
+    async def get_state(self, key: str) -> Optional[str]:
+        """Read a persisted value (e.g. the last synced command tree hash)"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("SELECT value FROM bot_state WHERE key = ?", (key,)) as cursor:
+                row = await cursor.fetchone()
+                return row[0] if row else None
+
+    async def set_state(self, key: str, value: str):
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                INSERT INTO bot_state (key, value) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+            """, (key, value))
+            await db.commit()
+
+    async def delete_state(self, key: str):
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("DELETE FROM bot_state WHERE key = ?", (key,))
+            await db.commit()
+
+    # ──────────────────────────────────────────────────────────────────
+    # Starboard / sobboard posts
+    # ──────────────────────────────────────────────────────────────────
+
+    async def add_board_post(self, guild_id: int, board: str, source_message_id: int,
+                             board_message_id: int):
+        """Remember which board message mirrors a source message"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                INSERT OR REPLACE INTO board_posts (guild_id, board, source_message_id, board_message_id)
+                VALUES (?, ?, ?, ?)
+            """, (guild_id, board, source_message_id, board_message_id))
+            await db.commit()
+
+    async def get_board_posts(self) -> List[Tuple[int, str, int, int]]:
+        """(guild_id, board, source_message_id, board_message_id) for every post"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT guild_id, board, source_message_id, board_message_id FROM board_posts"
+            ) as cursor:
+                return [tuple(row) for row in await cursor.fetchall()]
+
+    # ──────────────────────────────────────────────────────────────────
+    # Moderation actions & warnings
+    # ──────────────────────────────────────────────────────────────────
+
+    async def log_action(self, guild_id: int, user_id: int, moderator_id: int,
+                        action: str, reason: Optional[str] = None):
+        """Log a moderation action"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                INSERT INTO actions (guild_id, user_id, moderator_id, action, reason)
+                VALUES (?, ?, ?, ?, ?)
+            """, (guild_id, user_id, moderator_id, action, reason))
+            await db.commit()
+    
+    async def log_actions(self, actions: List[Tuple[int, int, int, str, Optional[str]]]):
+        """Log several moderation actions in one transaction.
+
+        Each entry is (guild_id, user_id, moderator_id, action, reason).
+        """
+        if not actions:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany("""
+                INSERT INTO actions (guild_id, user_id, moderator_id, action, reason)
+                VALUES (?, ?, ?, ?, ?)
+            """, actions)
+            await db.commit()
+    
+    async def add_warning(self, guild_id: int, user_id: int, moderator_id: int,
+                         reason: Optional[str] = None) -> Tuple[dict, int]:
+        """Add a warning to a user.
+        
+        Returns the stored warning row and the user's new active-warning
+        count, read in the same transaction from the trigger-maintained
+        warning_counts table.
+        """
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(f"""
+                INSERT INTO warnings (guild_id, user_id, moderator_id, reason, expires_at)
+                VALUES (?, ?, ?, ?, {_WARNING_EXPIRY})
+                RETURNING *
+            """, (guild_id, user_id, moderator_id, reason, guild_id)) as cursor:
+                warning = dict(await cursor.fetchone())
+            async with db.execute(
+                "SELECT active FROM warning_counts WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+            ) as cursor:
+                count = (await cursor.fetchone())[0]
+            await db.commit()
+            return warning, count
+    
+    async def add_warnings(self, warnings: List[Tuple[int, int, int, Optional[str]]]):
+        """Add several warnings in one transaction.
+
+        Each entry is (guild_id, user_id, moderator_id, reason).
+        """
+        if not warnings:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany(f"""
+                INSERT INTO warnings (guild_id, user_id, moderator_id, reason, expires_at)
+                VALUES (?, ?, ?, ?, {_WARNING_EXPIRY})
+            """, [(*warning, warning[0]) for warning in warnings])
+            await db.commit()
+    
+    async def get_warnings(self, guild_id: int, user_id: int) -> List[dict]:
+        """Get all active warnings for a user"""
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute("""
+                SELECT * FROM warnings 
+                WHERE guild_id = ? AND user_id = ? AND active = 1
+                ORDER BY timestamp DESC, id DESC
+            """, (guild_id, user_id)) as cursor:
+                rows = await cursor.fetchall()
+                return [dict(row) for row in rows]
+    
+    async def get_warning_counts(self, guild_id: int, user_ids: List[int]) -> Dict[int, int]:
+        """user_id -> active warnings for several users"""
+        if not user_ids:
+            return {}
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(f"""
+                SELECT user_id, active FROM warning_counts
+                WHERE guild_id = ? AND user_id IN ({', '.join('?' * len(user_ids))})
+            """, (guild_id, *user_ids)) as cursor:
+                return {row[0]: row[1] for row in await cursor.fetchall()}
+    
+    async def expire_warnings(self, guild_id: int) -> List[int]:
+        """Deactivate a guild's warnings that are past expiry; returns the affected user IDs"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("""
+                UPDATE warnings SET active = 0
+                WHERE guild_id = ? AND active = 1 AND expires_at <= ?
+                RETURNING user_id
+            """, (guild_id, _to_timestamp(datetime.now(timezone.utc)))) as cursor:
+                user_ids = {row[0] for row in await cursor.fetchall()}
+            await db.commit()
+            return list(user_ids)
+    
+    async def next_warning_expiry(self, guild_id: int) -> Optional[datetime]:
+        """When the guild's next active warning expires, if any will"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("""
+                SELECT MIN(expires_at) FROM warnings
+                WHERE guild_id = ? AND active = 1 AND expires_at IS NOT NULL
+            """, (guild_id,)) as cursor:
+                row = await cursor.fetchone()
+                return parse_timestamp(row[0]) if row[0] else None
+    
+    async def set_warning_expiry(self, guild_id: int, days: Optional[int]):
+        """Set (or clear, with None) how long warnings stay active.
+
+        Active warnings are re-dated from when they were given, so the new
+        period applies to them as well as to future warnings.
+        """
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                INSERT INTO guild_config (guild_id, warning_expiry_days) VALUES (?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET warning_expiry_days = excluded.warning_expiry_days
+            """, (guild_id, days))
+            await db.execute("""
+                UPDATE warnings
+                SET expires_at = CASE WHEN ? IS NULL THEN NULL ELSE datetime(timestamp, '+' || ? || ' days') END
+                WHERE guild_id = ? AND active = 1
+            """, (days, days, guild_id))
+            await db.commit()
+    
+    async def clear_warnings(self, guild_id: int, user_id: int):
+        """Clear all warnings for a user"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                UPDATE warnings SET active = 0
+                WHERE guild_id = ? AND user_id = ?
+            """, (guild_id, user_id))
+            await db.commit()
+    
+    async def remove_warning(self, guild_id: int, warning_id: int) -> Optional[int]:
+        """Deactivate one of a guild's active warnings; returns its user ID, or None if not found"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("""
+                UPDATE warnings SET active = 0
+                WHERE id = ? AND guild_id = ? AND active = 1
+                RETURNING user_id
+            """, (warning_id, guild_id)) as cursor:
+                row = await cursor.fetchone()
+            await db.commit()
+            return row[0] if row else None
+    
+    async def get_mod_stats(self, guild_id: int, days: int) -> dict:
+        """Moderation statistics for the last ``days`` days, read from the rollup tables.
+        
+        Cost depends on the number of days, moderators and distinct users,
+        not on how many actions the guild has ever logged.
+        """
+        since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("""
+                SELECT moderator_id, SUM(count) FROM action_daily
+                WHERE guild_id = ? AND day >= ?
+                GROUP BY moderator_id ORDER BY 2 DESC LIMIT 10
+            """, (guild_id, since)) as cursor:
+                by_moderator = await cursor.fetchall()
+            
+            async with db.execute("""
+                SELECT action, SUM(count) FROM action_daily
+                WHERE guild_id = ? AND day >= ?
+                GROUP BY action ORDER BY 2 DESC
+            """, (guild_id, since)) as cursor:
+                by_action = await cursor.fetchall()
+            
+            async with db.execute("""
+                SELECT day, SUM(count) FROM action_daily
+                WHERE guild_id = ? AND day >= ?
+                GROUP BY day ORDER BY day
+            """, (guild_id, since)) as cursor:
+                by_day = await cursor.fetchall()
+            
+            # All-time: users warned at all, and users warned more than once
+            async with db.execute("""
+                SELECT COUNT(*), COALESCE(SUM(warnings >= 2), 0) FROM user_stats
+                WHERE guild_id = ? AND warnings > 0
+            """, (guild_id,)) as cursor:
+                warned, repeat = await cursor.fetchone()
+            
+            async with db.execute("""
+                SELECT user_id, actions, warnings FROM user_stats
+                WHERE guild_id = ?
+                ORDER BY actions + warnings DESC LIMIT 5
+            """, (guild_id,)) as cursor:
+                top_offenders = await cursor.fetchall()
+        
+        return {
+            'by_moderator': by_moderator,
+            'by_action': by_action,
+            'by_day': by_day,
+            'warned_users': warned,
+            'repeat_warned_users': repeat,
+            'top_offenders': top_offenders,
+        }
+    
+    # Columns yielded by iter_moderation_history, in order
+    HISTORY_EXPORT_COLUMNS = ('type', 'id', 'user_id', 'moderator_id', 'action', 'reason', 'timestamp', 'active')
+    
+    async def iter_moderation_history(self, guild_id: int, chunk_size: int = 1000) -> AsyncIterator[List[tuple]]:
+        """Stream a guild's actions and warnings in chunks of rows.
+        
+        Rows are read from the cursor with fetchmany, so only one chunk is in
+        memory at a time however large the history is.
+        """
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("""
+                SELECT 'action', id, user_id, moderator_id, action, reason, timestamp, NULL
+                FROM actions WHERE guild_id = ?
+                UNION ALL
+                SELECT 'warning', id, user_id, moderator_id, 'warn', reason, timestamp, active
+                FROM warnings WHERE guild_id = ?
+            """, (guild_id, guild_id)) as cursor:
+                while True:
+                    rows = await cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+    
+    async def get_user_actions(self, guild_id: int, user_id: int, 
+                              action: Optional[str] = None) -> List[dict]:
+        """Get all actions for a user"""
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            if action:
+                query = """
+                    SELECT * FROM actions 
+                    WHERE guild_id = ? AND user_id = ? AND action = ?
+                    ORDER BY timestamp DESC
+                """
+                params = (guild_id, user_id, action)
+            else:
+                query = """
+                    SELECT * FROM actions 
+                    WHERE guild_id = ? AND user_id = ?
+                    ORDER BY timestamp DESC
+                """
+                params = (guild_id, user_id)
+            
+            async with db.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+                return [dict(row) for row in rows]
+
+    # ──────────────────────────────────────────────────────────────────
+    # Escalation ladders
+    # ──────────────────────────────────────────────────────────────────
+
+    async def set_escalation_step(self, guild_id: int, warnings: int, action: str,
+                                  duration_minutes: Optional[int]):
+        """Add the step for a warning count, or replace the existing one"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                INSERT INTO escalation_steps (guild_id, warnings, action, duration_minutes)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(guild_id, warnings) DO UPDATE SET
+                    action = excluded.action,
+                    duration_minutes = excluded.duration_minutes
+            """, (guild_id, warnings, action, duration_minutes))
+            await db.commit()
+
+    async def remove_escalation_step(self, guild_id: int, warnings: int) -> bool:
+        """Remove the step for a warning count; returns False if there was none"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute(
+                "DELETE FROM escalation_steps WHERE guild_id = ? AND warnings = ?", (guild_id, warnings)
+            )
+            await db.commit()
+            return cursor.rowcount > 0
+
+    async def get_escalation_steps(self, guild_id: int) -> List[Tuple[int, str, Optional[int]]]:
+        """(warnings, action, duration_minutes) for each step, lowest count first"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("""
+                SELECT warnings, action, duration_minutes FROM escalation_steps
+                WHERE guild_id = ? ORDER BY warnings
+            """, (guild_id,)) as cursor:
+                return [tuple(row) for row in await cursor.fetchall()]
+
+    # ──────────────────────────────────────────────────────────────────
+    # Temporary bans
+    # ──────────────────────────────────────────────────────────────────
+
+    async def add_temp_ban(self, guild_id: int, user_id: int, expires_at: datetime,
+                          reason: Optional[str] = None) -> int:
+        """Record a temporary ban, replacing any pending one for the same user"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                DELETE FROM temp_bans WHERE guild_id = ? AND user_id = ?
+            """, (guild_id, user_id))
+            cursor = await db.execute("""
+                INSERT INTO temp_bans (guild_id, user_id, expires_at, reason)
+                VALUES (?, ?, ?, ?)
+            """, (guild_id, user_id, _to_timestamp(expires_at), reason))
+            await db.commit()
+            return cursor.lastrowid
+
+    async def get_temp_bans(self) -> List[dict]:
+        """Get every pending temporary ban, soonest first"""
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute("""
+                SELECT * FROM temp_bans ORDER BY expires_at
+            """) as cursor:
+                rows = await cursor.fetchall()
+                return [dict(row) for row in rows]
+
+    async def remove_temp_bans(self, ban_ids: List[int]):
+        """Delete temporary ban records by ID"""
+        if not ban_ids:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany(
+                "DELETE FROM temp_bans WHERE id = ?",
+                [(ban_id,) for ban_id in ban_ids]
+            )
+            await db.commit()
+
+    async def cancel_temp_ban(self, guild_id: int, user_id: int):
+        """Drop any pending temporary ban for a user"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                DELETE FROM temp_bans WHERE guild_id = ? AND user_id = ?
+            """, (guild_id, user_id))
+            await db.commit()
+
+    # ──────────────────────────────────────────────────────────────────
+    # Scheduled jobs
+    # ──────────────────────────────────────────────────────────────────
+
+    async def add_scheduled_job(self, kind: str, guild_id: int, key: Optional[str],
+                                payload: str, run_at: datetime) -> int:
+        """Persist a job, replacing any pending job with the same kind/guild/key"""
+        async with aiosqlite.connect(self.db_path) as db:
+            if key is not None:
+                await db.execute("""
+                    DELETE FROM scheduled_jobs
+                    WHERE kind = ? AND guild_id = ? AND job_key = ?
+                """, (kind, guild_id, key))
+            cursor = await db.execute("""
+                INSERT INTO scheduled_jobs (kind, guild_id, job_key, payload, run_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (kind, guild_id, key, payload, _to_timestamp(run_at)))
+            await db.commit()
+            return cursor.lastrowid
+
+    async def get_scheduled_jobs(self) -> List[dict]:
+        """Get every pending job, soonest first"""
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute("""
+                SELECT * FROM scheduled_jobs ORDER BY run_at
+            """) as cursor:
+                rows = await cursor.fetchall()
+                return [dict(row) for row in rows]
+
+    async def remove_scheduled_job(self, job_id: int):
+        """Delete a completed or abandoned job"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("DELETE FROM scheduled_jobs WHERE id = ?", (job_id,))
+            await db.commit()
+
+    async def cancel_scheduled_job(self, kind: str, guild_id: int, key: str):
+        """Delete a pending keyed job"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                DELETE FROM scheduled_jobs
+                WHERE kind = ? AND guild_id = ? AND job_key = ?
+            """, (kind, guild_id, key))
+            await db.commit()
+
+    async def reschedule_job(self, job_id: int, run_at: datetime, attempts: int):
+        """Move a failed job to its next retry time"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                UPDATE scheduled_jobs SET run_at = ?, attempts = ?
+                WHERE id = ?
+            """, (_to_timestamp(run_at), attempts, job_id))
+            await db.commit()
+
+    # ──────────────────────────────────────────────────────────────────
+    # Word / regex filters
+    # ──────────────────────────────────────────────────────────────────
+
+    async def add_filter_rule(self, guild_id: int, kind: str, pattern: str,
+                              created_by: int) -> int:
+        """Add a filter rule for a guild"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                INSERT INTO filter_rules (guild_id, kind, pattern, created_by)
+                VALUES (?, ?, ?, ?)
+            """, (guild_id, kind, pattern, created_by))
+            await db.commit()
+            return cursor.lastrowid
+
+    async def remove_filter_rule(self, guild_id: int, rule_id: int) -> bool:
+        """Remove a filter rule; scoped to the guild so IDs can't cross servers"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                DELETE FROM filter_rules WHERE id = ? AND guild_id = ?
+            """, (rule_id, guild_id))
+            await db.commit()
+            return cursor.rowcount > 0
+
+    async def get_filter_rules(self, guild_id: int) -> List[dict]:
+        """Get all filter rules for a guild"""
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute("""
+                SELECT * FROM filter_rules WHERE guild_id = ? ORDER BY id
+            """, (guild_id,)) as cursor:
+                rows = await cursor.fetchall()
+                return [dict(row) for row in rows]
+
+    async def add_filter_hits(self, hits: List[Tuple[int, int]]):
+        """Add to rule hit counters; each entry is (count, rule_id)"""
+        if not hits:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany(
+                "UPDATE filter_rules SET hits = hits + ? WHERE id = ?", hits
+            )
+            await db.commit()
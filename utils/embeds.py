@@ -75,6 +75,7 @@ class EmbedFactory:
         """Create a moderation action embed"""
         action_emojis = {
             'ban': '🔨',
+            'tempban': '⏳',
             'kick': '👢',
             'mute': '🔇',
             'unmute': '🔊',
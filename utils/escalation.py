@@ -0,0 +1,39 @@
+"""
+Per-guild escalation ladders: automatic actions at set warning counts
+"""
+from typing import Dict, Iterable, Optional, Tuple
+
+ESCALATION_ACTIONS = ('timeout', 'kick', 'tempban', 'ban')
+# Actions that need a duration
+TIMED_ACTIONS = ('timeout', 'tempban')
+# Discord caps timeouts at 28 days
+MAX_TIMEOUT_MINUTES = 28 * 24 * 60
+
+
+def format_minutes(minutes: int) -> str:
+    """Render a duration in the largest unit that divides it (e.g. 1440 -> 1d)"""
+    for suffix, size in (('w', 10080), ('d', 1440), ('h', 60)):
+        if minutes % size == 0:
+            return f"{minutes // size}{suffix}"
+    return f"{minutes}m"
+
+
+class EscalationStep:
+    """What happens when a member reaches ``warnings`` active warnings"""
+
+    __slots__ = ('warnings', 'action', 'minutes')
+
+    def __init__(self, warnings: int, action: str, minutes: Optional[int] = None):
+        self.warnings = warnings
+        self.action = action
+        self.minutes = minutes
+
+    def describe(self) -> str:
+        if self.minutes:
+            return f"{self.action} ({format_minutes(self.minutes)})"
+        return self.action
+
+
+def compile_ladder(rows: Iterable[Tuple[int, str, Optional[int]]]) -> Dict[int, EscalationStep]:
+    """Turn (warnings, action, duration_minutes) rows into warnings -> step"""
+    return {warnings: EscalationStep(warnings, action, minutes) for warnings, action, minutes in rows}
@@ -0,0 +1,46 @@
+"""
+Streaming, gzip-compressed export of a guild's moderation history
+"""
+import asyncio
+import csv
+import gzip
+import json
+import os
+import tempfile
+from typing import List, Sequence, Tuple
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+
+def _write_chunk(stream, fmt: str, columns: Sequence[str], rows: List[tuple]):
+    if fmt == 'csv':
+        csv.writer(stream).writerows(rows)
+    else:
+        stream.writelines(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+
+
+async def export_history(db, guild_id: int, fmt: str) -> Tuple[str, int]:
+    """Write a guild's actions and warnings to a gzip temp file.
+
+    Rows arrive from the database a chunk at a time and each chunk is
+    encoded and compressed in a worker thread before the next is read, so
+    memory stays flat regardless of row count. Returns (path, row count);
+    the caller is responsible for deleting the file.
+    """
+    columns = db.HISTORY_EXPORT_COLUMNS
+    fd, path = tempfile.mkstemp(prefix=f"modlog-{guild_id}-", suffix=f".{fmt}.gz")
+    os.close(fd)
+
+    count = 0
+    try:
+        with gzip.open(path, 'wt', encoding='utf-8', newline='') as stream:
+            if fmt == 'csv':
+                csv.writer(stream).writerow(columns)
+            async for rows in db.iter_moderation_history(guild_id):
+                await asyncio.to_thread(_write_chunk, stream, fmt, columns, rows)
+                count += len(rows)
+    except BaseException:
+        os.remove(path)
+        raise
+
+    return path, count
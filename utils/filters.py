@@ -0,0 +1,215 @@
+"""
+Compiled per-guild word / regex filters
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+FILTER_KINDS = ('word', 'regex')
+
+MAX_PATTERN_LENGTH = 200
+# Rules per guild. Every message is matched on the event loop, and rules the
+# token index can't serve (regexes, punctuated words) cost time per rule
+# per character, so they get a lower cap of their own.
+MAX_RULES = 250
+MAX_REGEX_RULES = 25
+
+_REPEATS = tuple(
+    getattr(sre_parse, name) for name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+    if hasattr(sre_parse, name)
+)
+
+_BACKREFERENCE_RE = re.compile(r'\\[1-9]|\(\?P=')
+_TOKEN_RE = re.compile(r'\w+')
+_PLAIN_WORDS_RE = re.compile(r'^\w+(?: \w+)*$')
+
+# (rule_id, kind, pattern)
+FilterRule = Tuple[int, str, str]
+
+
+def validate_pattern(kind: str, pattern: str) -> Optional[str]:
+    """Return why a rule can't be used, or None if it's valid"""
+    if kind not in FILTER_KINDS:
+        return f"Kind must be one of: {', '.join(FILTER_KINDS)}"
+    if not pattern or len(pattern) > MAX_PATTERN_LENGTH:
+        return f"Pattern must be between 1 and {MAX_PATTERN_LENGTH} characters."
+    if kind == 'regex':
+        try:
+            compiled = re.compile(pattern)
+            # Must also compile as an alternative inside the merged pattern
+            re.compile(f"(?P<r0>{pattern})|x")
+        except re.error as e:
+            return f"Invalid regex: {e}"
+        # Rules are merged into one pattern, so group references would point at the wrong group
+        if compiled.groupindex or _BACKREFERENCE_RE.search(pattern):
+            return "Named groups and backreferences are not supported."
+        if _nested_quantifier(sre_parse.parse(pattern)):
+            return "Nested repetition like `(a+)+` can take exponential time and is not supported."
+    return None
+
+
+def _nested_quantifier(parsed, repeated: bool = False) -> bool:
+    """True if a repeat that can match more than once sits inside another one"""
+    for op, av in parsed:
+        if op in _REPEATS:
+            _, most, sub = av
+            if most > 1 and repeated:
+                return True
+            if _nested_quantifier(sub, repeated or most > 1):
+                return True
+        else:
+            for child in _subpatterns(av):
+                if _nested_quantifier(child, repeated):
+                    return True
+    return False
+
+
+def _subpatterns(av):
+    """Subpatterns nested in a parsed node's arguments (groups, branches, lookarounds)"""
+    if isinstance(av, sre_parse.SubPattern):
+        yield av
+    elif isinstance(av, (tuple, list)):
+        for item in av:
+            yield from _subpatterns(item)
+
+
+def limit_error(compiled: "CompiledFilter", kind: str, pattern: str) -> Optional[str]:
+    """Return why ``compiled`` can't take another rule, or None if it can"""
+    if len(compiled) >= MAX_RULES:
+        return f"A server can have at most {MAX_RULES} filter rules."
+    if _uses_regex(kind, pattern) and compiled.regex_rules >= MAX_REGEX_RULES:
+        return (
+            f"A server can have at most {MAX_REGEX_RULES} regex rules (including words with "
+            f"punctuation). Plain words and phrases can still be added."
+        )
+    return None
+
+
+def _tokens(pattern: str) -> Optional[Tuple[str, ...]]:
+    """Token tuple for a word rule made only of word characters, else None"""
+    normalized = " ".join(pattern.casefold().split())
+    if _PLAIN_WORDS_RE.match(normalized):
+        return tuple(normalized.split(" "))
+    return None
+
+
+def _uses_regex(kind: str, pattern: str) -> bool:
+    """Whether a rule goes into the merged regex rather than the token index"""
+    return kind != 'word' or _tokens(pattern) is None
+
+
+def _fragment(kind: str, pattern: str) -> str:
+    if kind == 'word':
+        return rf'(?<!\w){re.escape(pattern)}(?!\w)'
+    return pattern
+
+
+class CompiledFilter:
+    """A guild's filter rules compiled for a single pass over each message.
+
+    Word and phrase rules made of plain word characters go into a token
+    index (first token -> [(remaining tokens, rule_id)]), so matching them
+    is one tokenisation plus a dict lookup per token, independent of the
+    number of rules. Everything else — regexes and words containing
+    punctuation — is merged into one case-insensitive regex with a named
+    alternative ``(?P<r{id}>...)`` per rule.
+
+    Instances are immutable: with_rule/without_rule return a copy that
+    reuses every other rule's compiled piece and only rebuilds the part the
+    changed rule lives in.
+    """
+
+    __slots__ = ('_rules', '_words', '_fragments', '_pattern')
+
+    def __init__(self, rules: Iterable[FilterRule] = ()):
+        self._rules: Dict[int, Tuple[str, str]] = {}
+        self._words: Dict[str, List[Tuple[Tuple[str, ...], int]]] = {}
+        self._fragments: Dict[int, str] = {}
+        for rule_id, kind, pattern in rules:
+            self._index(rule_id, kind, pattern)
+        self._pattern = self._compile()
+
+    def _index(self, rule_id: int, kind: str, pattern: str):
+        self._rules[rule_id] = (kind, pattern)
+        tokens = _tokens(pattern) if kind == 'word' else None
+        if tokens:
+            self._words.setdefault(tokens[0], []).append((tokens[1:], rule_id))
+        else:
+            self._fragments[rule_id] = _fragment(kind, pattern)
+
+    def _compile(self) -> Optional[re.Pattern]:
+        if not self._fragments:
+            return None
+        combined = "|".join(
+            f"(?P<r{rule_id}>{fragment})" for rule_id, fragment in self._fragments.items()
+        )
+        return re.compile(combined, re.IGNORECASE)
+
+    def _copy(self) -> "CompiledFilter":
+        clone = CompiledFilter.__new__(CompiledFilter)
+        clone._rules = dict(self._rules)
+        clone._words = {token: list(entries) for token, entries in self._words.items()}
+        clone._fragments = dict(self._fragments)
+        clone._pattern = self._pattern
+        return clone
+
+    def with_rule(self, rule_id: int, kind: str, pattern: str) -> "CompiledFilter":
+        """Copy of this filter with one rule added"""
+        clone = self._copy()
+        clone._index(rule_id, kind, pattern)
+        if rule_id in clone._fragments:
+            clone._pattern = clone._compile()
+        return clone
+
+    def without_rule(self, rule_id: int) -> "CompiledFilter":
+        """Copy of this filter with one rule removed"""
+        clone = self._copy()
+        if clone._rules.pop(rule_id, None) is None:
+            return clone
+        if clone._fragments.pop(rule_id, None) is not None:
+            clone._pattern = clone._compile()
+        else:
+            for token, entries in list(clone._words.items()):
+                entries[:] = [entry for entry in entries if entry[1] != rule_id]
+                if not entries:
+                    del clone._words[token]
+        return clone
+
+    def __len__(self):
+        return len(self._rules)
+
+    @property
+    def regex_rules(self) -> int:
+        """Rules matched through the merged regex"""
+        return len(self._fragments)
+
+    def rules(self) -> List[FilterRule]:
+        return [(rule_id, kind, pattern) for rule_id, (kind, pattern) in self._rules.items()]
+
+    def match(self, text: str) -> Optional[int]:
+        """Return the ID of a rule matching ``text``, or None"""
+        if not text:
+            return None
+
+        if self._words:
+            words = self._words
+            tokens = _TOKEN_RE.findall(text.casefold())
+            for index, token in enumerate(tokens):
+                entries = words.get(token)
+                if entries is None:
+                    continue
+                for rest, rule_id in entries:
+                    if not rest or tuple(tokens[index + 1:index + 1 + len(rest)]) == rest:
+                        return rule_id
+
+        if self._pattern is not None:
+            found = self._pattern.search(text)
+            if found is not None:
+                # The rule's own group closes last, so lastgroup is always the rule name
+                return int(found.lastgroup[1:])
+
+        return None
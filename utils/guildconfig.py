@@ -0,0 +1,138 @@
+"""
+Typed, immutable guild_config record
+"""
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Column -> value for a guild without a row, mirroring the schema defaults
+_DEFAULTS: Dict[str, Any] = {
+    'guild_id': None,
+    'mod_role_id': None,
+    'log_channel_id': None,
+    # None falls back to Config.PREFIX; stored rows carry the column default
+    'prefix': None,
+    'log_joins': 1,
+    'log_leaves': 1,
+    'log_bans': 1,
+    'log_kicks': 1,
+    'log_warnings': 1,
+    'log_mutes': 1,
+    'log_message_deletes': 0,
+    'log_message_edits': 0,
+    'created_at': None,
+    'starboard_channel_id': None,
+    'starboard_threshold': 3,
+    'sobboard_channel_id': None,
+    'sobboard_threshold': 3,
+    'raid_enabled': 0,
+    'raid_join_threshold': 10,
+    'raid_window_seconds': 10,
+    'raid_action': 'alert',
+    'antispam_enabled': 0,
+    'antispam_timeout_minutes': 10,
+    'log_webhook_enabled': 0,
+    'log_webhook_id': None,
+    'log_webhook_token': None,
+    'warning_expiry_days': None,
+}
+
+
+class GuildConfig:
+    """One guild's settings.
+
+    Instances are shared through the cache, so they are read-only: use
+    replace() to get a changed copy. Columns this build doesn't know
+    about (a newer schema) are ignored.
+    """
+
+    __slots__ = tuple(_DEFAULTS)
+
+    guild_id: int
+    mod_role_id: Optional[int]
+    log_channel_id: Optional[int]
+    prefix: Optional[str]
+    log_joins: int
+    log_leaves: int
+    log_bans: int
+    log_kicks: int
+    log_warnings: int
+    log_mutes: int
+    log_message_deletes: int
+    log_message_edits: int
+    created_at: Optional[str]
+    starboard_channel_id: Optional[int]
+    starboard_threshold: int
+    sobboard_channel_id: Optional[int]
+    sobboard_threshold: int
+    raid_enabled: int
+    raid_join_threshold: int
+    raid_window_seconds: int
+    raid_action: str
+    antispam_enabled: int
+    antispam_timeout_minutes: int
+    log_webhook_enabled: int
+    log_webhook_id: Optional[int]
+    log_webhook_token: Optional[str]
+    warning_expiry_days: Optional[int]
+
+    def __init__(self, guild_id: int, **values):
+        unknown = values.keys() - _DEFAULTS.keys()
+        if unknown:
+            raise TypeError(f"Unknown guild config field(s): {', '.join(sorted(unknown))}")
+        for name, default in _DEFAULTS.items():
+            object.__setattr__(self, name, values.get(name, default))
+        object.__setattr__(self, 'guild_id', guild_id)
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "GuildConfig":
+        """Build from a guild_config row fetched with row_factory = sqlite3.Row"""
+        setters, missing = _row_plan(tuple(row.keys()))
+        config = object.__new__(cls)
+        for setter, default in missing:
+            setter(config, default)
+        for setter, value in zip(setters, row):
+            if setter is not None:
+                setter(config, value)
+        return config
+
+    def replace(self, **changes) -> "GuildConfig":
+        """A copy with ``changes`` applied"""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return GuildConfig(**values)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GuildConfig is immutable; use replace()")
+
+    def __delattr__(self, name):
+        raise AttributeError("GuildConfig is immutable; use replace()")
+
+    def __eq__(self, other):
+        if not isinstance(other, GuildConfig):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"<GuildConfig guild_id={self.guild_id}>"
+
+
+_Setter = Callable[[GuildConfig, Any], None]
+# Column tuple -> (slot setter per column, (setter, default) per absent field)
+_row_plans: Dict[Tuple[str, ...], Tuple[List[Optional[_Setter]], List[Tuple[_Setter, Any]]]] = {}
+
+
+def _row_plan(columns: Tuple[str, ...]):
+    """How to fill a GuildConfig from rows with these columns, worked out once per column layout.
+
+    Writing through the slot descriptors directly skips the immutability
+    check and the per-field name lookups.
+    """
+    plan = _row_plans.get(columns)
+    if plan is None:
+        slots = GuildConfig.__dict__
+        setters = [slots[name].__set__ if name in _DEFAULTS else None for name in columns]
+        missing = [(slots[name].__set__, default) for name, default in _DEFAULTS.items() if name not in columns]
+        plan = _row_plans[columns] = (setters, missing)
+    return plan
@@ -0,0 +1,88 @@
+"""
+Resolved per-guild state shared by every cog
+"""
+from typing import Dict, Optional
+
+import discord
+
+from config import Config
+from utils.guildconfig import GuildConfig
+
+
+class GuildState:
+    """A guild's config with its channels resolved and log settings as booleans"""
+
+    __slots__ = (
+        'guild_id', 'prefix', 'config',
+        'log_channel', 'starboard_channel', 'starboard_threshold',
+        'sobboard_channel', 'sobboard_threshold',
+        'log_joins', 'log_leaves', 'log_bans', 'log_kicks', 'log_warnings',
+        'log_mutes', 'log_message_deletes', 'log_message_edits',
+    )
+
+    def __init__(self, guild: discord.Guild, config: GuildConfig):
+        self.guild_id = guild.id
+        self.prefix = config.prefix or Config.PREFIX
+        # The record itself, for settings read too rarely to resolve up front
+        self.config = config
+
+        self.log_channel = self._channel(guild, config.log_channel_id)
+        self.starboard_channel = self._channel(guild, config.starboard_channel_id)
+        self.starboard_threshold = config.starboard_threshold
+        self.sobboard_channel = self._channel(guild, config.sobboard_channel_id)
+        self.sobboard_threshold = config.sobboard_threshold
+
+        self.log_joins = bool(config.log_joins)
+        self.log_leaves = bool(config.log_leaves)
+        self.log_bans = bool(config.log_bans)
+        self.log_kicks = bool(config.log_kicks)
+        self.log_warnings = bool(config.log_warnings)
+        self.log_mutes = bool(config.log_mutes)
+        self.log_message_deletes = bool(config.log_message_deletes)
+        self.log_message_edits = bool(config.log_message_edits)
+
+    @staticmethod
+    def _channel(guild: discord.Guild, channel_id: Optional[int]) -> Optional[discord.abc.GuildChannel]:
+        return guild.get_channel(channel_id) if channel_id else None
+
+    def log_channel_for(self, setting: str) -> Optional[discord.abc.GuildChannel]:
+        """The log channel if ``setting`` (e.g. 'log_joins') is enabled, else None"""
+        return self.log_channel if getattr(self, setting) else None
+
+    def uses_channel(self, channel_id: int) -> bool:
+        return any(
+            channel is not None and channel.id == channel_id
+            for channel in (self.log_channel, self.starboard_channel, self.sobboard_channel)
+        )
+
+
+class GuildStateRegistry:
+    """guild_id -> GuildState, built on first use from the cached config row.
+
+    Records hold channel objects rather than IDs, so events don't repeat
+    the config lookup and get_channel calls. A record is dropped whenever
+    its config is written, a channel it references is deleted, or the
+    guild object is replaced, and rebuilt on the next lookup.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._states: Dict[int, GuildState] = {}
+
+    def __len__(self):
+        return len(self._states)
+
+    async def get(self, guild: discord.Guild) -> GuildState:
+        state = self._states.get(guild.id)
+        if state is None:
+            config = await self.bot.get_guild_config(guild.id)
+            state = self._states[guild.id] = GuildState(guild, config)
+        return state
+
+    def invalidate(self, guild_id: int):
+        self._states.pop(guild_id, None)
+
+    def channel_deleted(self, channel: discord.abc.GuildChannel):
+        state = self._states.get(channel.guild.id)
+        if state is not None and state.uses_channel(channel.id):
+            del self._states[channel.guild.id]
@@ -0,0 +1,219 @@
+"""
+Coalescing outbound queue for log-channel embeds
+"""
+import asyncio
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import discord
+
+from utils.bulk import retry_after
+from utils.logger import bot_logger
+
+# Discord limits per message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+WEBHOOK_NAME = "Moderation Logs"
+
+
+class LogSender:
+    """Per-channel log queues that pack embeds into as few messages as possible.
+
+    enqueue() never blocks the caller. The first embed for a channel starts
+    a flush task that waits FLUSH_DELAY so a burst can accumulate, then
+    sends up to 10 embeds per message until the queue is empty. Rate-limited
+    sends are retried after the server's retry-after; anything that still
+    can't be delivered is counted in ``dropped`` rather than lost silently.
+
+    Guilds with log_webhook_enabled are delivered through a bot-managed
+    webhook instead, which has its own rate-limit bucket and so doesn't
+    compete with command replies. The webhook is created on first use,
+    its ID and token are stored in guild_config, and if it is deleted
+    delivery falls back to channel.send. When the log channel changes the
+    old webhook is deleted rather than left behind.
+    """
+
+    # Time a burst has to accumulate before the first send
+    FLUSH_DELAY = 0.5
+    # Embeds held per channel before the oldest are dropped
+    MAX_QUEUE = 250
+    # Send attempts per message when Discord answers with a 429
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._queues: Dict[int, Deque[discord.Embed]] = {}
+        self._channels: Dict[int, discord.abc.Messageable] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        # channel_id -> webhook that posts into it
+        self._webhooks: Dict[int, discord.Webhook] = {}
+        # channel_id -> lock held while its webhook is looked up or created,
+        # so the queue and send_file can't both create one
+        self._webhook_locks: Dict[int, asyncio.Lock] = {}
+        self.sent = 0
+        self.dropped = 0
+
+    def enqueue(self, channel: discord.abc.Messageable, embed: discord.Embed):
+        """Queue an embed for a log channel"""
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = deque()
+        if len(queue) >= self.MAX_QUEUE:
+            queue.popleft()
+            self.dropped += 1
+        queue.append(embed)
+        self._channels[channel.id] = channel
+
+        if channel.id not in self._tasks:
+            self._tasks[channel.id] = asyncio.create_task(self._run(channel.id))
+
+    async def send_file(self, channel: discord.abc.Messageable, embed: discord.Embed, file: discord.File):
+        """Send one embed with an attachment right away, on the same delivery path"""
+        if not await self._deliver(channel, [embed], file):
+            self.dropped += 1
+
+    @property
+    def depth(self) -> int:
+        """Embeds waiting across all channels"""
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def close(self, timeout: float = 5.0):
+        """Stop the flush tasks, giving queued embeds up to ``timeout`` seconds to go out"""
+        tasks = list(self._tasks.values())
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        self.dropped += self.depth
+
+    async def retire_webhook(self, guild: discord.Guild):
+        """Delete the guild's log webhook before its log channel changes"""
+        config = (await self.bot.guild_state.get(guild)).config
+        if not config.log_channel_id:
+            return
+        async with self._webhook_lock(config.log_channel_id):
+            self._webhooks.pop(config.log_channel_id, None)
+            # The config may have gained a webhook while we waited
+            config = (await self.bot.guild_state.get(guild)).config
+            if not (config.log_webhook_id and config.log_webhook_token):
+                return
+            webhook = discord.Webhook.partial(config.log_webhook_id, config.log_webhook_token, client=self.bot)
+            try:
+                await webhook.delete(reason="Log channel changed")
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                bot_logger.warning(f"Could not delete old log webhook {config.log_webhook_id}: {e}")
+
+    async def _run(self, channel_id: int):
+        try:
+            await asyncio.sleep(self.FLUSH_DELAY)
+            queue = self._queues[channel_id]
+            while queue:
+                batch = self._take_batch(queue)
+                if not await self._deliver(self._channels[channel_id], batch):
+                    self.dropped += len(batch)
+        finally:
+            # No await after the loop, so enqueue() can't add to a finished task
+            del self._tasks[channel_id]
+            if not self._queues.get(channel_id):
+                self._queues.pop(channel_id, None)
+                self._channels.pop(channel_id, None)
+
+    @staticmethod
+    def _take_batch(queue: Deque[discord.Embed]) -> List[discord.Embed]:
+        batch = [queue.popleft()]
+        total = len(batch[0])
+        while queue and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+            size = len(queue[0])
+            if total + size > MAX_EMBED_CHARS_PER_MESSAGE:
+                break
+            batch.append(queue.popleft())
+            total += size
+        return batch
+
+    async def _deliver(self, channel: discord.abc.Messageable, batch: List[discord.Embed],
+                       file: Optional[discord.File] = None) -> bool:
+        webhook = await self._get_webhook(channel)
+        extra = {'file': file} if file else {}
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            if file and attempt > 1:
+                file.reset()
+            try:
+                if webhook:
+                    await webhook.send(
+                        embeds=batch,
+                        username=self.bot.user.name,
+                        avatar_url=self.bot.user.display_avatar.url,
+                        **extra
+                    )
+                else:
+                    await channel.send(embeds=batch, **extra)
+                self.sent += len(batch)
+                return True
+            except discord.NotFound:
+                if webhook is None:
+                    return False
+                # Webhook was deleted — forget it and fall back to the channel
+                await self._forget_webhook(channel)
+                webhook = None
+            except discord.Forbidden:
+                # Permissions removed — nothing to retry
+                return False
+            except (discord.HTTPException, discord.RateLimited) as e:
+                delay = retry_after(e)
+                if delay is None or attempt == self.MAX_ATTEMPTS:
+                    bot_logger.warning(f"Failed to send {len(batch)} log embed(s) to {channel.id}: {e}")
+                    return False
+                await asyncio.sleep(delay)
+        return False
+
+    async def _get_webhook(self, channel: discord.abc.GuildChannel) -> Optional[discord.Webhook]:
+        """Webhook for a log channel, or None to use channel.send"""
+        config = (await self.bot.guild_state.get(channel.guild)).config
+        if not config.log_webhook_enabled:
+            return None
+
+        webhook = self._webhooks.get(channel.id)
+        if webhook is not None:
+            return webhook
+
+        async with self._webhook_lock(channel.id):
+            webhook = self._webhooks.get(channel.id)
+            if webhook is None:
+                webhook = await self._load_webhook(channel)
+            return webhook
+
+    async def _load_webhook(self, channel: discord.abc.GuildChannel) -> Optional[discord.Webhook]:
+        # Re-read: a webhook created while we waited for the lock is in the config by now
+        config = (await self.bot.guild_state.get(channel.guild)).config
+        if config.log_webhook_id and config.log_webhook_token:
+            webhook = discord.Webhook.partial(
+                config.log_webhook_id, config.log_webhook_token, client=self.bot
+            )
+        else:
+            if not channel.permissions_for(channel.guild.me).manage_webhooks:
+                return None
+            try:
+                webhook = await channel.create_webhook(name=WEBHOOK_NAME, reason="Moderation log delivery")
+            except discord.HTTPException as e:
+                bot_logger.warning(f"Could not create log webhook in {channel.id}: {e}")
+                return None
+            await self.bot.db.set_log_webhook(channel.guild.id, webhook.id, webhook.token)
+            await self.bot.invalidate_guild_config(channel.guild.id)
+
+        self._webhooks[channel.id] = webhook
+        return webhook
+
+    def _webhook_lock(self, channel_id: int) -> asyncio.Lock:
+        lock = self._webhook_locks.get(channel_id)
+        if lock is None:
+            lock = self._webhook_locks[channel_id] = asyncio.Lock()
+        return lock
+
+    async def _forget_webhook(self, channel: discord.abc.GuildChannel):
+        self._webhooks.pop(channel.id, None)
+        await self.bot.db.set_log_webhook(channel.guild.id, None, None)
+        await self.bot.invalidate_guild_config(channel.guild.id)
@@ -0,0 +1,153 @@
+"""
+Bounded per-guild message content store for delete/edit logging
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import discord
+
+# Longest content kept per message; Discord allows 4000 for Nitro users
+MAX_CONTENT_LENGTH = 4000
+
+
+class MessageRecord:
+    """What delete/edit logging needs to know about a message"""
+
+    __slots__ = ('id', 'author_id', 'channel_id', 'content', 'attachments', 'stored_at')
+
+    def __init__(self, message_id: int, author_id: int, channel_id: int,
+                 content: str, attachments: Tuple[str, ...], stored_at: float):
+        self.id = message_id
+        self.author_id = author_id
+        self.channel_id = channel_id
+        self.content = content
+        self.attachments = attachments
+        self.stored_at = stored_at
+
+    @classmethod
+    def from_message(cls, message: discord.Message, now: float) -> "MessageRecord":
+        return cls(
+            message.id,
+            message.author.id,
+            message.channel.id,
+            message.content[:MAX_CONTENT_LENGTH],
+            tuple(attachment.filename for attachment in message.attachments),
+            now,
+        )
+
+
+class MessageStore:
+    """Recent message content per guild, independent of discord.py's message cache.
+
+    Each guild has an OrderedDict in least-recently-touched order, so the
+    oldest record is always at the front: age and per-guild limits evict
+    from there in O(1). When the store as a whole is over its cap, records
+    are evicted from whichever guilds hold the most, so one busy guild
+    can't push every other guild's history out.
+    """
+
+    # Share of max_total freed at once when the store goes over its cap,
+    # so the scan for the largest guilds runs once per batch, not per insert
+    EVICT_FRACTION = 0.05
+
+    def __init__(self, per_guild: int, max_total: int, max_age: float):
+        self.per_guild = per_guild
+        self.max_total = max_total
+        self.max_age = max_age
+        self._guilds: Dict[int, "OrderedDict[int, MessageRecord]"] = {}
+        self._total = 0
+        self._evict_batch = max(1, int(max_total * self.EVICT_FRACTION))
+
+    def __len__(self):
+        return self._total
+
+    def add(self, message: discord.Message, now: Optional[float] = None):
+        """Remember a message's content"""
+        now = now if now is not None else time.monotonic()
+        records = self._guilds.get(message.guild.id)
+        if records is None:
+            records = self._guilds[message.guild.id] = OrderedDict()
+
+        if message.id not in records:
+            self._total += 1
+        records[message.id] = MessageRecord.from_message(message, now)
+        records.move_to_end(message.id)
+
+        self._evict_guild(records, now)
+        if not records:
+            del self._guilds[message.guild.id]
+        if self._total > self.max_total:
+            self._evict_largest()
+
+    def get(self, guild_id: int, message_id: int) -> Optional[MessageRecord]:
+        records = self._guilds.get(guild_id)
+        return records.get(message_id) if records else None
+
+    def update(self, guild_id: int, message_id: int, content: str, now: Optional[float] = None):
+        """Record an edit, refreshing the message's position"""
+        records = self._guilds.get(guild_id)
+        record = records.get(message_id) if records else None
+        if record is None:
+            return
+        record.content = content[:MAX_CONTENT_LENGTH]
+        record.stored_at = now if now is not None else time.monotonic()
+        records.move_to_end(message_id)
+
+    def pop(self, guild_id: int, message_id: int) -> Optional[MessageRecord]:
+        records = self._guilds.get(guild_id)
+        record = records.pop(message_id, None) if records else None
+        if record is not None:
+            self._total -= 1
+            if not records:
+                del self._guilds[guild_id]
+        return record
+
+    def pop_many(self, guild_id: int, message_ids: Iterable[int]) -> List[MessageRecord]:
+        """Remove and return the records that are still stored, oldest first"""
+        found = [record for record in (self.pop(guild_id, mid) for mid in message_ids) if record is not None]
+        found.sort(key=lambda record: record.id)
+        return found
+
+    def forget_guild(self, guild_id: int):
+        records = self._guilds.pop(guild_id, None)
+        if records:
+            self._total -= len(records)
+
+    def prune(self, now: Optional[float] = None):
+        """Evict expired records from every guild, including idle ones"""
+        now = now if now is not None else time.monotonic()
+        for guild_id, records in list(self._guilds.items()):
+            self._evict_guild(records, now)
+            if not records:
+                del self._guilds[guild_id]
+
+    def _evict_guild(self, records: "OrderedDict[int, MessageRecord]", now: float):
+        cutoff = now - self.max_age
+        while records:
+            record = next(iter(records.values()))
+            if record.stored_at >= cutoff and len(records) <= self.per_guild:
+                break
+            records.popitem(last=False)
+            self._total -= 1
+
+    def _evict_largest(self):
+        """Drop the store a batch below its cap by levelling the largest guilds down"""
+        # A cap smaller than the batch (or 0) would otherwise ask for more than is stored
+        excess = min(self._total - (self.max_total - self._evict_batch), self._total)
+        by_size = sorted(self._guilds.values(), key=len, reverse=True)
+        # The first ``level`` guilds are the same size; each round takes one
+        # record from each of them, widening the set as others are reached
+        level = 1
+        while excess > 0 and by_size[0]:
+            while level < len(by_size) and len(by_size[level]) >= len(by_size[0]):
+                level += 1
+            for records in by_size[:level]:
+                if excess <= 0 or not records:
+                    break
+                records.popitem(last=False)
+                self._total -= 1
+                excess -= 1
+
+        for guild_id in [guild_id for guild_id, records in self._guilds.items() if not records]:
+            del self._guilds[guild_id]
@@ -0,0 +1,42 @@
+"""
+Moderator tiers and the capability bits each one grants
+"""
+import enum
+from typing import Dict, Iterable, Tuple
+
+
+class Capability(enum.IntFlag):
+    """What a moderation command needs; commands may require several bits"""
+    VIEW_HISTORY = 1 << 0      # warnings, history, modstats, botstats
+    WARN = 1 << 1
+    MANAGE_MESSAGES = 1 << 2   # delete, purge, slowmode, pin
+    TIMEOUT = 1 << 3
+    KICK = 1 << 4
+    MANAGE_CHANNELS = 1 << 5   # lock, unlock
+    BAN = 1 << 6
+    MANAGE_ROLES = 1 << 7      # temprole
+    MANAGE_WARNINGS = 1 << 8   # clearwarnings, removewarning
+    MASS_ACTIONS = 1 << 9      # massban, masskick, masstimeout, masswarn
+
+
+_HELPER = Capability.VIEW_HISTORY | Capability.WARN | Capability.MANAGE_MESSAGES
+_MOD = _HELPER | Capability.TIMEOUT | Capability.KICK | Capability.MANAGE_CHANNELS
+_SENIOR = _MOD | Capability.BAN | Capability.MANAGE_ROLES | Capability.MANAGE_WARNINGS
+_ADMIN = _SENIOR | Capability.MASS_ACTIONS
+
+# Tier name -> capability mask, lowest first
+TIERS: Dict[str, int] = {
+    'helper': int(_HELPER),
+    'mod': int(_MOD),
+    'senior': int(_SENIOR),
+    'admin': int(_ADMIN),
+}
+
+
+def compile_role_capabilities(rows: Iterable[Tuple[int, str]]) -> Dict[int, int]:
+    """Turn (role_id, tier) rows into role_id -> capability mask"""
+    return {role_id: TIERS.get(tier, 0) for role_id, tier in rows}
+
+
+def capability_names(mask: int) -> str:
+    return ", ".join(cap.name.lower() for cap in Capability if mask & cap)
@@ -0,0 +1,162 @@
+"""
+Streaming purge engine: filtered history scan with batched deletion
+"""
+import asyncio
+import re
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, List, Optional
+
+import discord
+
+from utils.bulk import retry_after
+
+# Most messages one purge may delete
+MAX_PURGE = 2000
+# Most messages one purge may look at while searching for matches
+MAX_SCAN = 10000
+# Discord only bulk-deletes messages younger than 14 days; keep a margin
+# so a message doesn't age out between the check and the request
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+BULK_DELETE_SIZE = 100
+# Minimum seconds between progress callbacks
+PROGRESS_INTERVAL = 2.0
+
+
+class PurgeFilter:
+    """Which messages a purge should delete; every set criterion must match"""
+
+    __slots__ = ('user_id', 'contains', 'pattern', 'bots', 'attachments', 'exclude')
+
+    def __init__(self, user_id: Optional[int] = None, contains: Optional[str] = None,
+                 pattern: Optional[re.Pattern] = None, bots: bool = False,
+                 attachments: bool = False, exclude: frozenset = frozenset()):
+        self.user_id = user_id
+        self.contains = contains.casefold() if contains else None
+        self.pattern = pattern
+        self.bots = bots
+        self.attachments = attachments
+        # Message IDs that are never deleted (e.g. the progress message)
+        self.exclude = exclude
+
+    def __call__(self, message: discord.Message) -> bool:
+        if message.id in self.exclude or message.pinned:
+            return False
+        if self.user_id is not None and message.author.id != self.user_id:
+            return False
+        if self.bots and not message.author.bot:
+            return False
+        if self.attachments and not message.attachments:
+            return False
+        if self.contains is not None and self.contains not in message.content.casefold():
+            return False
+        if self.pattern is not None and not self.pattern.search(message.content):
+            return False
+        return True
+
+
+class PurgeResult:
+    __slots__ = ('scanned', 'deleted', 'failed')
+
+    def __init__(self):
+        self.scanned = 0
+        self.deleted = 0
+        self.failed = 0
+
+
+async def purge_channel(
+    channel: discord.TextChannel,
+    limit: int,
+    check: Callable[[discord.Message], bool],
+    *,
+    before: Optional[discord.abc.Snowflake] = None,
+    after: Optional[discord.abc.Snowflake] = None,
+    on_deleted: Optional[Callable[[List[discord.Message]], None]] = None,
+    on_progress: Optional[Callable[[PurgeResult], Awaitable[None]]] = None,
+) -> PurgeResult:
+    """Delete up to ``limit`` messages matching ``check``, newest first.
+
+    History is read lazily page by page, so memory holds at most one
+    pending batch. Messages young enough are removed 100 at a time with
+    bulk delete; once the scan reaches older messages it switches to
+    one-by-one deletes, which Discord rate-limits per channel.
+    """
+    result = PurgeResult()
+    pending: List[discord.Message] = []
+    last_progress = time.monotonic()
+
+    async def report(force: bool = False):
+        nonlocal last_progress
+        if on_progress and (force or time.monotonic() - last_progress >= PROGRESS_INTERVAL):
+            last_progress = time.monotonic()
+            await on_progress(result)
+
+    async def flush():
+        batch = pending[:]
+        pending.clear()
+        if not batch:
+            return
+        deleted = await _bulk_delete(channel, batch)
+        result.deleted += len(deleted)
+        result.failed += len(batch) - len(deleted)
+        if on_deleted and deleted:
+            on_deleted(deleted)
+        await report()
+
+    bulk_cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+    matched = 0
+
+    async for message in channel.history(limit=MAX_SCAN, before=before, after=after, oldest_first=False):
+        result.scanned += 1
+        if not check(message):
+            continue
+
+        matched += 1
+        if message.created_at >= bulk_cutoff:
+            pending.append(message)
+            if len(pending) >= BULK_DELETE_SIZE:
+                await flush()
+        else:
+            # History is newest first, so everything from here on is too old to bulk delete
+            await flush()
+            if await _delete_one(message):
+                result.deleted += 1
+                if on_deleted:
+                    on_deleted([message])
+            else:
+                result.failed += 1
+            await report()
+
+        if matched >= limit:
+            break
+
+    await flush()
+    await report(force=True)
+    return result
+
+
+async def _bulk_delete(channel: discord.TextChannel, batch: List[discord.Message]) -> List[discord.Message]:
+    """Delete a batch of young messages, returning the ones that are gone"""
+    if len(batch) == 1:
+        return batch if await _delete_one(batch[0]) else []
+    try:
+        await channel.delete_messages(batch)
+        return batch
+    except discord.NotFound:
+        # Someone else deleted part of the batch first; settle it one by one
+        return [message for message in batch if await _delete_one(message)]
+
+
+async def _delete_one(message: discord.Message) -> bool:
+    for _ in range(3):
+        try:
+            await message.delete()
+            return True
+        except discord.NotFound:
+            return False
+        except (discord.HTTPException, discord.RateLimited) as e:
+            delay = retry_after(e)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+    return False
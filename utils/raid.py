@@ -0,0 +1,149 @@
+"""
+Streaming join-burst (raid) detection
+"""
+import re
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import discord
+
+# Hard cap on joins remembered per guild — keeps memory constant during a flood
+MAX_TRACKED_JOINS = 200
+
+# Account-age histogram bucket upper bounds, in seconds
+AGE_BUCKETS = (3600, 86400, 7 * 86400, 30 * 86400)
+# Accounts in the first N buckets (younger than a day) count as "young"
+YOUNG_BUCKETS = 2
+
+# How long a raid stays active after the last trigger, as a multiple of the window
+ACTIVE_WINDOW_MULTIPLIER = 3
+MIN_ACTIVE_SECONDS = 60
+
+RAID_ACTIONS = ('alert', 'lockdown', 'timeout')
+
+_NAME_STRIP_RE = re.compile(r'[^a-z]')
+
+# (joined_at, member_id, age_bucket, name_key)
+JoinEntry = Tuple[float, int, int, Optional[str]]
+
+
+def _age_bucket(age_seconds: float) -> int:
+    for index, bound in enumerate(AGE_BUCKETS):
+        if age_seconds < bound:
+            return index
+    return len(AGE_BUCKETS)
+
+
+def _name_key(name: str) -> Optional[str]:
+    """Collapse a username to a skeleton so 'raider01' and 'Raider_77' cluster"""
+    key = _NAME_STRIP_RE.sub('', name.lower())[:16]
+    return key if len(key) >= 3 else None
+
+
+class RaidSignal:
+    """Result of a join that tripped (or continued) a raid"""
+
+    __slots__ = ('reasons', 'new', 'member_ids')
+
+    def __init__(self, reasons: List[str], new: bool, member_ids: List[int]):
+        self.reasons = reasons
+        # True only for the join that started the raid
+        self.new = new
+        # Members that should be actioned for this signal
+        self.member_ids = member_ids
+
+
+class JoinRateDetector:
+    """Sliding-window join statistics for one guild.
+
+    Every join is appended to a bounded deque; joins older than the window
+    are evicted from the left, and the account-age histogram and name
+    clusters are updated incrementally as entries enter and leave. Each
+    join is O(1) amortised with memory capped at MAX_TRACKED_JOINS.
+    """
+
+    __slots__ = ('window', 'threshold', 'joins', 'age_counts', 'names', 'active_until')
+
+    def __init__(self, window: int, threshold: int):
+        self.window = window
+        self.threshold = threshold
+        self.joins: Deque[JoinEntry] = deque()
+        self.age_counts = [0] * (len(AGE_BUCKETS) + 1)
+        self.names: Counter = Counter()
+        self.active_until = 0.0
+
+    def _evict(self, cutoff: float):
+        joins = self.joins
+        while joins and (joins[0][0] < cutoff or len(joins) > MAX_TRACKED_JOINS):
+            _, _, bucket, key = joins.popleft()
+            self.age_counts[bucket] -= 1
+            if key:
+                self.names[key] -= 1
+                if not self.names[key]:
+                    del self.names[key]
+
+    def record(self, member: discord.Member, now: Optional[float] = None) -> Optional[RaidSignal]:
+        """Add a join and return a RaidSignal if the guild is (now) under a raid"""
+        now = now if now is not None else time.time()
+        bucket = _age_bucket(now - member.created_at.timestamp())
+        key = _name_key(member.name)
+
+        self.joins.append((now, member.id, bucket, key))
+        self.age_counts[bucket] += 1
+        if key:
+            self.names[key] += 1
+        self._evict(now - self.window)
+
+        if now < self.active_until:
+            # Raid already in progress — every newcomer is part of it
+            self.active_until = now + self._active_seconds()
+            return RaidSignal([], False, [member.id])
+
+        reasons = []
+        cluster_limit = max(3, self.threshold // 2)
+        if len(self.joins) >= self.threshold:
+            reasons.append(f"{len(self.joins)} joins in {self.window}s")
+        young = sum(self.age_counts[:YOUNG_BUCKETS])
+        if young >= cluster_limit:
+            reasons.append(f"{young} accounts younger than a day")
+        if key and self.names[key] >= cluster_limit:
+            reasons.append(f"{self.names[key]} similar names (\"{key}\")")
+
+        if not reasons:
+            return None
+
+        self.active_until = now + self._active_seconds()
+        return RaidSignal(reasons, True, [entry[1] for entry in self.joins])
+
+    def _active_seconds(self) -> float:
+        return max(self.window * ACTIVE_WINDOW_MULTIPLIER, MIN_ACTIVE_SECONDS)
+
+    @property
+    def active(self) -> bool:
+        return time.time() < self.active_until
+
+    def histogram(self) -> List[int]:
+        """Account-age counts for joins currently in the window"""
+        return list(self.age_counts)
+
+
+class RaidDetector:
+    """Per-guild JoinRateDetector registry"""
+
+    def __init__(self):
+        self._guilds: Dict[int, JoinRateDetector] = {}
+
+    def record(self, member: discord.Member, window: int, threshold: int) -> Optional[RaidSignal]:
+        detector = self._guilds.get(member.guild.id)
+        if detector is None or detector.window != window or detector.threshold != threshold:
+            # First join seen or settings changed — start a fresh window
+            detector = JoinRateDetector(window, threshold)
+            self._guilds[member.guild.id] = detector
+        return detector.record(member)
+
+    def get(self, guild_id: int) -> Optional[JoinRateDetector]:
+        return self._guilds.get(guild_id)
+
+    def reset(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
@@ -0,0 +1,230 @@
+"""
+Persistent scheduled-action engine backed by the scheduled_jobs table
+"""
+import asyncio
+import heapq
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.database import parse_timestamp
+from utils.logger import bot_logger
+
+
+class ScheduledJob:
+    """A single persisted job"""
+
+    __slots__ = ('id', 'kind', 'guild_id', 'key', 'payload', 'run_at', 'attempts')
+
+    def __init__(self, id: int, kind: str, guild_id: int, key: Optional[str],
+                 payload: Dict[str, Any], run_at: float, attempts: int = 0):
+        self.id = id
+        self.kind = kind
+        self.guild_id = guild_id
+        self.key = key
+        self.payload = payload
+        self.run_at = run_at
+        self.attempts = attempts
+
+    @classmethod
+    def from_row(cls, row: dict) -> "ScheduledJob":
+        return cls(
+            row['id'],
+            row['kind'],
+            row['guild_id'],
+            row['job_key'],
+            json.loads(row['payload']) if row['payload'] else {},
+            parse_timestamp(row['run_at']).timestamp(),
+            row['attempts'],
+        )
+
+
+JobHandler = Callable[[ScheduledJob], Awaitable[None]]
+
+
+class JobScheduler:
+    """Runs persisted jobs when they fall due.
+
+    Cogs register a handler per job kind and schedule jobs with a run time.
+    Jobs are written to SQLite before they are queued, so they survive
+    restarts. A single dispatcher task sleeps on a min-heap of run times
+    and hands due jobs to handlers through a bounded pool. A job row is only
+    deleted after its handler returns, giving at-least-once execution —
+    handlers must tolerate being run twice.
+    """
+
+    MAX_CONCURRENCY = 5
+    MAX_ATTEMPTS = 5
+    # First retry delay in seconds; doubles on each further failure
+    RETRY_BASE = 30
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: Dict[int, ScheduledJob] = {}
+        # (kind, guild_id, key) -> job_id for keyed jobs
+        self._keyed: Dict[Tuple[str, int, str], int] = {}
+        self._heap: List[Tuple[float, int]] = []
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        self._running: set = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, kind: str, handler: JobHandler):
+        """Register the coroutine that executes jobs of ``kind``"""
+        self._handlers[kind] = handler
+
+    async def start(self):
+        """Load pending jobs from the database and start dispatching"""
+        rows = await self.bot.db.get_scheduled_jobs()
+        self._jobs = {}
+        self._keyed = {}
+        self._heap = []
+        for row in rows:
+            job = ScheduledJob.from_row(row)
+            self._jobs[job.id] = job
+            if job.key is not None:
+                self._keyed[(job.kind, job.guild_id, job.key)] = job.id
+            self._heap.append((job.run_at, job.id))
+        heapq.heapify(self._heap)
+
+        self._task = asyncio.create_task(self._run())
+        bot_logger.info(f"Job scheduler started with {len(self._jobs)} pending job(s)")
+
+    def stop(self):
+        """Stop dispatching; in-flight jobs stay in the database and rerun on start"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for task in list(self._running):
+            task.cancel()
+
+    async def schedule(self, kind: str, run_at: datetime, guild_id: int,
+                       payload: Optional[Dict[str, Any]] = None,
+                       key: Optional[str] = None) -> int:
+        """Persist and queue a job.
+
+        A job with a ``key`` replaces any pending job of the same kind,
+        guild and key (e.g. re-locking a channel resets its unlock timer).
+        """
+        if key is not None:
+            self._forget(kind, guild_id, key)
+
+        job_id = await self.bot.db.add_scheduled_job(
+            kind, guild_id, key, json.dumps(payload or {}), run_at
+        )
+        job = ScheduledJob(job_id, kind, guild_id, key, payload or {}, run_at.timestamp())
+        self._push(job)
+        return job_id
+
+    async def schedule_in(self, kind: str, delay: timedelta, guild_id: int,
+                          payload: Optional[Dict[str, Any]] = None,
+                          key: Optional[str] = None) -> int:
+        """Schedule a job to run after ``delay``"""
+        run_at = datetime.now(timezone.utc) + delay
+        return await self.schedule(kind, run_at, guild_id, payload, key)
+
+    async def cancel(self, kind: str, guild_id: int, key: str) -> bool:
+        """Cancel a pending keyed job; returns True if one existed"""
+        found = self._forget(kind, guild_id, key)
+        await self.bot.db.cancel_scheduled_job(kind, guild_id, key)
+        return found
+
+    def is_scheduled(self, kind: str, guild_id: int, key: str) -> bool:
+        """Whether a keyed job is pending (not yet handed to its handler)"""
+        return (kind, guild_id, key) in self._keyed
+
+    @property
+    def pending(self) -> int:
+        return len(self._jobs)
+
+    def _forget(self, kind: str, guild_id: int, key: str) -> bool:
+        # Heap entries for forgotten jobs are skipped lazily by the dispatcher
+        job_id = self._keyed.pop((kind, guild_id, key), None)
+        if job_id is None:
+            return False
+        return self._jobs.pop(job_id, None) is not None
+
+    def _push(self, job: ScheduledJob):
+        self._jobs[job.id] = job
+        if job.key is not None:
+            self._keyed[(job.kind, job.guild_id, job.key)] = job.id
+        entry = (job.run_at, job.id)
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            self._wakeup.set()
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                if not self._heap:
+                    await self._wakeup.wait()
+                    self._wakeup.clear()
+                    continue
+
+                delay = self._heap[0][0] - time.time()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    continue
+
+                _, job_id = heapq.heappop(self._heap)
+                job = self._jobs.pop(job_id, None)
+                if job is None:
+                    continue  # Cancelled or replaced
+                if job.key is not None:
+                    self._keyed.pop((job.kind, job.guild_id, job.key), None)
+
+                # Blocks the dispatcher once MAX_CONCURRENCY jobs are in flight
+                await self._semaphore.acquire()
+                task = asyncio.create_task(self._execute(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                bot_logger.error(f"Job scheduler error: {e}", exc_info=e)
+                await asyncio.sleep(1)
+
+    async def _execute(self, job: ScheduledJob):
+        try:
+            handler = self._handlers.get(job.kind)
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{job.kind}'")
+            await handler(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._retry(job, e)
+        else:
+            await self.bot.db.remove_scheduled_job(job.id)
+        finally:
+            self._semaphore.release()
+
+    async def _retry(self, job: ScheduledJob, error: Exception):
+        if job.key is not None and (job.kind, job.guild_id, job.key) in self._keyed:
+            # Superseded by a newer job with the same key while running
+            await self.bot.db.remove_scheduled_job(job.id)
+            return
+
+        job.attempts += 1
+        if job.attempts >= self.MAX_ATTEMPTS:
+            bot_logger.error(
+                f"Dropping job #{job.id} ({job.kind}) after {job.attempts} failed attempts: {error}"
+            )
+            await self.bot.db.remove_scheduled_job(job.id)
+            return
+
+        delay = self.RETRY_BASE * (2 ** (job.attempts - 1))
+        bot_logger.warning(
+            f"Job #{job.id} ({job.kind}) failed (attempt {job.attempts}), retrying in {delay}s: {error}"
+        )
+        run_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        job.run_at = run_at.timestamp()
+        await self.bot.db.reschedule_job(job.id, run_at, job.attempts)
+        self._push(job)
@@ -0,0 +1,37 @@
+"""
+Wall-clock timing of startup phases
+"""
+import time
+from typing import Awaitable, List, Tuple, TypeVar
+
+from utils.logger import bot_logger
+
+T = TypeVar('T')
+
+
+class StartupProfile:
+    """Named phase durations, reported once setup is done.
+
+    Phases passed to asyncio.gather together overlap, so their durations
+    add up to more than the wall time between them.
+    """
+
+    def __init__(self, started: float):
+        # perf_counter() reading taken when the process started importing
+        self.started = started
+        self.phases: List[Tuple[str, float]] = []
+
+    def record(self, name: str, seconds: float):
+        self.phases.append((name, seconds))
+
+    async def run(self, name: str, aw: Awaitable[T]) -> T:
+        """Await ``aw`` and record how long it took as phase ``name``"""
+        start = time.perf_counter()
+        try:
+            return await aw
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def report(self, label: str):
+        phases = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases)
+        bot_logger.info(f"{label} after {time.perf_counter() - self.started:.2f} s ({phases})")
@@ -0,0 +1,202 @@
+"""
+Temporary ban expiry scheduler backed by the temp_bans table
+"""
+import asyncio
+import enum
+import heapq
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import discord
+
+from utils.database import parse_timestamp
+from utils.embeds import EmbedFactory
+from utils.logger import bot_logger, mod_logger
+
+# (expires_at_epoch, ban_id, guild_id, user_id)
+HeapEntry = Tuple[float, int, int, int]
+
+
+class UnbanResult(enum.Enum):
+    LIFTED = enum.auto()   # We lifted the ban
+    GONE = enum.auto()     # Nothing to lift: already unbanned, or the bot left the guild
+    FAILED = enum.auto()   # Can't be lifted by retrying (missing permissions)
+    RETRY = enum.auto()    # Transient failure
+
+
+class TempBanScheduler:
+    """Lifts temporary bans when they expire.
+
+    Pending bans live in a min-heap keyed on expiry. A single task sleeps
+    until the earliest deadline (or until a sooner ban is scheduled) and
+    lifts every ban that falls due in the same window as one batch. Bans
+    that can't be lifted are reported to the guild's log channel.
+    """
+
+    # Bans expiring within this many seconds of each other are lifted together
+    BATCH_WINDOW = 1.0
+    # Delay before the first retry of an unban that failed for a transient
+    # reason, doubled on each further attempt
+    RETRY_DELAY = 60.0
+    # Give up (and tell the guild) after this many transient failures
+    MAX_ATTEMPTS = 5
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._heap: List[HeapEntry] = []
+        # (guild_id, user_id) -> ban_id of the live entry; stale heap entries are skipped
+        self._active: Dict[Tuple[int, int], int] = {}
+        # ban_id -> failed attempts so far; in memory, so a restart starts over
+        self._attempts: Dict[int, int] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Rehydrate pending bans from the database and start the expiry task"""
+        rows = await self.bot.db.get_temp_bans()
+        self._heap = []
+        self._active = {}
+        for row in rows:
+            entry = (
+                parse_timestamp(row['expires_at']).timestamp(),
+                row['id'],
+                row['guild_id'],
+                row['user_id'],
+            )
+            self._heap.append(entry)
+            self._active[(row['guild_id'], row['user_id'])] = row['id']
+        heapq.heapify(self._heap)
+
+        self._task = asyncio.create_task(self._run())
+        bot_logger.info(f"Temp-ban scheduler started with {len(self._heap)} pending ban(s)")
+
+    def stop(self):
+        """Stop the expiry task"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def schedule(self, ban_id: int, guild_id: int, user_id: int, expires_at: datetime):
+        """Track a newly recorded temporary ban"""
+        entry = (expires_at.timestamp(), ban_id, guild_id, user_id)
+        heapq.heappush(self._heap, entry)
+        self._active[(guild_id, user_id)] = ban_id
+
+        # Only wake the task if this ban is now the next one due
+        if self._heap[0] is entry:
+            self._wakeup.set()
+
+    async def cancel(self, guild_id: int, user_id: int):
+        """Forget a pending temporary ban (e.g. it was made permanent or lifted by hand)"""
+        ban_id = self._active.pop((guild_id, user_id), None)
+        if ban_id is not None:
+            self._attempts.pop(ban_id, None)
+            await self.bot.db.cancel_temp_ban(guild_id, user_id)
+
+    @property
+    def pending(self) -> int:
+        return len(self._active)
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                if not self._heap:
+                    await self._wakeup.wait()
+                    self._wakeup.clear()
+                    continue
+
+                delay = self._heap[0][0] - time.time()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    continue
+
+                cutoff = time.time() + self.BATCH_WINDOW
+                due = []
+                while self._heap and self._heap[0][0] <= cutoff:
+                    entry = heapq.heappop(self._heap)
+                    # Skip entries superseded by a newer tempban or cancelled
+                    if self._active.get((entry[2], entry[3])) == entry[1]:
+                        due.append(entry)
+
+                if due:
+                    await self._expire(due)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                bot_logger.error(f"Temp-ban scheduler error: {e}", exc_info=e)
+                await asyncio.sleep(self.RETRY_DELAY)
+
+    async def _expire(self, due: List[HeapEntry]):
+        """Lift a batch of expired bans and clear their records in one write"""
+        results = await asyncio.gather(
+            *(self._unban(guild_id, user_id) for _, _, guild_id, user_id in due)
+        )
+
+        finished = []
+        lifted = []
+        for entry, result in zip(due, results):
+            _, ban_id, guild_id, user_id = entry
+            if result is UnbanResult.RETRY:
+                attempts = self._attempts[ban_id] = self._attempts.get(ban_id, 0) + 1
+                if attempts < self.MAX_ATTEMPTS:
+                    delay = self.RETRY_DELAY * (2 ** (attempts - 1))
+                    heapq.heappush(self._heap, (time.time() + delay, ban_id, guild_id, user_id))
+                    continue
+                result = UnbanResult.FAILED
+
+            finished.append(ban_id)
+            self._attempts.pop(ban_id, None)
+            if self._active.get((guild_id, user_id)) == ban_id:
+                del self._active[(guild_id, user_id)]
+            if result is UnbanResult.LIFTED:
+                lifted.append((guild_id, user_id))
+            elif result is UnbanResult.FAILED:
+                await self._report_failure(guild_id, user_id)
+
+        await self.bot.db.remove_temp_bans(finished)
+
+        moderator_id = self.bot.user.id if self.bot.user else 0
+        await self.bot.db.log_actions([
+            (guild_id, user_id, moderator_id, 'unban', "Temporary ban expired")
+            for guild_id, user_id in lifted
+        ])
+
+    async def _unban(self, guild_id: int, user_id: int) -> UnbanResult:
+        """Try to lift one ban"""
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
+            return UnbanResult.GONE
+
+        try:
+            await guild.unban(discord.Object(id=user_id), reason="Temporary ban expired")
+            mod_logger.info(f"Temporary ban for {user_id} expired in {guild.name}")
+            return UnbanResult.LIFTED
+        except discord.NotFound:
+            # Already unbanned manually
+            return UnbanResult.GONE
+        except discord.Forbidden:
+            bot_logger.warning(f"Missing permissions to lift temporary ban for {user_id} in {guild.name}")
+            return UnbanResult.FAILED
+        except discord.HTTPException as e:
+            bot_logger.warning(f"Failed to lift temporary ban for {user_id} in {guild.name}: {e}")
+            return UnbanResult.RETRY
+
+    async def _report_failure(self, guild_id: int, user_id: int):
+        """Tell the guild a temporary ban has to be lifted by hand"""
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
+            return
+        bot_logger.error(f"Giving up on lifting temporary ban for {user_id} in {guild.name}")
+        channel = (await self.bot.guild_state.get(guild)).log_channel
+        if channel:
+            self.bot.log_sender.enqueue(channel, EmbedFactory.error(
+                "Temporary Ban Not Lifted",
+                f"The temporary ban for <@{user_id}> (`{user_id}`) has expired, but I couldn't "
+                f"lift it. Check that I have the Ban Members permission and unban them manually."
+            ))
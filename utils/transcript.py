@@ -0,0 +1,34 @@
+"""
+Plain-text transcripts of deleted messages
+"""
+import asyncio
+import io
+from typing import Dict, Iterable, List
+
+import discord
+
+from utils.messagestore import MessageRecord
+
+
+def render_transcript(header: List[str], records: Iterable[MessageRecord], names: Dict[int, str]) -> bytes:
+    """Render records (oldest first) as UTF-8 text; CPU-only, safe to run in a thread"""
+    lines = list(header)
+    lines.append("-" * 60)
+    for record in records:
+        sent_at = discord.utils.snowflake_time(record.id).strftime("%Y-%m-%d %H:%M:%S")
+        author = names.get(record.author_id, "Unknown user")
+        lines.append(f"[{sent_at} UTC] {author} ({record.author_id}): {record.content}")
+        if record.attachments:
+            lines.append(f"    Attachments: {', '.join(record.attachments)}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def build_transcript_file(
+    header: List[str],
+    records: List[MessageRecord],
+    names: Dict[int, str],
+    filename: str
+) -> discord.File:
+    """Render a transcript off the event loop and wrap it as an upload"""
+    data = await asyncio.to_thread(render_transcript, header, records, names)
+    return discord.File(io.BytesIO(data), filename=filename)